@@ -0,0 +1,96 @@
+"""
+Benchmark ARIMA warm starts and parameter reuse against full refits.
+
+Run from the repository root:
+
+    python -m benchmarks.arima_warm_start
+
+Every configuration is backtested on the same synthetic AR(1) series. For
+each one the wall-clock time is reported with the drift of its forecasts
+from the full refit forecasts (mean and max absolute difference) and its
+one-step MSE.
+"""
+import argparse
+import time
+import warnings
+import numpy as np
+from benchmarks.synthetic import make_panel
+from general_analytics_framwork.data_preparation.data_converters import (
+    TimeseriesConverter,
+    TimeseriesBacktestConverter
+)
+from general_analytics_framwork.modelling import ARIMA
+
+
+def backtest(model, panel, train_window_length):
+    time_series = TimeseriesConverter(
+        series_id_col="series_id",
+        date_col="date",
+        y_col="y",
+        regressor_cols=[],
+        date_parser=None
+    ).run(panel)
+    backtest_datasets = TimeseriesBacktestConverter(
+        train_window_length=train_window_length,
+        max_test_window_length=1
+    ).run(time_series)
+    start = time.perf_counter()
+    model.run(backtest_datasets)
+    elapsed = time.perf_counter() - start
+
+    predictions = []
+    actuals = []
+    for backtest_dataset in backtest_datasets:
+        model_predictions = backtest_dataset.predictions[model.get_reference()]
+        for window_index in backtest_dataset.get_window_indexes():
+            predictions.append(model_predictions[window_index]["prediction"][0])
+            actuals.append(
+                backtest_dataset.get_data("y", "test", window_index)[0]
+            )
+    return elapsed, np.array(predictions), np.array(actuals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-series", type=int, default=5)
+    parser.add_argument("--series-length", type=int, default=200)
+    parser.add_argument("--train-window-length", type=int, default=60)
+    parser.add_argument(
+        "--refit-every",
+        type=int,
+        nargs="+",
+        default=[5, 20]
+    )
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    panel = make_panel(args.n_series, args.series_length)
+    configurations = [
+        ("full refit", ARIMA()),
+        ("warm start", ARIMA(warm_start=True))
+    ]
+    for refit_every in args.refit_every:
+        configurations.append((
+            f"refit every {refit_every}",
+            ARIMA(warm_start=True, refit_every=refit_every)
+        ))
+
+    print(f"{'configuration':>18} {'time (s)':>9} {'speedup':>8} "
+          f"{'mean drift':>11} {'max drift':>10} {'MSE':>8}")
+    baseline_time = baseline_predictions = None
+    for name, model in configurations:
+        elapsed, predictions, actuals = backtest(
+            model,
+            panel,
+            args.train_window_length
+        )
+        if baseline_predictions is None:
+            baseline_time, baseline_predictions = elapsed, predictions
+        drift = np.abs(predictions - baseline_predictions)
+        mse = np.mean((predictions - actuals) ** 2)
+        print(f"{name:>18} {elapsed:>9.2f} {baseline_time / elapsed:>8.1f} "
+              f"{drift.mean():>11.4f} {drift.max():>10.4f} {mse:>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
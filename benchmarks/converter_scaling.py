@@ -0,0 +1,81 @@
+"""
+Benchmark TimeseriesConverter against the number of series in the panel.
+
+Run from the repository root:
+
+    python -m benchmarks.converter_scaling
+
+For each series count a synthetic long format panel is converted with
+TimeseriesConverter and, for the smaller panels, with the per-series boolean
+masking approach it replaced, so the two scaling curves can be compared.
+"""
+import argparse
+import time
+from benchmarks.synthetic import make_panel
+from general_analytics_framwork.data_preparation.data_converters import (
+    TimeseriesConverter
+)
+
+
+def masking_split(converter, data):
+    output = []
+    for series_id in data[converter.series_id_col].unique():
+        element = data[data[converter.series_id_col] == series_id]
+        output.append((
+            series_id,
+            converter.parse_dates(element[converter.date_col]),
+            element[converter.y_col].to_numpy(dtype="float64")
+        ))
+    return output
+
+
+def time_call(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--series-counts",
+        type=int,
+        nargs="+",
+        default=[100, 1000, 5000, 20000, 50000]
+    )
+    parser.add_argument("--series-length", type=int, default=60)
+    parser.add_argument(
+        "--max-masking-series",
+        type=int,
+        default=1000,
+        help="largest panel to also time with per-series masking"
+    )
+    args = parser.parse_args()
+
+    converter = TimeseriesConverter(
+        series_id_col="series_id",
+        date_col="date",
+        y_col="y",
+        regressor_cols=[],
+        date_parser="%Y-%m-%d"
+    )
+    print(f"{'series':>8} {'rows':>10} {'groupby (s)':>12} "
+          f"{'series/s':>10} {'masking (s)':>12}")
+    for n_series in args.series_counts:
+        data = make_panel(
+            n_series,
+            args.series_length,
+            shuffle=True,
+            date_format="%Y-%m-%d"
+        )
+        groupby_time = time_call(converter.run, data)
+        if n_series <= args.max_masking_series:
+            masking_time = f"{time_call(masking_split, converter, data):12.3f}"
+        else:
+            masking_time = f"{'-':>12}"
+        print(f"{n_series:>8} {len(data):>10} {groupby_time:>12.3f} "
+              f"{n_series / groupby_time:>10.0f} {masking_time}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+Benchmark each stage of the model experimentation pipeline on a synthetic
+panel.
+
+Run from the repository root:
+
+    python -m benchmarks.pipeline --n-series 200 --series-length 120
+
+The panel is written to a CSV and run through loading, TimeseriesConverter,
+TimeseriesBacktestConverter, RandomWalk and ARIMA backtests, error
+computation and headless forecast plotting. Stages are timed on one pass
+and, as tracemalloc slows allocation heavy code several times over, their
+peak traced memory is measured on a second pass. The time, throughput and
+peak memory of every stage are printed and saved as JSON, by default to
+benchmarks/results/pipeline_<commit>.json. Passing an earlier results file
+to --compare prints the change of every stage against it and exits with an
+error if any stage got slower than --tolerance allows.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import make_panel, get_regressor_cols
+from general_analytics_framwork.data_preparation.data_converters import (
+    TimeseriesConverter,
+    TimeseriesBacktestConverter,
+    TimeseriesBacktestResultsConverter
+)
+from general_analytics_framwork.data_preparation.data_loaders import (
+    LocalDataLoader
+)
+from general_analytics_framwork.modelling import ARIMA, RandomWalk
+from general_analytics_framwork.visualisation import ForecastGraphPlotter
+
+
+def measure(stages, name, function, n_items, trace_memory=False):
+    """
+    Time a stage, record it in stages and return its output.
+
+    Parameters:
+        stages (list): Stage records to append to.
+        name (str): Name of the stage.
+        function (Callable[[], Any]): The work of the stage.
+        n_items (int): Number of items processed, for the throughput.
+        trace_memory (bool, optional): Whether to record the peak memory
+            allocated during the stage with tracemalloc.
+    """
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    output = function()
+    seconds = time.perf_counter() - start
+    peak_memory_mb = None
+    if trace_memory:
+        peak_memory_mb = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+    stages.append({
+        "stage": name,
+        "seconds": seconds,
+        "items": n_items,
+        "items_per_second": n_items / seconds if seconds else None,
+        "peak_memory_mb": peak_memory_mb
+    })
+    return output
+
+
+def run_pipeline(args, work_dir, trace_memory=False):
+    panel = make_panel(
+        args.n_series,
+        args.series_length,
+        n_regressors=args.n_regressors,
+        date_format="%Y-%m-%d",
+        seed=args.seed
+    )
+    csv_path = os.path.join(work_dir, "panel.csv")
+    panel.to_csv(csv_path, index=False)
+    n_rows = len(panel)
+    del panel
+
+    stages = []
+    data = measure(
+        stages,
+        "load",
+        LocalDataLoader(source_type="csv", path=csv_path).run,
+        n_rows,
+        trace_memory
+    )
+    time_series = measure(
+        stages,
+        "time_series_converter",
+        lambda: TimeseriesConverter(
+            series_id_col="series_id",
+            date_col="date",
+            y_col="y",
+            regressor_cols=get_regressor_cols(args.n_regressors),
+            date_parser="%Y-%m-%d"
+        ).run(data),
+        args.n_series,
+        trace_memory
+    )
+    del data
+    backtest_datasets = measure(
+        stages,
+        "backtest_converter",
+        lambda: TimeseriesBacktestConverter(
+            train_window_length=args.train_window_length,
+            max_test_window_length=args.max_test_window_length,
+            stride=args.stride
+        ).run(time_series),
+        args.n_series,
+        trace_memory
+    )
+    n_windows = sum(
+        len(backtest_dataset.get_window_indexes())
+        for backtest_dataset in backtest_datasets
+    )
+    measure(
+        stages,
+        "random_walk",
+        lambda: RandomWalk().run(backtest_datasets),
+        n_windows,
+        trace_memory
+    )
+    arima_datasets = backtest_datasets[:args.arima_series]
+    measure(
+        stages,
+        "arima",
+        lambda: ARIMA().run(arima_datasets),
+        sum(
+            len(backtest_dataset.get_window_indexes())
+            for backtest_dataset in arima_datasets
+        ),
+        trace_memory
+    )
+    measure(
+        stages,
+        "errors",
+        lambda: [
+            results_dataset.get_model_error(
+                error_functions=("MSE", "MAE", "SMAPE"),
+                level=level
+            )
+            for results_dataset in
+            TimeseriesBacktestResultsConverter().run(backtest_datasets)
+            for level in ("window", "horizon", "model")
+        ],
+        n_windows,
+        trace_memory
+    )
+    measure(
+        stages,
+        "plotting",
+        lambda: ForecastGraphPlotter(
+            title="Forecast",
+            fig_size=[12, 6],
+            x_label="Date",
+            y_label="Y",
+            output_dir=os.path.join(work_dir, "figures"),
+            max_figures=args.max_figures,
+            reuse_figure=True
+        ).run(backtest_datasets),
+        min(args.max_figures, n_windows),
+        trace_memory
+    )
+    return stages
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_stages(stages, baseline_stages=None):
+    baseline = {
+        stage["stage"]: stage for stage in baseline_stages or []
+    }
+    print(f"{'stage':>22} {'time (s)':>9} {'items/s':>10} {'peak MB':>8} "
+          f"{'vs baseline':>12}")
+    for stage in stages:
+        peak_memory = stage["peak_memory_mb"]
+        peak_memory = f"{peak_memory:>8.1f}" if peak_memory is not None \
+            else f"{'-':>8}"
+        items_per_second = stage["items_per_second"] or 0
+        change = f"{'-':>12}"
+        if stage["stage"] in baseline:
+            ratio = stage["seconds"] / baseline[stage["stage"]]["seconds"]
+            change = f"{ratio - 1:>+12.1%}"
+        print(f"{stage['stage']:>22} {stage['seconds']:>9.3f} "
+              f"{items_per_second:>10.0f} {peak_memory} {change}")
+
+
+def get_regressions(stages, baseline_stages, tolerance):
+    baseline = {stage["stage"]: stage for stage in baseline_stages}
+    return [
+        stage["stage"] for stage in stages
+        if stage["stage"] in baseline and
+        stage["seconds"] > baseline[stage["stage"]]["seconds"] * (1 + tolerance)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-series", type=int, default=200)
+    parser.add_argument("--series-length", type=int, default=120)
+    parser.add_argument("--n-regressors", type=int, default=0)
+    parser.add_argument("--train-window-length", type=int, default=24)
+    parser.add_argument("--max-test-window-length", type=int, default=6)
+    parser.add_argument("--stride", type=int, default=1)
+    parser.add_argument(
+        "--arima-series",
+        type=int,
+        default=5,
+        help="number of series backtested with ARIMA"
+    )
+    parser.add_argument("--max-figures", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="skip the memory-traced pass"
+    )
+    parser.add_argument("--output", help="path of the results JSON")
+    parser.add_argument("--compare", help="results JSON to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="relative slowdown of a stage reported as a regression"
+    )
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        stages = run_pipeline(args, work_dir)
+        if not args.no_memory:
+            memory_stages = run_pipeline(args, work_dir, trace_memory=True)
+            for stage, memory_stage in zip(stages, memory_stages):
+                stage["peak_memory_mb"] = memory_stage["peak_memory_mb"]
+
+    commit = get_commit()
+    results = {
+        "commit": commit,
+        "timestamp": pd.Timestamp.now().isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "parameters": vars(args),
+        "stages": stages
+    }
+    output = args.output or os.path.join(
+        "benchmarks",
+        "results",
+        f"pipeline_{commit}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    baseline_stages = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline_stages = json.load(f)["stages"]
+    print_stages(stages, baseline_stages)
+    print(f"results written to {output}")
+    if baseline_stages is not None:
+        regressions = get_regressions(stages, baseline_stages, args.tolerance)
+        if regressions:
+            print(f"slower than baseline: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Synthetic panel data shared by the benchmarks.
+"""
+import numpy as np
+import pandas as pd
+
+
+def make_panel(
+        n_series,
+        series_length,
+        n_regressors=0,
+        phi=0.7,
+        shuffle=False,
+        date_format=None,
+        seed=0
+):
+    """
+    Make a long format panel of AR(1) series.
+
+    Parameters:
+        n_series (int): Number of series.
+        series_length (int): Number of monthly observations per series.
+        n_regressors (int, optional): Number of standard normal regressor
+            columns, named x0, x1, ..., each added to y with a weight of 0.5.
+        phi (float, optional): The autoregressive coefficient.
+        shuffle (bool, optional): Interleave the rows of the series, ordered
+            by date, rather than storing each series contiguously.
+        date_format (str, optional): Store dates as strings in this format,
+            as read from a CSV.
+        seed (int, optional): Seed of the random generator.
+
+    Returns:
+        pd.DataFrame: Columns series_id, date, y and the regressors.
+    """
+    rng = np.random.default_rng(seed)
+    shocks = rng.standard_normal((n_series, series_length))
+    y = np.zeros_like(shocks)
+    for t in range(1, series_length):
+        y[:, t] = phi * y[:, t - 1] + shocks[:, t]
+    regressors = rng.standard_normal((n_regressors, n_series, series_length))
+    y += 0.5 * regressors.sum(axis=0)
+
+    # an offset rather than an alias, as month end is "M" before pandas 2.2
+    # and "ME" after it
+    dates = pd.date_range(
+        "2000-01-31",
+        periods=series_length,
+        freq=pd.offsets.MonthEnd()
+    )
+    if date_format:
+        dates = dates.strftime(date_format)
+    data = pd.DataFrame({
+        "series_id": np.repeat(
+            [f"s{i}" for i in range(n_series)],
+            series_length
+        ),
+        "date": np.tile(dates, n_series),
+        "y": y.ravel()
+    })
+    for position in range(n_regressors):
+        data[f"x{position}"] = regressors[position].ravel()
+    if shuffle:
+        data = data.sample(frac=1, random_state=seed).sort_values(
+            "date",
+            kind="stable"
+        )
+    return data
+
+
+def get_regressor_cols(n_regressors):
+    return [f"x{position}" for position in range(n_regressors)]
@@ -12,6 +12,9 @@ setup(
     author_email='tobywilkinson3@gmail.com',
     packages=find_packages(),
     install_requires=requirements,
+    extras_require={
+        'columnar': ['pyarrow==12.0.1'],
+    },
     classifiers=[
         'Development Status :: Pre-Alpha',
         'Intended Audience :: Developers',
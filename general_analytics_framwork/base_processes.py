@@ -1,14 +1,64 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    FIRST_EXCEPTION,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait
+)
+from contextlib import nullcontext
+from itertools import islice
+import pickle
+import queue
+import threading
+import warnings
+from general_analytics_framwork.checkpointing import (
+    CheckpointStore,
+    compute_data_fingerprint,
+    compute_fingerprint
+)
 
 
 class AbstractComponent(ABC):
 
     AVAILABLE_STRATEGIES = {}
+    name = None
+    config_fingerprint = None
+    # whether instances can run concurrently with other components on
+    # threads of the same process
+    thread_safe = False
 
     @abstractmethod
     def run(self, data):
         pass
 
+    def get_fingerprint(self):
+        """
+        Identify the work this component does, for checkpointing.
+
+        The default is the fingerprint of the component's config, set by
+        ProcessBuilder; components whose output also depends on something
+        outside their config, like a file, extend it. None means unknown,
+        and disables checkpointing of the component's output.
+        """
+        return self.config_fingerprint
+
+    def stream(self, data=None):
+        """
+        Process an iterable of items lazily, yielding output items.
+
+        Components that work item by item override this so that only a few
+        items are held in memory at once. The default materializes the
+        input, calls run and yields the items of its output.
+        """
+        output = self.run() if data is None else self.run(list(data))
+        if output is None:
+            return
+        if isinstance(output, (list, tuple)):
+            yield from output
+        else:
+            yield output
+
 
 class AbstractNode(AbstractComponent):
 
@@ -19,10 +69,46 @@ class AbstractNode(AbstractComponent):
     def run(self, data):
         pass
 
+    @property
+    def thread_safe(self):
+        return all(child.thread_safe for child in self.children)
+
+    def get_fingerprint(self):
+        return compute_fingerprint(
+            self.config_fingerprint,
+            *[child.get_fingerprint() for child in self.children]
+        )
+
 
 class SequenceProcess(AbstractNode):
+    """
+    Runs its children one after the other, passing each child's output to
+    the next.
+
+    With streaming=True the children are chained through their stream
+    methods instead, so items (e.g. one series each) flow through every
+    child as soon as they are produced and downstream children start before
+    upstream ones finish.
+
+    With a checkpoint_dir, the output of each child is checkpointed under a
+    fingerprint chaining the input and the configs of every child so far,
+    and a rerun resumes after the last child whose output is checkpointed.
+    Outputs that can not be pickled are not checkpointed.
+    """
+
+    def __init__(self, children, streaming=False, checkpoint_dir=None):
+        self.streaming = streaming
+        if checkpoint_dir:
+            self.checkpoint_store = CheckpointStore(checkpoint_dir)
+        else:
+            self.checkpoint_store = None
+        super().__init__(children=children)
 
     def run(self, data=None):
+        if self.streaming:
+            return list(self.stream(data))
+        if self.checkpoint_store is not None:
+            return self.run_with_checkpoints(data)
         for child in self.children:
             if data is not None:
                 data = child.run(data)
@@ -30,9 +116,404 @@ class SequenceProcess(AbstractNode):
                 data = child.run()
         return data
 
+    def run_with_checkpoints(self, data=None):
+        fingerprint = compute_data_fingerprint(data)
+        child_fingerprints = []
+        for child in self.children:
+            fingerprint = compute_fingerprint(
+                fingerprint,
+                child.get_fingerprint()
+            )
+            child_fingerprints.append(fingerprint)
+
+        start_position = 0
+        for position in reversed(range(len(self.children))):
+            fingerprint = child_fingerprints[position]
+            if fingerprint and self.checkpoint_store.contains(fingerprint):
+                data = self.checkpoint_store.get(fingerprint)
+                start_position = position + 1
+                break
+        for child, fingerprint in zip(
+                self.children[start_position:],
+                child_fingerprints[start_position:]
+        ):
+            data = _run_child(child, data)
+            if fingerprint:
+                self.put_checkpoint(fingerprint, data)
+        return data
+
+    def put_checkpoint(self, fingerprint, data):
+        try:
+            self.checkpoint_store.put(fingerprint, data)
+        except (pickle.PicklingError, TypeError, AttributeError) as error:
+            warnings.warn(f"output not checkpointed: {error}")
+
+    def stream(self, data=None):
+        for child in self.children:
+            data = child.stream(data)
+        return data if data is not None else iter(())
+
 
 class ParallelProcess(AbstractNode):
+    """
+    Runs every child on the same input and returns their outputs keyed by
+    child.
 
-    def run(self, data):
+    By default the children run one after the other in the calling thread.
+    With executor='process' they run concurrently on a process pool, for
+    CPU-heavy children, in which case children and data must be picklable.
+    executor='thread' runs them on a thread pool, which suits I/O, but only
+    for thread_safe children, like plotters writing to an output_dir, as
+    pyplot is not thread-safe. Children share the input object, so children
+    running on threads must not modify it. With max_workers=1 the children
+    run one after the other in the calling thread. If a child raises,
+    children that have not started are cancelled and the exception is
+    re-raised.
+    """
+
+    AVAILABLE_EXECUTORS = {
+        "sequential": None,
+        "thread": ThreadPoolExecutor,
+        "process": ProcessPoolExecutor
+    }
+    STREAM_BUFFER_SIZE = 2
+
+    def __init__(self, children, executor="sequential", max_workers=None):
+        if executor not in self.AVAILABLE_EXECUTORS:
+            raise ValueError(
+                f"executor must be one of "
+                f"{list(self.AVAILABLE_EXECUTORS.keys())}"
+            )
+        if executor == "thread":
+            unsafe_children = [
+                child.name or type(child).__name__
+                for child in children if not child.thread_safe
+            ]
+            if unsafe_children:
+                raise ValueError(
+                    f"executor 'thread' requires thread-safe children, "
+                    f"{unsafe_children} are not"
+                )
+        assert max_workers is None or max_workers >= 1, \
+            "max_workers must be a positive integer"
+        self.executor = executor
+        self.max_workers = max_workers
+        super().__init__(children=children)
+
+    def run(self, data=None):
+        child_keys = self.get_child_keys()
+        if self.executor == "sequential" or self.max_workers == 1 or \
+                len(self.children) <= 1:
+            return {
+                child_key: _run_child(child, data)
+                for child_key, child in zip(child_keys, self.children)
+            }
+        max_workers = self.max_workers or len(self.children)
+        executor = self.AVAILABLE_EXECUTORS[self.executor](
+            max_workers=max_workers
+        )
+        try:
+            futures = [
+                executor.submit(_run_child, child, data)
+                for child in self.children
+            ]
+            done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in futures:
+                if future in done and future.exception() is not None:
+                    raise future.exception()
+            return {
+                child_key: future.result()
+                for child_key, future in zip(child_keys, futures)
+            }
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def get_child_keys(self):
+        """
+        Get the keys of the children's outputs: their config names, with the
+        child position appended to names used more than once.
+        """
+        names = [
+            child.name or type(child).__name__ for child in self.children
+        ]
+        return [
+            name if names.count(name) == 1 else f"{name}_{position}"
+            for position, name in enumerate(names)
+        ]
+
+    def stream(self, data=None):
+        """
+        Stream every item to every child.
+
+        Each child consumes its own stream on a thread fed through a bounded
+        queue, so children that reduce over all items still see all of them
+        while at most STREAM_BUFFER_SIZE items per child are buffered, and
+        the outputs of the children are yielded, child by child, once the
+        input is exhausted. Unless executor='thread', the children and the
+        input take turns holding one lock, so they never run concurrently.
+        A single child streams the input directly.
+        """
+        if data is None:
+            data = ()
+        if len(self.children) == 1:
+            yield from self.children[0].stream(data)
+            return
+        lock = threading.Lock() if self.executor != "thread" else None
+        child_queues = [
+            queue.Queue(maxsize=self.STREAM_BUFFER_SIZE)
+            for _ in self.children
+        ]
+        child_outputs = [[] for _ in self.children]
+        errors = []
+        threads = [
+            threading.Thread(
+                target=_consume_stream,
+                args=(child, child_queue, outputs, errors, lock),
+                daemon=True
+            )
+            for child, child_queue, outputs
+            in zip(self.children, child_queues, child_outputs)
+        ]
+        for thread in threads:
+            thread.start()
+        items = iter(data)
+        try:
+            while True:
+                with lock or nullcontext():
+                    item = next(items, _END_OF_STREAM)
+                if item is _END_OF_STREAM:
+                    break
+                for child_queue in child_queues:
+                    child_queue.put(item)
+        finally:
+            for child_queue in child_queues:
+                child_queue.put(_END_OF_STREAM)
+            for thread in threads:
+                thread.join()
+        if errors:
+            raise errors[0]
+        for outputs in child_outputs:
+            yield from outputs
+
+
+class DagNode:
+    """
+    A child of a DagProcess together with the names of the intermediates it
+    consumes and produces.
+    """
+
+    def __init__(self, process, inputs=None, output=None):
+        self.process = process
+        self.inputs = list(inputs) if inputs else []
+        self.output = output if output else process.name
+
+    @property
+    def name(self):
+        return self.process.name
+
+    @property
+    def thread_safe(self):
+        return self.process.thread_safe
+
+    def get_fingerprint(self):
+        return compute_fingerprint(
+            self.process.get_fingerprint(),
+            self.inputs,
+            self.output
+        )
+
+
+class DagProcess(AbstractNode):
+    """
+    Runs its children as a directed acyclic graph of named intermediates.
+
+    Each child declares the names of its inputs and of its output in its
+    config. A child without inputs is run without data, a child with one
+    input is run on it and a child with several is run on a dict of them
+    keyed by name; the input given to the DagProcess itself is available as
+    'input'. Children are started as soon as all their inputs exist, on a
+    thread pool of max_workers threads, so independent branches overlap and
+    an intermediate can feed several consumers. Children that are not
+    thread_safe, like plotters drawing with pyplot, are instead run one at a
+    time on the calling thread, while thread-safe children keep running on
+    the pool. Consumers of a shared intermediate must not modify it. Each intermediate is released once its
+    last consumer has finished, and the outputs nobody consumes are
+    returned, keyed by name.
+    """
+
+    INPUT_NAME = "input"
+
+    def __init__(self, children, max_workers=None):
+        assert max_workers is None or max_workers >= 1, \
+            "max_workers must be a positive integer"
+        self.max_workers = max_workers
+        super().__init__(children=children)
+        self.order = self.get_topological_order()
+
+    def get_topological_order(self):
+        """
+        Validate the graph and order the children so that every child comes
+        after the children producing its inputs.
+
+        :return: The children in a topological order.
+        :raises ValueError: If outputs clash, an input is never produced or
+        the graph has a cycle.
+        """
+        producers = {}
         for child in self.children:
-            child.run(data)
+            if child.output in producers or child.output == self.INPUT_NAME:
+                raise ValueError(
+                    f"output '{child.output}' is produced more than once"
+                )
+            producers[child.output] = child
+        for child in self.children:
+            for input_name in child.inputs:
+                if input_name not in producers and \
+                        input_name != self.INPUT_NAME:
+                    raise ValueError(
+                        f"input '{input_name}' of '{child.name}' is not "
+                        f"produced by any node"
+                    )
+
+        order = []
+        n_missing_inputs = {
+            child.output: len([
+                input_name for input_name in set(child.inputs)
+                if input_name != self.INPUT_NAME
+            ])
+            for child in self.children
+        }
+        ready = [
+            child for child in self.children
+            if n_missing_inputs[child.output] == 0
+        ]
+        while ready:
+            child = ready.pop(0)
+            order.append(child)
+            for consumer in self.get_consumers(child.output):
+                n_missing_inputs[consumer.output] -= 1
+                if n_missing_inputs[consumer.output] == 0:
+                    ready.append(consumer)
+        if len(order) != len(self.children):
+            raise ValueError("process graph contains a cycle")
+        return order
+
+    def get_consumers(self, output_name):
+        return [
+            child for child in self.children if output_name in child.inputs
+        ]
+
+    def run(self, data=None):
+        intermediates = {self.INPUT_NAME: data}
+        n_remaining_consumers = {
+            output_name: len(self.get_consumers(output_name))
+            for output_name in [self.INPUT_NAME] +
+            [child.output for child in self.children]
+        }
+        outputs = {}
+        pending = list(self.order)
+        running = {}
+        max_workers = self.max_workers or len(self.children) or 1
+        def add_output(child, output):
+            if n_remaining_consumers[child.output]:
+                intermediates[child.output] = output
+            else:
+                outputs[child.output] = output
+            for input_name in set(child.inputs):
+                n_remaining_consumers[input_name] -= 1
+                if n_remaining_consumers[input_name] == 0:
+                    intermediates.pop(input_name, None)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            try:
+                while pending or running:
+                    ready = [
+                        child for child in pending
+                        if all(input_name in intermediates
+                               for input_name in child.inputs)
+                    ]
+                    for child in ready:
+                        if child.thread_safe:
+                            pending.remove(child)
+                            running[executor.submit(
+                                self.run_child,
+                                child,
+                                intermediates
+                            )] = child
+                    serial_ready = [
+                        child for child in ready
+                        if not child.thread_safe
+                    ]
+                    if serial_ready:
+                        pending.remove(serial_ready[0])
+                        add_output(
+                            serial_ready[0],
+                            self.run_child(serial_ready[0], intermediates)
+                        )
+                        done, _ = wait(running, timeout=0)
+                    else:
+                        done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        add_output(running.pop(future), future.result())
+            except BaseException:
+                for future in running:
+                    future.cancel()
+                raise
+        return outputs
+
+    def run_child(self, child, intermediates):
+        if not child.inputs:
+            return child.process.run()
+        if len(child.inputs) == 1:
+            return _run_child(child.process, intermediates[child.inputs[0]])
+        return child.process.run({
+            input_name: intermediates[input_name]
+            for input_name in child.inputs
+        })
+
+
+_END_OF_STREAM = object()
+
+
+def _run_child(child, data):
+    return child.run() if data is None else child.run(data)
+
+
+def _iter_queue(item_queue, lock=None):
+    while True:
+        # the lock is only held while the consumer runs, not while it waits
+        if lock is not None:
+            lock.release()
+        try:
+            item = item_queue.get()
+        finally:
+            if lock is not None:
+                lock.acquire()
+        if item is _END_OF_STREAM:
+            return
+        yield item
+
+
+def _consume_stream(child, child_queue, outputs, errors, lock=None):
+    with lock or nullcontext():
+        items = _iter_queue(child_queue, lock)
+        try:
+            for output in child.stream(items):
+                outputs.append(output)
+        except BaseException as error:
+            errors.append(error)
+        # keep draining so the producer never blocks on a finished child
+        for _ in items:
+            pass
+
+
+def iter_batches(items, batch_size):
+    """
+    Group an iterable into lists of at most batch_size items.
+    """
+    items = iter(items)
+    while True:
+        batch = list(islice(items, batch_size))
+        if not batch:
+            return
+        yield batch
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Optional
+import numpy as np
+
+
+class ForecastCache:
+    """
+    A size-bounded on-disk cache of window forecasts.
+
+    Entries are content addressed: the key is a hash of the model reference,
+    its hyperparameters, the training data of the window and the forecast
+    horizon, so rerunning an experiment only computes forecasts for windows,
+    data or models that changed. Each forecast is stored as a .npy file and
+    the least recently used files are deleted once the cache grows past
+    max_size_mb.
+    """
+
+    def __init__(self, path: str, max_size_mb: float = 1024):
+        """
+        Initialize the ForecastCache.
+
+        Parameters:
+            path (str): Directory to store the cache in, created if missing.
+            max_size_mb (float, optional): Size above which the least
+                recently used entries are evicted.
+        """
+        self.path = path
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._entries = None
+        os.makedirs(self.path, exist_ok=True)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_entries"] = None
+        return state
+
+    @staticmethod
+    def get_key(model, window) -> str:
+        """
+        Get the cache key of a model's forecast for a window.
+
+        Parameters:
+            model (TimeSeriesModel): The model.
+            window (BacktestWindow): The window to forecast.
+
+        Returns:
+            str: A hex digest.
+        """
+        key = hashlib.sha256()
+        key.update(model.get_reference().encode())
+        key.update(
+            json.dumps(model.get_params(), sort_keys=True, default=str).encode()
+        )
+        key.update(str(window.test_window_length).encode())
+        window_data = [
+            window.get_data("y", "train"),
+            window.get_data("regressors", "train")
+        ]
+        if getattr(model, "_accepts_regressors", False):
+            window_data.append(window.get_data("regressors", "test"))
+        for data in window_data:
+            if data is not None:
+                key.update(str(data.shape).encode())
+                key.update(np.ascontiguousarray(data).tobytes())
+        return key.hexdigest()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        Get a cached forecast, marking it as recently used.
+
+        Returns:
+            Optional[np.ndarray]: The forecast, or None on a cache miss.
+        """
+        file_path = self._get_file_path(key)
+        try:
+            prediction = np.load(file_path)
+            os.utime(file_path)
+        except (FileNotFoundError, ValueError, OSError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self._entries is not None and key in self._entries:
+            self._entries[key] = (os.path.getmtime(file_path),
+                                  self._entries[key][1])
+        return prediction
+
+    def put(self, key: str, prediction) -> None:
+        """
+        Store a forecast and evict old entries if the cache is too large.
+        """
+        file_path = self._get_file_path(key)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(
+            dir=os.path.dirname(file_path),
+            suffix=".tmp"
+        )
+        with os.fdopen(file_descriptor, "wb") as file:
+            np.save(file, np.asarray(prediction, dtype=np.float64))
+        os.replace(temporary_path, file_path)
+
+        entries = self._get_entries()
+        entries[key] = (
+            os.path.getmtime(file_path),
+            os.path.getsize(file_path)
+        )
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Delete least recently used entries until the cache fits its size.
+        """
+        entries = self._get_entries()
+        total_size = sum(size for _, size in entries.values())
+        if total_size <= self.max_size_bytes:
+            return
+        for key in sorted(entries, key=lambda entry: entries[entry][0]):
+            _, size = entries.pop(key)
+            try:
+                os.remove(self._get_file_path(key))
+            except FileNotFoundError:
+                pass
+            total_size -= size
+            if total_size <= self.max_size_bytes:
+                break
+
+    def _get_entries(self):
+        if self._entries is None:
+            self._entries = {}
+            for directory in os.scandir(self.path):
+                if not directory.is_dir():
+                    continue
+                for entry in os.scandir(directory.path):
+                    if entry.name.endswith(".npy"):
+                        stat = entry.stat()
+                        self._entries[entry.name[:-4]] = (
+                            stat.st_mtime,
+                            stat.st_size
+                        )
+        return self._entries
+
+    def _get_file_path(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], f"{key}.npy")
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import types
+from typing import Any, Optional
+import numpy as np
+import pandas as pd
+
+
+class CheckpointStore:
+    """
+    An on-disk store of pickled intermediate results, used to resume long
+    runs.
+
+    Each result is stored under a fingerprint of the work that produced it
+    (the configs of the processes that ran and the data they ran on), so a
+    rerun with the same config and data finds the results of the steps that
+    already completed and a changed config or input never picks up a stale
+    result. Entries are written atomically, so a run killed mid-write never
+    leaves a truncated checkpoint behind.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the CheckpointStore.
+
+        Parameters:
+            path (str): Directory to store checkpoints in, created if
+                missing.
+        """
+        self.path = path
+        os.makedirs(self.path, exist_ok=True)
+
+    def contains(self, key: str) -> bool:
+        return os.path.exists(self._get_file_path(key))
+
+    def get(self, key: str) -> Any:
+        """
+        Load a checkpoint.
+
+        Raises:
+            KeyError: If there is no checkpoint for the key.
+        """
+        try:
+            with open(self._get_file_path(key), "rb") as file:
+                return pickle.load(file)
+        except FileNotFoundError:
+            raise KeyError(key) from None
+
+    def put(self, key: str, value: Any) -> None:
+        file_path = self._get_file_path(key)
+        file_descriptor, temporary_path = tempfile.mkstemp(
+            dir=self.path,
+            suffix=".tmp"
+        )
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, file_path)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+
+    def _get_file_path(self, key):
+        return os.path.join(self.path, f"{key}.pkl")
+
+
+def compute_fingerprint(*parts) -> Optional[str]:
+    """
+    Hash JSON serializable parts into a fingerprint.
+
+    Returns:
+        Optional[str]: A hex digest, or None if any part is None, i.e.
+            unknown.
+    """
+    if any(part is None for part in parts):
+        return None
+    return hashlib.sha256(
+        json.dumps(parts, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+# objects pickled by reference rather than by their fields
+_REFERENCE_TYPES = (
+    type,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    types.ModuleType
+)
+
+
+def compute_data_fingerprint(data) -> Optional[str]:
+    """
+    Fingerprint data by hashing its contents field by field.
+
+    NumPy arrays are hashed straight from their buffers and DataFrames
+    column by column, so large datasets are never serialized as a whole.
+    Containers and the fields of other objects are walked recursively, and
+    values of any other type are hashed by their pickle.
+
+    Returns:
+        Optional[str]: A hex digest, 'none' for no data, or None if the data
+            can not be pickled.
+    """
+    if data is None:
+        return "none"
+    hasher = hashlib.sha256()
+    try:
+        _update_data_hash(hasher, data, {})
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+    return hasher.hexdigest()
+
+
+def _update_data_hash(hasher, data, memo):
+    """
+    Add data to the hash. memo maps the ids of the objects already hashed to
+    their position and the object, so shared and cyclic references are
+    hashed once.
+    """
+    if isinstance(data, (str, bytes, int, float, bool, complex, np.generic)) \
+            or data is None:
+        _update_tagged(hasher, type(data).__name__, repr(data).encode())
+        return
+    if id(data) in memo:
+        _update_tagged(hasher, "memo", str(memo[id(data)][0]).encode())
+        return
+    # keep the object alive so its id is not reused while hashing
+    memo[id(data)] = (len(memo), data)
+    if isinstance(data, np.ndarray) and data.dtype != object:
+        _update_tagged(
+            hasher,
+            "ndarray",
+            f"{data.dtype.str}{data.shape}".encode()
+        )
+        # a byte view, as buffers of datetime64 arrays can not be exported
+        hasher.update(np.ascontiguousarray(data).reshape(-1).view(np.uint8))
+    elif isinstance(data, (pd.DataFrame, pd.Series)):
+        _update_tagged(hasher, type(data).__name__, repr(
+            (list(data.columns), list(data.dtypes.astype(str)))
+            if isinstance(data, pd.DataFrame)
+            else (data.name, str(data.dtype))
+        ).encode())
+        try:
+            hasher.update(
+                pd.util.hash_pandas_object(data, index=True).to_numpy()
+            )
+        except TypeError:
+            # columns of unhashable objects, like lists
+            hasher.update(
+                pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+            )
+    elif isinstance(data, (list, tuple)):
+        _update_tagged(hasher, type(data).__name__, str(len(data)).encode())
+        for element in data:
+            _update_data_hash(hasher, element, memo)
+    elif isinstance(data, dict):
+        _update_tagged(hasher, type(data).__name__, str(len(data)).encode())
+        for key, value in data.items():
+            _update_data_hash(hasher, key, memo)
+            _update_data_hash(hasher, value, memo)
+    elif isinstance(data, _REFERENCE_TYPES) or not (
+            hasattr(data, "__dict__") or hasattr(type(data), "__slots__")
+    ):
+        _update_tagged(
+            hasher,
+            "pickle",
+            pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        )
+    elif getattr(type(data), "__getstate__", None) is not \
+            getattr(object, "__getstate__", None):
+        # hash what pickling would keep
+        _update_tagged(hasher, type(data).__qualname__, b"state")
+        _update_data_hash(hasher, data.__getstate__(), memo)
+    else:
+        fields = _get_fields(data)
+        _update_tagged(hasher, type(data).__qualname__, repr(
+            sorted(fields)
+        ).encode())
+        for name in sorted(fields):
+            _update_data_hash(hasher, fields[name], memo)
+
+
+def _get_fields(data):
+    fields = dict(getattr(data, "__dict__", {}))
+    for cls in type(data).__mro__:
+        slots = cls.__dict__.get("__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name not in ("__dict__", "__weakref__") and \
+                    hasattr(data, name):
+                fields[name] = getattr(data, name)
+    return fields
+
+
+def _update_tagged(hasher, tag, value):
+    # length prefixes keep the boundaries between values unambiguous
+    hasher.update(f"{tag}:{len(value)}:".encode())
+    hasher.update(value)
+
+
+def compute_path_fingerprint(path: str) -> str:
+    """
+    Fingerprint a file, or every file under a directory, by path, size and
+    modification time, so a checkpoint of loaded data goes stale when its
+    source files change.
+    """
+    if os.path.isdir(path):
+        file_paths = sorted(
+            os.path.join(directory, filename)
+            for directory, _, filenames in os.walk(path)
+            for filename in filenames
+        )
+    else:
+        file_paths = [path]
+    file_stats = []
+    for file_path in file_paths:
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            continue
+        file_stats.append((file_path, stat.st_size, stat.st_mtime_ns))
+    return compute_fingerprint(file_stats)
@@ -0,0 +1,432 @@
+import copy
+import inspect
+import json
+import os
+import tempfile
+from types import SimpleNamespace
+from typing import List, NamedTuple, Optional
+from general_analytics_framwork.base_processes import (
+    AbstractNode,
+    DagNode,
+    DagProcess
+)
+from general_analytics_framwork.checkpointing import compute_fingerprint
+from general_analytics_framwork.config import (
+    ConfigParser,
+    LeafConfig,
+    NodeConfig
+)
+from general_analytics_framwork.instrumentation import Profiler
+from general_analytics_framwork.process_builder import ProcessBuilder
+from general_analytics_framwork.registry import resolve_path
+
+PLAN_VERSION = 1
+
+
+class ConfigError(ValueError):
+    """
+    Raised when a config fails validation, listing every problem found.
+    """
+
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        super().__init__(
+            f"{len(errors)} config error(s):\n" + "\n".join(errors)
+        )
+
+
+class WorkEstimate(NamedTuple):
+    """
+    The amount of backtesting work a plan does. Counts that can not be
+    estimated from the plan are None.
+    """
+
+    n_series: Optional[int]
+    n_windows: Optional[int]
+    n_models: int
+
+    @property
+    def n_forecasts(self) -> Optional[int]:
+        """
+        The number of (window, model) forecasts made.
+        """
+        if self.n_windows is None:
+            return None
+        return self.n_windows * self.n_models
+
+
+class ExecutionPlan:
+    """
+    A validated config, with the component every entry resolved to, that
+    builds process trees without consulting the registries again.
+
+    Plans are JSON serializable, so a plan compiled once can be saved and
+    built any number of times, e.g. once per scheduled run of the same
+    config.
+    """
+
+    def __init__(self, config, fingerprint: str):
+        """
+        Initialize the ExecutionPlan.
+
+        Parameters:
+            config (Union[NodeConfig, LeafConfig]): The root config, with
+                the component path of every entry set.
+            fingerprint (str): Fingerprint of the config compiled.
+        """
+        self.config = config
+        self.fingerprint = fingerprint
+
+    def build(self):
+        """
+        Build a fresh process tree from the plan.
+        """
+        return ProcessBuilder().build(self.config, available_processes={})
+
+    def iter_steps(self, config=None):
+        """
+        Iterate over the configs of the plan in depth first order.
+
+        Yields:
+            tuple: (config, process_class) of each entry.
+        """
+        config = config or self.config
+        yield config, resolve_path(config.component)
+        for child in getattr(config, "children", []):
+            yield from self.iter_steps(child)
+
+    def estimate_work(self, data=None) -> WorkEstimate:
+        """
+        Estimate the series, backtest windows and models the plan runs.
+
+        The number of series and windows depends on the data, so only the
+        series id and date columns are read with the plan's first data
+        loader, or taken from data, and every series' window table is
+        computed as the backtest converter would.
+
+        Parameters:
+            data (pd.DataFrame, optional): The data the plan runs on, in the
+                format of its data loader output.
+
+        Returns:
+            WorkEstimate: The estimated work.
+        """
+        # imported here as only estimating work needs the data modules
+        from general_analytics_framwork.data_preparation.data_converters \
+            import TimeseriesBacktestConverter, TimeseriesConverter
+        from general_analytics_framwork.data_preparation.data_loaders import (
+            ColumnarDataLoader,
+            LocalDataLoader
+        )
+        from general_analytics_framwork.datasets import BacktestWindowTable
+        from general_analytics_framwork.model_search import ModelSearch
+        from general_analytics_framwork.modelling import TimeSeriesModel
+
+        loader = converter = backtest_converter = None
+        n_models = 0
+        for config, process_class in self.iter_steps():
+            if isinstance(config, NodeConfig):
+                continue
+            if issubclass(process_class, TimeSeriesModel):
+                n_models += 1
+            elif issubclass(process_class, ModelSearch):
+                # an upper bound, as successive halving prunes candidates
+                n_models += len(
+                    process_class(**config.other_args).candidate_params
+                )
+            elif issubclass(process_class, TimeseriesBacktestConverter):
+                backtest_converter = backtest_converter or \
+                    process_class(**config.other_args)
+            elif issubclass(process_class, TimeseriesConverter):
+                converter = converter or process_class(**config.other_args)
+            elif issubclass(process_class,
+                            (LocalDataLoader, ColumnarDataLoader)):
+                loader = loader or (process_class, config.other_args)
+        if converter is None or (data is None and loader is None):
+            return WorkEstimate(None, None, n_models)
+
+        columns = [converter.series_id_col, converter.date_col]
+        if data is None:
+            loader_class, loader_args = loader
+            loader_args = dict(loader_args)
+            if issubclass(loader_class, ColumnarDataLoader):
+                loader_args["columns"] = columns
+            else:
+                loader_args["usecols"] = columns
+                if isinstance(loader_args.get("parse_dates"), list):
+                    loader_args["parse_dates"] = [
+                        column for column in loader_args["parse_dates"]
+                        if column in columns
+                    ]
+            data = loader_class(**loader_args).run()
+        converter = copy.copy(converter)
+        converter.regressor_cols = []
+        data = data[columns].assign(**{converter.y_col: 0.0})
+
+        n_series = 0
+        n_windows = 0 if backtest_converter is not None else None
+        for _, dates, _, _ in converter.split(data):
+            n_series += 1
+            if backtest_converter is not None:
+                n_windows += len(BacktestWindowTable(
+                    n_obs=len(dates),
+                    train_window_length=backtest_converter.train_window_length,
+                    max_test_window_length=
+                    backtest_converter.max_test_window_length,
+                    stride=backtest_converter.stride,
+                    max_windows=backtest_converter.max_windows,
+                    window_type=backtest_converter.window_type,
+                    dates=dates,
+                    start_date=backtest_converter.start_date,
+                    end_date=backtest_converter.end_date
+                ))
+        return WorkEstimate(n_series, n_windows, n_models)
+
+    def to_dict(self) -> dict:
+        return {
+            "version": PLAN_VERSION,
+            "fingerprint": self.fingerprint,
+            "config": self.config.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, plan_dict: dict) -> "ExecutionPlan":
+        if plan_dict.get("version") != PLAN_VERSION:
+            raise ValueError(
+                f"plan version {plan_dict.get('version')} is not supported, "
+                f"recompile the config"
+            )
+        return cls(make_config(plan_dict["config"]), plan_dict["fingerprint"])
+
+    def save(self, path: str):
+        """
+        Write the plan to a JSON file, atomically.
+        """
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(
+            dir=directory,
+            suffix=".tmp"
+        )
+        try:
+            with os.fdopen(file_descriptor, "w") as file:
+                json.dump(self.to_dict(), file, indent=2)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "ExecutionPlan":
+        with open(path, "r") as file:
+            return cls.from_dict(json.load(file))
+
+
+class ConfigCompiler:
+    """
+    Compiles configs into ExecutionPlans, validating the whole config before
+    anything runs.
+
+    Every entry's name is looked up in the registry of its parent, its
+    type is checked against the component it resolves to, its other_args
+    are bound to the component's constructor signature, instrumentation
+    options to the Profiler's and the inputs and outputs of DAG children
+    are checked to form an acyclic graph. All problems found are raised
+    together as a ConfigError.
+
+    Plans are cached by the fingerprint of their whole config, in memory
+    and, if cache_dir is set, as JSON files, so only compiling a config
+    identical to one compiled before skips validation. A config that
+    differs in any value, like the next point of a parameter sweep, is
+    validated again in full, which is cheap as the registries keep the
+    components they have imported. A cached plan refers to components by
+    path, so it has to be recompiled if a component it uses moves.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        Initialize the ConfigCompiler.
+
+        Parameters:
+            cache_dir (str, optional): Directory to cache compiled plans in.
+        """
+        self.cache_dir = cache_dir
+        self._plans = {}
+
+    def compile_file(self, path: str, available_processes) -> ExecutionPlan:
+        config_dict = ConfigParser().read_config_file(path)
+        return self.compile(config_dict, available_processes)
+
+    def compile(self, config, available_processes) -> ExecutionPlan:
+        """
+        Validate a config and compile it into a plan, or get the cached plan
+        of an identical config.
+
+        Parameters:
+            config (Union[dict, NodeConfig, LeafConfig]): The root config.
+            available_processes (Mapping): The registry the root's name is
+                looked up in.
+
+        Returns:
+            ExecutionPlan: The compiled plan.
+
+        Raises:
+            ConfigError: If the config is invalid.
+        """
+        if isinstance(config, (NodeConfig, LeafConfig)):
+            config = config.to_dict()
+        fingerprint = compute_fingerprint(config)
+        plan = self._plans.get(fingerprint) or self._load_cached(fingerprint)
+        if plan is None:
+            errors = []
+            compiled_config = self.compile_config(
+                config,
+                available_processes,
+                location="",
+                errors=errors
+            )
+            if errors:
+                raise ConfigError(errors)
+            plan = ExecutionPlan(make_config(compiled_config), fingerprint)
+            if self.cache_dir:
+                plan.save(self._get_cache_path(fingerprint))
+        self._plans[fingerprint] = plan
+        return plan
+
+    def compile_config(self, config, available_processes, location, errors):
+        """
+        Validate one config and its children, recording problems in errors.
+
+        Returns:
+            Optional[dict]: A copy of the config with the component path of
+                every entry set, or None if it could not be resolved.
+        """
+        location = f"{location}/{config.get('name')}"
+        config_type = config.get("type")
+        config_class = {"node": NodeConfig, "leaf": LeafConfig}.get(
+            config_type
+        )
+        if config_class is None:
+            errors.append(f"{location}: type must be 'node' or 'leaf'")
+            return None
+
+        name = config.get("name")
+        if name not in available_processes:
+            errors.append(
+                f"{location}: '{name}' is not registered, available names "
+                f"are {list(available_processes)}"
+            )
+            return None
+        try:
+            process_class = available_processes[name]
+        except (ImportError, AttributeError) as error:
+            errors.append(f"{location}: '{name}' could not be imported: "
+                          f"{error}")
+            return None
+        is_node = inspect.isclass(process_class) and \
+            issubclass(process_class, AbstractNode)
+        if is_node != (config_type == "node"):
+            errors.append(
+                f"{location}: '{name}' must be configured as a "
+                f"'{'node' if is_node else 'leaf'}'"
+            )
+            return None
+        if not self.check_binding(config_class, config, location, errors):
+            return None
+
+        compiled_config = dict(config)
+        compiled_config["component"] = get_path(process_class)
+        other_args = config.get("other_args") or {}
+        if config_type == "leaf":
+            self.check_binding(process_class, other_args, location, errors)
+            return compiled_config
+
+        child_configs = [
+            self.compile_config(
+                child_config,
+                process_class.AVAILABLE_STRATEGIES,
+                location,
+                errors
+            )
+            for child_config in config["child_configs"]
+        ]
+        self.check_binding(
+            process_class,
+            dict(other_args, children=[]),
+            location,
+            errors
+        )
+        instrumentation = config.get("instrumentation")
+        if instrumentation:
+            self.check_binding(
+                Profiler,
+                {
+                    key: value for key, value in instrumentation.items()
+                    if key != "enabled"
+                },
+                f"{location} instrumentation",
+                errors
+            )
+        if issubclass(process_class, DagProcess) and \
+                None not in child_configs:
+            self.check_graph(process_class, child_configs, location, errors)
+        compiled_config["child_configs"] = child_configs
+        return compiled_config
+
+    @staticmethod
+    def check_binding(function, kwargs, location, errors):
+        """
+        Check that kwargs can be passed to a function or class.
+        """
+        try:
+            inspect.signature(function).bind(**kwargs)
+        except TypeError as error:
+            errors.append(f"{location}: {error}")
+            return False
+        return True
+
+    @staticmethod
+    def check_graph(process_class, child_configs, location, errors):
+        """
+        Check the inputs and outputs of the children of a DagProcess.
+        """
+        graph = process_class.__new__(process_class)
+        graph.children = [
+            DagNode(
+                SimpleNamespace(name=child_config["name"]),
+                inputs=child_config.get("inputs"),
+                output=child_config.get("output")
+            )
+            for child_config in child_configs
+        ]
+        try:
+            graph.get_topological_order()
+        except ValueError as error:
+            errors.append(f"{location}: {error}")
+
+    def _get_cache_path(self, fingerprint):
+        return os.path.join(self.cache_dir, f"plan_{fingerprint}.json")
+
+    def _load_cached(self, fingerprint):
+        if not self.cache_dir:
+            return None
+        try:
+            return ExecutionPlan.load(self._get_cache_path(fingerprint))
+        except (FileNotFoundError, ValueError):
+            return None
+
+
+def make_config(config_dict):
+    """
+    Create a NodeConfig or LeafConfig from its dict.
+    """
+    if config_dict["type"] == "node":
+        return NodeConfig(**config_dict)
+    return LeafConfig(**config_dict)
+
+
+def get_path(component):
+    """
+    Get the 'module:attribute' path a component can be imported from.
+    """
+    return f"{component.__module__}:{component.__qualname__}"
@@ -3,9 +3,15 @@ import json
 
 class NodeConfig:
 
-    def __init__(self, type, name, child_configs, other_args=None):
+    def __init__(self, type, name, child_configs, other_args=None,
+                 inputs=None, output=None, instrumentation=None,
+                 component=None):
         self.type = type
         self.name = name
+        self.component = component
+        self.inputs = inputs if inputs else []
+        self.output = output
+        self.instrumentation = instrumentation
         self.children = []
         for child_config in child_configs:
             if child_config["type"] == "node":
@@ -20,12 +26,57 @@ class NodeConfig:
         else:
             self.other_args = {}
 
+    def to_dict(self):
+        """
+        Convert the config back to the dict it can be created from.
+        """
+        config_dict = {
+            "type": self.type,
+            "name": self.name,
+            "child_configs": [child.to_dict() for child in self.children],
+            "other_args": self.other_args
+        }
+        return _add_optional_keys(
+            config_dict,
+            inputs=self.inputs,
+            output=self.output,
+            instrumentation=self.instrumentation,
+            component=self.component
+        )
+
 
 class LeafConfig:
-    def __init__(self, type, name, other_args):
+    def __init__(self, type, name, other_args, inputs=None, output=None,
+                 component=None):
         self.type = type
         self.name = name
         self.other_args = other_args
+        self.inputs = inputs if inputs else []
+        self.output = output
+        self.component = component
+
+    def to_dict(self):
+        """
+        Convert the config back to the dict it can be created from.
+        """
+        config_dict = {
+            "type": self.type,
+            "name": self.name,
+            "other_args": self.other_args
+        }
+        return _add_optional_keys(
+            config_dict,
+            inputs=self.inputs,
+            output=self.output,
+            component=self.component
+        )
+
+
+def _add_optional_keys(config_dict, **optional_values):
+    config_dict.update({
+        key: value for key, value in optional_values.items() if value
+    })
+    return config_dict
 
 
 class ConfigParser:
@@ -3,10 +3,14 @@ from general_analytics_framwork.datasets import (
     TimeseriesDataset, TimeseriesBacktestDataset, TimeSeriesBacktestResultsDataset
 )
 from abc import abstractmethod
+import numpy as np
+import pandas as pd
 
 
 class AbstractDataConverter(AbstractComponent):
 
+    thread_safe = True
+
     def run(self, data):
         output = []
         for element in data:
@@ -14,6 +18,10 @@ class AbstractDataConverter(AbstractComponent):
             output.append(element_output)
         return output
 
+    def stream(self, data=None):
+        for element in data:
+            yield self.convert(element)
+
     @abstractmethod
     def convert(self, element):
         raise NotImplementedError
@@ -30,36 +38,137 @@ class TimeseriesConverter(AbstractDataConverter):
 
     def run(self, data):
         output = []
-        for series_id in data[self.series_id_col].unique():
-            element = data[data[self.series_id_col] == series_id]
-            output_element = self.convert(series_id, element)
+        for series_id, dates, y_data, regressor_data in self.split(data):
+            output_element = self.convert(
+                series_id,
+                dates,
+                y_data,
+                regressor_data
+            )
             output.append(output_element)
         return output
 
-    def convert(self, series_id, element):
+    def stream(self, data=None):
+        """
+        Convert a stream of DataFrame chunks into a stream of series.
+
+        The rows of a series may span consecutive chunks, so the last series
+        of each chunk is held back and completed with the next chunk. Rows
+        of one series must therefore be contiguous in the stream.
+        """
+        carry = None
+        for chunk in data:
+            if carry is not None:
+                chunk = pd.concat([carry, chunk], axis=0)
+            if len(chunk) == 0:
+                continue
+            series_ids = chunk[self.series_id_col]
+            is_last_series = (series_ids == series_ids.iloc[-1]).to_numpy()
+            carry = chunk[is_last_series]
+            yield from self.run(chunk[~is_last_series])
+        if carry is not None and len(carry):
+            yield from self.run(carry)
+
+    def split(self, data):
+        """
+        Split a long format DataFrame into per-series arrays in one pass.
+
+        The series ids are factorized and the rows stably sorted by series,
+        so every series becomes a contiguous slice of the sorted columns and
+        keeps its original row order. Series are yielded in order of first
+        appearance and dates are parsed once for the whole frame.
+
+        Parameters:
+            data (pd.DataFrame): Data with one row per series and date.
+
+        Yields:
+            tuple: (series_id, dates, y_data, regressor_data) where the last
+            three are array views and regressor_data has one column per
+            regressor_cols entry, or is None.
+        """
+        codes, series_ids = pd.factorize(data[self.series_id_col], sort=False)
+        order = np.argsort(codes, kind="stable")
+        sorted_codes = codes[order]
+        order = order[sorted_codes >= 0]
+        sorted_codes = sorted_codes[sorted_codes >= 0]
+        if len(order) == 0:
+            return
+        boundaries = np.flatnonzero(np.diff(sorted_codes)) + 1
+        starts = np.concatenate([[0], boundaries])
+        ends = np.concatenate([boundaries, [len(order)]])
+
+        dates = self.parse_dates(data[self.date_col])[order]
+        y_data = data[self.y_col].to_numpy(dtype="float64")[order]
+        if self.regressor_cols:
+            regressor_data = data[self.regressor_cols].to_numpy(
+                dtype="float64"
+            )[order]
+        else:
+            regressor_data = None
+
+        for start, end in zip(starts, ends):
+            yield (
+                series_ids[sorted_codes[start]],
+                dates[start:end],
+                y_data[start:end],
+                regressor_data[start:end]
+                if regressor_data is not None else None
+            )
+
+    def parse_dates(self, dates):
+        if self.date_parser:
+            dates = pd.to_datetime(dates, format=self.date_parser)
+        else:
+            dates = pd.to_datetime(dates)
+        return dates.to_numpy(dtype="datetime64[ns]")
+
+    def convert(self, series_id, dates, y_data, regressor_data=None):
         time_series_dataset = TimeseriesDataset(
             series_id=series_id,
-            dates=element[self.date_col].to_list(),
-            y_data=element[self.y_col].to_list(),
-            regressor_data={
-                col: element[col] for col in self.regressor_cols
-            },
-            date_parser=self.date_parser
+            dates=dates,
+            y_data=y_data,
+            regressor_data=regressor_data,
+            regressor_names=self.regressor_cols
+            if regressor_data is not None else None
         )
         return time_series_dataset
 
 
 class TimeseriesBacktestConverter(AbstractDataConverter):
-
-    def __init__(self, train_window_length, max_test_window_length):
+    """
+    Wraps each time series in a TimeseriesBacktestDataset. stride,
+    max_windows, window_type, start_date and end_date select the windows
+    backtested, see BacktestWindowTable.
+    """
+
+    def __init__(
+            self,
+            train_window_length,
+            max_test_window_length,
+            stride=1,
+            max_windows=None,
+            window_type="rolling",
+            start_date=None,
+            end_date=None
+    ):
         self.train_window_length = train_window_length
         self.max_test_window_length = max_test_window_length
+        self.stride = stride
+        self.max_windows = max_windows
+        self.window_type = window_type
+        self.start_date = start_date
+        self.end_date = end_date
 
     def convert(self, data):
         data = TimeseriesBacktestDataset(
             time_series_dataset=data,
             train_window_length=self.train_window_length,
-            max_test_window_length=self.max_test_window_length
+            max_test_window_length=self.max_test_window_length,
+            stride=self.stride,
+            max_windows=self.max_windows,
+            window_type=self.window_type,
+            start_date=self.start_date,
+            end_date=self.end_date
         )
         return data
 
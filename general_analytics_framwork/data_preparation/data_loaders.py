@@ -1,22 +1,59 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List
+import importlib
 import pandas as pd
 import os
 from general_analytics_framwork.base_processes import AbstractComponent
+from general_analytics_framwork.checkpointing import (
+    compute_fingerprint,
+    compute_path_fingerprint
+)
 
 
 class LocalDataLoader(AbstractComponent):
     """
     DataLoader class to load data from different sources.
 
+    Files in a 'dir' source are read concurrently on a thread pool of
+    n_workers threads. The dtype, usecols, parse_dates, date_format and
+    engine options are passed to pd.read_csv. Setting chunksize makes stream
+    read each CSV in chunks of that many rows, so only one chunk of a large
+    file is in memory at a time; run still concatenates the chunks into one
+    DataFrame.
+
     Methods:
         load(source_type: str, path: str) -> pd.DataFrame:
             Load data from a source based on source type.
 
     """
 
-    def __init__(self, source_type, path):
+    thread_safe = True
+
+    def __init__(
+            self,
+            source_type,
+            path,
+            n_workers=1,
+            dtype=None,
+            usecols=None,
+            parse_dates=None,
+            date_format=None,
+            engine=None,
+            chunksize=None
+    ):
+        if engine == "pyarrow" and chunksize:
+            raise ValueError("the pyarrow engine does not support chunksize")
+        assert n_workers >= 1, "n_workers must be a positive integer"
         self.source_type = source_type
         self.path = path
+        self.n_workers = n_workers
+        self.dtype = dtype
+        self.usecols = usecols
+        self.parse_dates = parse_dates
+        self.date_format = date_format
+        self.engine = engine
+        self.chunksize = chunksize
 
     def run(self, data=None) -> pd.DataFrame:
         """
@@ -38,6 +75,45 @@ class LocalDataLoader(AbstractComponent):
                              "must be either 'dir' or 'csv'")
         return data
 
+    def get_fingerprint(self):
+        return compute_fingerprint(
+            self.config_fingerprint,
+            compute_path_fingerprint(self.path)
+        )
+
+    def stream(self, data=None) -> Iterator[pd.DataFrame]:
+        """
+        Stream the source as DataFrames: one per file of a 'dir' source, or
+        one per chunk when chunksize is set.
+        """
+        if self.source_type == 'dir':
+            filenames = self.get_filenames(self.path)
+        elif self.source_type == 'csv':
+            filenames = [self.path]
+        else:
+            raise ValueError("DataLoader load method's source_type argument "
+                             "must be either 'dir' or 'csv'")
+        for file in filenames:
+            if self.chunksize:
+                yield from self.iter_csv_chunks(file)
+            else:
+                yield self.load_from_csv(file)
+
+    def get_filenames(self, path: str) -> List[str]:
+        """
+        List the files in a directory, in name order.
+
+        Parameters:
+            path (str): Path to the directory.
+
+        Returns:
+            List[str]: Paths of the files.
+        """
+        return sorted(
+            os.path.join(path, f) for f in os.listdir(path)
+            if os.path.isfile(os.path.join(path, f))
+        )
+
     def load_from_dir(self, path: str) -> pd.DataFrame:
         """
         Load data from multiple CSV files in a directory.
@@ -48,31 +124,210 @@ class LocalDataLoader(AbstractComponent):
         Returns:
             pd.DataFrame: Concatenated dataset from CSV files.
         """
-        filenames = [
-            os.path.join(path, f) for f in os.listdir(path)
-            if os.path.isfile(os.path.join(path, f))
-        ]
-        datasets = []
-        for file in filenames:
-            data = self.load_from_csv(file)
-            datasets.append(data)
+        filenames = self.get_filenames(path)
+        if self.n_workers == 1:
+            datasets = [self.load_from_csv(file) for file in filenames]
+        else:
+            with ThreadPoolExecutor(max_workers=self.n_workers) as executor:
+                datasets = list(executor.map(self.load_from_csv, filenames))
         return pd.concat(datasets, axis=0)
 
     def load_from_csv(self, path: str) -> pd.DataFrame:
         """
-        Load forex data from a CSV file.
+        Load data from a CSV file.
 
         Parameters:
             path (str): Path to the CSV file.
 
         Returns:
-            pd.DataFrame: Loaded forex data.
+            pd.DataFrame: Loaded data.
         """
+        if self.chunksize:
+            return pd.concat(self.iter_csv_chunks(path), axis=0)
         data = pd.read_csv(
-            path
+            path,
+            **self.get_read_csv_kwargs()
         )
         return data
 
+    def iter_csv_chunks(self, path: str) -> Iterator[pd.DataFrame]:
+        """
+        Stream a CSV file in chunks of chunksize rows.
+
+        Parameters:
+            path (str): Path to the CSV file.
+
+        Yields:
+            pd.DataFrame: The next chunk of the file.
+        """
+        with pd.read_csv(
+            path,
+            chunksize=self.chunksize,
+            **self.get_read_csv_kwargs()
+        ) as reader:
+            for chunk in reader:
+                yield chunk
+
+    def get_read_csv_kwargs(self) -> dict:
+        """
+        Get the keyword arguments passed to pd.read_csv.
+
+        Returns:
+            dict: The configured read options, omitting unset ones.
+        """
+        read_csv_kwargs = {
+            "dtype": self.dtype,
+            "usecols": self.usecols,
+            "parse_dates": self.parse_dates,
+            "date_format": self.date_format,
+            "engine": self.engine
+        }
+        return {
+            name: value for name, value in read_csv_kwargs.items()
+            if value is not None
+        }
+
+
+class ColumnarDataLoader(AbstractComponent):
+    """
+    DataLoader class to load Parquet or Feather (Arrow IPC) data.
+
+    The path may be a single file or a directory of files forming one
+    dataset. Only the requested columns are read, and filters on the series
+    id and date columns are pushed down to the reader, so row groups that
+    cannot match are skipped. Feather files are memory-mapped by default.
+    """
+
+    AVAILABLE_SOURCE_TYPES = {
+        "parquet": "parquet",
+        "feather": "ipc"
+    }
+    thread_safe = True
+
+    def __init__(
+            self,
+            source_type,
+            path,
+            columns=None,
+            series_id_col=None,
+            series_ids=None,
+            date_col=None,
+            start_date=None,
+            end_date=None,
+            memory_map=True
+    ):
+        if source_type not in self.AVAILABLE_SOURCE_TYPES:
+            raise ValueError(
+                f"ColumnarDataLoader source_type must be one of "
+                f"{list(self.AVAILABLE_SOURCE_TYPES.keys())}"
+            )
+        assert series_ids is None or series_id_col, \
+            "series_id_col is required to filter on series_ids"
+        assert (start_date is None and end_date is None) or date_col, \
+            "date_col is required to filter on start_date or end_date"
+        self.source_type = source_type
+        self.path = path
+        self.columns = columns
+        self.series_id_col = series_id_col
+        self.series_ids = series_ids
+        self.date_col = date_col
+        self.start_date = start_date
+        self.end_date = end_date
+        self.memory_map = memory_map
+
+    def run(self, data=None) -> pd.DataFrame:
+        """
+        Load the requested columns and rows of the dataset.
+
+        Returns:
+            pd.DataFrame: Loaded data.
+        """
+        dataset = self.get_dataset()
+        table = dataset.to_table(
+            columns=self.columns,
+            filter=self.get_filter(dataset.schema)
+        )
+        return table.to_pandas()
+
+    def get_fingerprint(self):
+        return compute_fingerprint(
+            self.config_fingerprint,
+            compute_path_fingerprint(self.path)
+        )
+
+    def stream(self, data=None) -> Iterator[pd.DataFrame]:
+        """
+        Stream the dataset as one DataFrame per record batch.
+        """
+        dataset = self.get_dataset()
+        for batch in dataset.to_batches(
+                columns=self.columns,
+                filter=self.get_filter(dataset.schema)
+        ):
+            if batch.num_rows:
+                yield batch.to_pandas()
+
+    def get_dataset(self):
+        pyarrow_dataset = import_pyarrow_module("pyarrow.dataset")
+        pyarrow_fs = import_pyarrow_module("pyarrow.fs")
+        return pyarrow_dataset.dataset(
+            self.path,
+            format=self.AVAILABLE_SOURCE_TYPES[self.source_type],
+            filesystem=pyarrow_fs.LocalFileSystem(use_mmap=self.memory_map)
+        )
+
+    def get_filter(self, schema):
+        """
+        Build the predicate pushed down to the reader.
+
+        Parameters:
+            schema (pyarrow.Schema): Schema of the dataset.
+
+        Returns:
+            pyarrow.dataset.Expression: The filter, or None.
+        """
+        pyarrow = import_pyarrow_module("pyarrow")
+        pyarrow_dataset = import_pyarrow_module("pyarrow.dataset")
+        expressions = []
+        if self.series_ids is not None:
+            expressions.append(
+                pyarrow_dataset.field(self.series_id_col).isin(
+                    self.series_ids
+                )
+            )
+        if self.start_date is not None or self.end_date is not None:
+            date_type = schema.field(self.date_col).type
+            date_field = pyarrow_dataset.field(self.date_col)
+            for date, is_start in ((self.start_date, True),
+                                   (self.end_date, False)):
+                if date is None:
+                    continue
+                if pyarrow.types.is_timestamp(date_type) or \
+                        pyarrow.types.is_date(date_type):
+                    date = pyarrow.scalar(pd.Timestamp(date)).cast(date_type)
+                expressions.append(
+                    date_field >= date if is_start else date_field <= date
+                )
+        if not expressions:
+            return None
+        expression = expressions[0]
+        for other_expression in expressions[1:]:
+            expression = expression & other_expression
+        return expression
+
+
+def import_pyarrow_module(name):
+    """
+    Import a pyarrow module, which is only needed for columnar formats.
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError as error:
+        raise ImportError(
+            "Parquet and Feather support requires pyarrow. Install it with "
+            "'pip install pyarrow' or the package's 'columnar' extra."
+        ) from error
+
 
 class ForexLoader(LocalDataLoader):
     """
@@ -81,9 +336,18 @@ class ForexLoader(LocalDataLoader):
     Methods:
         load_from_csv(path: str) -> pd.DataFrame:
             Load forex data from a CSV file.
+        iter_csv_chunks(path: str) -> Iterator[pd.DataFrame]:
+            Stream a CSV file as a single chunk.
 
     """
 
+    def iter_csv_chunks(self, path: str) -> Iterator[pd.DataFrame]:
+        """
+        Stream a CSV file as a single chunk, as the weekly resampling needs
+        the whole file.
+        """
+        yield self.load_from_csv(path)
+
     def load_from_csv(self, path: str) -> pd.DataFrame:
         """
         Load forex data from a CSV file.
@@ -94,10 +358,11 @@ class ForexLoader(LocalDataLoader):
         Returns:
             pd.DataFrame: Loaded forex data.
         """
+        read_csv_kwargs = self.get_read_csv_kwargs()
+        read_csv_kwargs.update(parse_dates=['Date'], date_format="%Y-%m-%d")
         data = pd.read_csv(
             path,
-            parse_dates=['Date'],
-            date_format="%Y-%m-%d"
+            **read_csv_kwargs
         )
         data = data.rename(columns={"Date": "date"})
         data = data.set_index("date").resample('W').mean().reset_index()
@@ -0,0 +1,128 @@
+import os
+import pandas as pd
+from general_analytics_framwork.base_processes import AbstractComponent
+from general_analytics_framwork.data_preparation.data_loaders import (
+    import_pyarrow_module
+)
+from general_analytics_framwork.datasets import (
+    TimeseriesDataset,
+    TimeseriesBacktestDataset,
+    TimeSeriesBacktestResultsDataset
+)
+
+
+class ColumnarDataWriter(AbstractComponent):
+    """
+    DataWriter class to persist intermediate outputs as Parquet or Feather.
+
+    The writer passes its input through unchanged, so it can be placed
+    between any two steps of a process. DataFrames are written as they are,
+    converted time series in long format (series_id, date, y and regressor
+    columns) and backtest datasets or backtest results as their predictions
+    (series_id, model, window, horizon, date, prediction). When streaming,
+    each item is appended to the file as it passes. Files written by the
+    writer can be read back with ColumnarDataLoader.
+    """
+
+    AVAILABLE_FILE_FORMATS = ("parquet", "feather")
+    thread_safe = True
+
+    def __init__(self, path, file_format="parquet", compression=None):
+        if file_format not in self.AVAILABLE_FILE_FORMATS:
+            raise ValueError(
+                f"ColumnarDataWriter file_format must be one of "
+                f"{self.AVAILABLE_FILE_FORMATS}"
+            )
+        self.path = path
+        self.file_format = file_format
+        self.compression = compression
+
+    def run(self, data):
+        data = data if isinstance(data, pd.DataFrame) else list(data)
+        self.write(self.to_frame(data))
+        return data
+
+    def stream(self, data=None):
+        """
+        Write items as they pass, appending each one to the output file.
+        """
+        pyarrow = import_pyarrow_module("pyarrow")
+        writer = None
+        schema = None
+        try:
+            for element in data:
+                table = pyarrow.Table.from_pandas(
+                    self.to_frame([element]),
+                    preserve_index=False
+                )
+                if table.num_rows:
+                    if writer is None:
+                        schema = table.schema
+                        writer = self.open_writer(schema)
+                    writer.write_table(table.cast(schema))
+                yield element
+        finally:
+            if writer is not None:
+                writer.close()
+
+    def to_frame(self, data) -> pd.DataFrame:
+        """
+        Convert process data to a single DataFrame.
+
+        Parameters:
+            data: A DataFrame or a list of TimeseriesDataset,
+                TimeseriesBacktestDataset or TimeSeriesBacktestResultsDataset.
+
+        Returns:
+            pd.DataFrame: The data in long format.
+        """
+        if isinstance(data, pd.DataFrame):
+            return data
+        frames = []
+        for element in data:
+            if isinstance(element, pd.DataFrame):
+                frames.append(element)
+                continue
+            if isinstance(element, TimeSeriesBacktestResultsDataset):
+                element = element.backtest_dataset
+            if isinstance(element, TimeseriesBacktestDataset):
+                frames.append(element.get_predictions_frame())
+            elif isinstance(element, TimeseriesDataset):
+                frames.append(element.to_frame())
+            else:
+                raise TypeError(
+                    f"ColumnarDataWriter cannot write {type(element).__name__}"
+                )
+        return pd.concat(frames, ignore_index=True)
+
+    def write(self, frame: pd.DataFrame) -> None:
+        pyarrow = import_pyarrow_module("pyarrow")
+        table = pyarrow.Table.from_pandas(frame, preserve_index=False)
+        writer = self.open_writer(table.schema)
+        try:
+            writer.write_table(table)
+        finally:
+            writer.close()
+
+    def open_writer(self, schema):
+        """
+        Open an incremental writer for the output file.
+
+        Parameters:
+            schema (pyarrow.Schema): Schema of the tables to be written.
+
+        Returns:
+            A pyarrow ParquetWriter or RecordBatchFileWriter.
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self.file_format == "parquet":
+            return import_pyarrow_module("pyarrow.parquet").ParquetWriter(
+                self.path,
+                schema,
+                compression=self.compression or "snappy"
+            )
+        pyarrow_ipc = import_pyarrow_module("pyarrow.ipc")
+        options = pyarrow_ipc.IpcWriteOptions(compression=self.compression)
+        return pyarrow_ipc.new_file(self.path, schema, options=options)
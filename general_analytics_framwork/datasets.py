@@ -1,92 +1,289 @@
-from typing import List, Union, Dict
+from collections.abc import Mapping
+from typing import List, Union, Dict, NamedTuple
+import copy
+import warnings
 from datetime import datetime
 import numpy as np
-from sklearn import metrics
 import pandas as pd
+from general_analytics_framwork.registry import LazyRegistry
 
 
 class TimeseriesDataset:
+    """
+    A single time series stored in contiguous NumPy arrays.
+
+    y_data is a float64 array, dates a datetime64[ns] array and
+    regressor_data a 2-D float64 matrix with one column per entry of
+    regressor_names, so slicing a window out of the series returns views
+    rather than copies.
+    """
+
+    __slots__ = (
+        "series_id",
+        "dates",
+        "y_data",
+        "regressor_names",
+        "regressor_data"
+    )
 
     def __init__(
             self,
             series_id: str,
-            dates: List[datetime.date],
-            y_data: List[Union[float, int]],
-            regressor_data: Dict[str, List[Union[float, int]]] = None,
-            date_parser: str = None
+            dates: Union[List[datetime], np.ndarray],
+            y_data: Union[List[Union[float, int]], np.ndarray],
+            regressor_data: Union[
+                Dict[str, Union[List[Union[float, int]], np.ndarray]],
+                np.ndarray
+            ] = None,
+            date_parser: str = None,
+            regressor_names: List[str] = None
     ):
+        """
+        Initializes a new instance of the TimeseriesDataset class.
+
+        :param series_id: The identifier of the series.
+        :param dates: The observation dates, as datetimes or datetime64 values
+        unless date_parser is provided.
+        :param y_data: The target values.
+        :param regressor_data: Either a dict mapping regressor names to their
+        values or a 2-D array with one column per regressor.
+        :param date_parser: Optional strptime-style format used to parse
+        string dates.
+        :param regressor_names: Column names when regressor_data is a 2-D
+        array.
+        """
         assert len(dates) == len(y_data), f"dates and y_data parameters must " \
                                           f"be of same length." \
                                           f"\ndates length:" f"{len(dates)} " \
                                           f"\ny_data length {len(y_data)}"
         self.series_id = series_id
         if date_parser:
-            self.dates = [
-                datetime.strptime(date, date_parser) for date in dates
-            ]
+            dates = pd.to_datetime(dates, format=date_parser)
+        dates = np.asarray(dates)
+        if dates.dtype == object:
+            assert all([isinstance(date, datetime) for date in dates]), \
+                "dates are not of type datetime. Either convert the 'dates'" \
+                "argument prior initialisation or provide 'date_parser' to " \
+                "convert"
         else:
-            self.dates = dates
-        assert all([type(date) == datetime for date in self.dates]), \
-            "dates are not of type datetime. Either convert the 'dates'" \
-            "argument prior initialisation or provide 'date_parser' to convert"
-
-        self.y_data = y_data
+            assert np.issubdtype(dates.dtype, np.datetime64), \
+                "dates are not of type datetime. Either convert the 'dates'" \
+                "argument prior initialisation or provide 'date_parser' to " \
+                "convert"
+        self.dates = np.ascontiguousarray(dates.astype("datetime64[ns]"))
+        self.y_data = np.ascontiguousarray(y_data, dtype=np.float64)
+
+        if isinstance(regressor_data, dict):
+            regressor_names = list(regressor_data.keys())
+            regressor_data = [regressor_data[name] for name in regressor_names]
+            regressor_data = np.column_stack(regressor_data) \
+                if regressor_data else None
+        if regressor_data is not None:
+            regressor_data = np.ascontiguousarray(
+                regressor_data,
+                dtype=np.float64
+            )
+            assert regressor_data.ndim == 2 and \
+                len(regressor_data) == len(self.y_data), \
+                "regressor_data must have one row per observation"
+            assert regressor_names is not None and \
+                len(regressor_names) == regressor_data.shape[1], \
+                "regressor_names must name every regressor_data column"
+        else:
+            regressor_names = []
+        self.regressor_names = list(regressor_names)
         self.regressor_data = regressor_data
 
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Get the series as a long format DataFrame with columns series_id,
+        date, y and one column per regressor.
+        """
+        frame = pd.DataFrame({
+            "series_id": self.series_id,
+            "date": self.dates,
+            "y": self.y_data
+        })
+        for position, regressor_name in enumerate(self.regressor_names):
+            frame[regressor_name] = self.regressor_data[:, position]
+        return frame
 
-class BacktestWindow:
-    """
-     A class representing a sliding window for backtesting time series data.
 
-    This class defines a sliding window over a time series dataset for use in
-    backtesting. The window's training and test periods slide through the data,
-    allowing for the evaluation of forecasting models over different time intervals.
+class BacktestWindowTable:
     """
+    A class representing the sliding windows used to backtest a time series.
+
+    Window 0 tests on the last observation of the series and each following
+    window is shifted one step earlier, until the training window reaches the
+    start of the series. Each test window spans max_test_window_length
+    observations, clipped at the end of the series, so one fit is evaluated
+    at every horizon up to max_test_window_length. The train and test start
+    and end indices of every window are computed up front into a read-only
+    integer array, so looking up a window has no side effects and the table
+    can be shared between concurrent readers.
+
+    The windows visited, window_indexes, can be thinned out to trade
+    evaluation density for runtime: every stride-th window is kept, starting
+    from the most recent, windows testing on dates outside start_date and
+    end_date are dropped, and at most max_windows of the most recent are
+    kept. Rolling windows train on the train_window_length observations
+    before the test window, while expanding windows train on every
+    observation before it.
+    """
+
+    TRAIN_START = 0
+    TRAIN_END = 1
+    TEST_START = 2
+    TEST_END = 3
+    AVAILABLE_WINDOW_TYPES = ("rolling", "expanding")
+
     def __init__(self,
                  n_obs: int,
                  train_window_length: int,
-                 max_test_window_length: int
+                 max_test_window_length: int,
+                 stride: int = 1,
+                 max_windows: int = None,
+                 window_type: str = "rolling",
+                 dates: np.ndarray = None,
+                 start_date=None,
+                 end_date=None
                  ) -> None:
         """
-        Initializes a new instance of the BacktestWindow class.
+        Initializes a new instance of the BacktestWindowTable class.
 
         :param n_obs: The total number of observations in the time series.
-        :param train_window_len: The length of the training window.
+        :param train_window_length: The length of the training window, or
+        the minimum length of expanding training windows.
         :param max_test_window_length: The maximum length of the test window.
-
+        :param stride: The number of steps between visited windows.
+        :param max_windows: The maximum number of windows visited.
+        :param window_type: Either 'rolling' or 'expanding'.
+        :param dates: The dates of the series, required for date cutoffs.
+        :param start_date: The earliest first test date of visited windows.
+        :param end_date: The latest first test date of visited windows.
         """
-
+        if window_type not in self.AVAILABLE_WINDOW_TYPES:
+            raise ValueError(
+                f"window_type must be one of {self.AVAILABLE_WINDOW_TYPES}"
+            )
+        assert stride >= 1, "stride must be a positive integer"
+        assert max_windows is None or max_windows >= 0, \
+            "max_windows must be a non-negative integer"
+        assert dates is not None or \
+            (start_date is None and end_date is None), \
+            "dates are required to filter windows on start_date or end_date"
         self.n_obs = n_obs
         self.train_window_length = train_window_length
         self.max_test_window_length = max_test_window_length
+        self.stride = stride
+        self.max_windows = max_windows
+        self.window_type = window_type
         max_time_series_index = self.n_obs - 1
         max_requested_time_series_index = self.train_window_length
         assert max_time_series_index >= max_requested_time_series_index, \
             "time series is too short to initialise window with requested " \
             "train_window_length"
-        self.test_end_index = self.n_obs - 1
-        self.test_start_index = self.n_obs - 1
-        self.train_end_index = self.n_obs - 2
-        self.train_start_index = self.n_obs - 1 - self.train_window_length
-        self.test_window_length = 1
-        self.index = 0
+        assert self.max_test_window_length >= 1, \
+            "max_test_window_length must be a positive integer"
+        self.max_index = self.n_obs - 1 - self.train_window_length
+
+        test_start_index = self.n_obs - 1 - np.arange(
+            self.max_index + 1,
+            dtype=np.int64
+        )
+        if self.window_type == "expanding":
+            train_start_index = np.zeros_like(test_start_index)
+        else:
+            train_start_index = test_start_index - self.train_window_length
+        self.index_table = np.column_stack([
+            train_start_index,
+            test_start_index - 1,
+            test_start_index,
+            np.minimum(
+                test_start_index + self.max_test_window_length - 1,
+                max_time_series_index
+            )
+        ])
+        self.index_table.setflags(write=False)
+
+        window_indexes = np.arange(1, self.max_index + 1, dtype=np.int64)
+        window_indexes = window_indexes[::self.stride]
+        if start_date is not None or end_date is not None:
+            test_dates = np.asarray(dates, dtype="datetime64[ns]")[
+                test_start_index[window_indexes]
+            ]
+            in_range = np.ones(len(window_indexes), dtype=bool)
+            if start_date is not None:
+                in_range &= test_dates >= np.datetime64(
+                    pd.Timestamp(start_date),
+                    "ns"
+                )
+            if end_date is not None:
+                in_range &= test_dates <= np.datetime64(
+                    pd.Timestamp(end_date),
+                    "ns"
+                )
+            window_indexes = window_indexes[in_range]
+        if self.max_windows is not None:
+            window_indexes = window_indexes[:self.max_windows]
+        self.window_indexes = window_indexes
+
+    def __len__(self):
+        return len(self.window_indexes)
+
+    def get_index_table(self, window_indexes):
+        """
+        Get the train and test indices of several windows.
+
+        :param window_indexes: The window indexes to look up.
+        :return: An integer array with one row per window and columns
+        train_start, train_end, test_start and test_end.
+        """
+        window_indexes = np.asarray(window_indexes, dtype=np.int64)
+        if np.any((window_indexes < 0) | (window_indexes > self.max_index)):
+            raise IndexError(
+                f"window indexes must be between 0 and {self.max_index}"
+            )
+        return self.index_table[window_indexes]
+
+    def get_train_index(self, window_index):
+        """
+        Get the start and end indices of a training window.
+
+        :param window_index: The index of the window.
+        :return: A tuple of the start and end indices of the training window.
+        """
+        train_start_index, train_end_index, _, _ = \
+            self.get_index_table(window_index)
+        return int(train_start_index), int(train_end_index)
 
-    def move(self, move_amount):
+    def get_test_index(self, window_index):
         """
-        Move the window to the next position in the time series.
+        Get the start and end indices of a test window.
 
-        :raises AssertionError: If the start index of the training window is
-        less than 0.
+        :param window_index: The index of the window.
+        :return: A tuple of the start and end indices of the test window.
         """
-        self.train_start_index += move_amount
-        self.train_end_index += move_amount
-        self.test_end_index += move_amount
-        self.test_start_index += move_amount
-        self.test_window_length = self.test_end_index - self.test_start_index + 1
-        self.index -= move_amount
+        _, _, test_start_index, test_end_index = \
+            self.get_index_table(window_index)
+        return int(test_start_index), int(test_end_index)
+
+
+class BacktestWindow(NamedTuple):
+    """
+    An immutable view of one window of a TimeseriesBacktestDataset.
+    """
+
+    dataset: "TimeseriesBacktestDataset"
+    index: int
+    train_start_index: int
+    train_end_index: int
+    test_start_index: int
+    test_end_index: int
 
-    def move_to_index(self, window_index):
-        self.move(self.index-window_index)
+    @property
+    def test_window_length(self):
+        return self.test_end_index - self.test_start_index + 1
 
     def get_train_index(self):
         """
@@ -104,154 +301,523 @@ class BacktestWindow:
         """
         return self.test_start_index, self.test_end_index
 
+    def get_data(self, requested_data, train_or_test):
+        """
+        Get the requested data (target values, dates, or regressors) for the
+        window. See TimeseriesBacktestDataset.get_data.
+        """
+        if train_or_test == "train":
+            start_index, end_index = self.get_train_index()
+        elif train_or_test == "test":
+            start_index, end_index = self.get_test_index()
+        else:
+            raise ValueError("train_or_test must be either 'train' or 'test'")
+        return self.dataset.slice_data(requested_data, start_index, end_index)
+
+    def add_prediction(self, model, prediction):
+        self.dataset.add_prediction(model, prediction, self.index)
+
+
+class BacktestPredictions(Mapping):
+    """
+    The predictions of one model for the windows of a backtest.
+
+    Predictions are stored in array, a (window, horizon) float64 array with
+    one row per window visited by the backtest, in ascending window index
+    order, and NaN past the end of each prediction, so all horizons of all
+    windows can be read at once. get_rows maps window indexes to their rows.
+    It also reads as a mapping from the index of each window with a
+    prediction, in ascending order, to a dict of the prediction and the
+    model.
+    """
+
+    def __init__(self, window_indexes, max_horizon: int, model=None):
+        """
+        :param window_indexes: The indexes of the windows that can have a
+        prediction.
+        :param max_horizon: The initial width of the array, widened when a
+        longer prediction is set.
+        :param model: The model making the predictions.
+        """
+        self.model = model
+        self.window_indexes = np.unique(
+            np.asarray(window_indexes, dtype=np.int64)
+        )
+        self.array = np.full((len(self.window_indexes), max_horizon), np.nan)
+        self.horizons = np.zeros(len(self.window_indexes), dtype=np.int64)
+
+    def get_rows(self, window_indexes):
+        """
+        Get the rows of array holding the predictions of windows.
+
+        :param window_indexes: An array of window indexes.
+        :return: An array of rows.
+        :raises KeyError: If a window is not one of the window_indexes.
+        """
+        window_indexes = np.asarray(window_indexes, dtype=np.int64)
+        rows = np.searchsorted(self.window_indexes, window_indexes)
+        found = rows < len(self.window_indexes)
+        found[found] = \
+            self.window_indexes[rows[found]] == window_indexes[found]
+        if not np.all(found):
+            raise KeyError(window_indexes[~found].tolist())
+        return rows
+
+    def set(self, window_index, prediction):
+        row = self.get_rows([window_index])[0]
+        prediction = np.asarray(prediction, dtype=np.float64).ravel()
+        self._ensure_horizon(len(prediction))
+        self.array[row] = np.nan
+        self.array[row, :len(prediction)] = prediction
+        self.horizons[row] = len(prediction)
+
+    def set_many(self, window_indexes, predictions, horizons):
+        """
+        Set the predictions of several windows at once.
+
+        :param window_indexes: The window indexes.
+        :param predictions: An array with one row per window, read up to
+        each window's horizon.
+        :param horizons: The number of predicted steps of each window.
+        """
+        rows = self.get_rows(np.asarray(window_indexes, dtype=np.int64))
+        horizons = np.asarray(horizons, dtype=np.int64)
+        predictions = np.asarray(predictions, dtype=np.float64)
+        self._ensure_horizon(predictions.shape[1])
+        in_horizon = np.arange(predictions.shape[1]) < horizons[:, np.newaxis]
+        self.array[rows] = np.nan
+        self.array[rows, :predictions.shape[1]] = np.where(
+            in_horizon,
+            predictions,
+            np.nan
+        )
+        self.horizons[rows] = horizons
+
+    def _ensure_horizon(self, horizon):
+        if horizon > self.array.shape[1]:
+            self.array = np.pad(
+                self.array,
+                ((0, 0), (0, horizon - self.array.shape[1])),
+                constant_values=np.nan
+            )
+
+    def get_window_indexes(self):
+        """
+        Get the indexes of the windows with a prediction, in ascending order.
+        """
+        return self.window_indexes[self.horizons > 0]
+
+    def _get_row(self, window_index):
+        """
+        Get the row of a window with a prediction, or None.
+        """
+        row = np.searchsorted(self.window_indexes, window_index)
+        if row < len(self.window_indexes) and \
+                self.window_indexes[row] == window_index and \
+                self.horizons[row]:
+            return row
+        return None
+
+    def __getitem__(self, window_index):
+        row = self._get_row(window_index)
+        if row is None:
+            raise KeyError(window_index)
+        return {
+            "prediction": self.array[row, :self.horizons[row]],
+            "model": self.model
+        }
+
+    def __contains__(self, window_index):
+        return self._get_row(window_index) is not None
+
+    def __iter__(self):
+        return iter(self.get_window_indexes().tolist())
+
+    def __len__(self):
+        return int(np.count_nonzero(self.horizons))
+
 
 class TimeseriesBacktestDataset:
 
     def __init__(self, time_series_dataset, train_window_length,
-                 max_test_window_length, predictions=None):
+                 max_test_window_length, predictions=None, stride=1,
+                 max_windows=None, window_type="rolling", start_date=None,
+                 end_date=None):
         self.time_series_dataset = time_series_dataset
-        self.window = BacktestWindow(
+        self.windows = BacktestWindowTable(
             n_obs=len(time_series_dataset.dates),
             train_window_length=train_window_length,
-            max_test_window_length=max_test_window_length
+            max_test_window_length=max_test_window_length,
+            stride=stride,
+            max_windows=max_windows,
+            window_type=window_type,
+            dates=time_series_dataset.dates,
+            start_date=start_date,
+            end_date=end_date
         )
         if predictions:
             self.predictions = predictions
         else:
             self.predictions = {}
 
-    def add_prediction(self, model, prediction):
-        if model.get_reference() not in self.predictions.keys():
-            self.predictions[model.get_reference()] = {}
-        self.predictions[model.get_reference()][self.window.index] = {
-            "prediction": prediction,
-            "model": model
-        }
+    def add_prediction(self, model, prediction, window_index):
+        self.get_model_predictions(model).set(window_index, prediction)
 
-    def _get_start_and_end_index(self, train_or_test):
+    def add_predictions(self, model, predictions, window_indexes, horizons):
         """
-        Get the start and end indices of the training or test window.
+        Add the predictions of a model for several windows at once. See
+        BacktestPredictions.set_many.
+        """
+        self.get_model_predictions(model).set_many(
+            window_indexes,
+            predictions,
+            horizons
+        )
 
-        :param train_or_test: Either "train" or "test" to specify the window
-        type.
-        :return: A tuple of the start and end indices of the window.
-        :raises ValueError: If an invalid value for train_or_test is provided.
+    def get_model_predictions(self, model):
         """
-        if train_or_test == "train":
-            return self.window.get_train_index()
-        elif train_or_test == "test":
-            return self.window.get_test_index()
-        else:
-            raise ValueError("train_or_test must be either 'train' or 'test'")
+        Get the predictions of a model, creating them if missing.
+
+        :return: A BacktestPredictions.
+        """
+        model_reference = model.get_reference()
+        if model_reference not in self.predictions:
+            self.predictions[model_reference] = BacktestPredictions(
+                window_indexes=self.windows.window_indexes,
+                max_horizon=self.windows.max_test_window_length,
+                model=model
+            )
+        return self.predictions[model_reference]
+
+    def get_window_indexes(self):
+        """
+        Get the indexes of the windows visited when iterating the dataset.
+
+        :return: An integer array of window indexes in iteration order.
+        """
+        return self.windows.window_indexes
+
+    def get_window(self, window_index):
+        """
+        Get an immutable view of a window.
 
-    def get_data(self, requested_data, train_or_test, window_index=None):
+        :param window_index: The index of the window.
+        :return: A BacktestWindow.
+        """
+        train_start_index, train_end_index, test_start_index, \
+            test_end_index = self.windows.get_index_table(window_index)
+        return BacktestWindow(
+            self,
+            int(window_index),
+            int(train_start_index),
+            int(train_end_index),
+            int(test_start_index),
+            int(test_end_index)
+        )
+
+    def without_predictions(self):
+        """
+        Get a copy of the dataset that shares the underlying time series and
+        windows but has no predictions, e.g. to send to a worker process.
+
+        :return: A TimeseriesBacktestDataset.
+        """
+        dataset = copy.copy(self)
+        dataset.predictions = {}
+        return dataset
+
+    def get_data(self, requested_data, train_or_test, window_index):
         """
         Get the requested data (target values, dates, or regressors) for the
-        specified window.
+        specified window. The data is returned as a view onto the underlying
+        time series arrays, so it must not be modified in place.
 
         :param requested_data: The type of data to retrieve ("y", "dates", or
          "regressors").
         :param train_or_test: Either "train" or "test" to specify the window
         type.
-        :return: The requested data for the specified window.
+        :param window_index: The index of the window.
+        :return: The requested data for the specified window. Regressors are
+        returned as a 2-D array with one column per regressor, or None.
         :raises ValueError: If an invalid value for requested_data or
         train_or_test is provided.
         """
-        if window_index:
-            current_window_index = self.window.index
-            self.window.move_to_index(window_index=window_index)
-        start_index, end_index = self._get_start_and_end_index(train_or_test)
+        return self.get_window(window_index).get_data(
+            requested_data,
+            train_or_test
+        )
+
+    def slice_data(self, requested_data, start_index, end_index):
+        """
+        Get the requested data between two indices, inclusive.
+
+        :raises ValueError: If an invalid value for requested_data is
+        provided.
+        """
         if requested_data == "y":
             data = self.time_series_dataset.y_data[start_index: end_index+1]
         elif requested_data == "dates":
             data = self.time_series_dataset.dates[start_index: end_index+1]
         elif requested_data == "regressors":
-            if self.time_series_dataset.regressor_data:
-                data = {regressor_name: regressor[start_index: end_index+1]
-                        for regressor_name, regressor
-                        in self.time_series_dataset.regressor_data.items()}
+            if self.time_series_dataset.regressor_data is not None:
+                data = self.time_series_dataset.regressor_data[
+                    start_index: end_index+1
+                ]
             else:
                 data = None
         else:
             raise ValueError("requested_data must be 'y', 'dates' "
                              "or regressors")
-        if window_index:
-            self.window.move_to_index(current_window_index)
         return data
 
-    def __iter__(self):
-        return self
+    def get_predictions_frame(self) -> pd.DataFrame:
+        """
+        Get the predictions as a long format DataFrame with columns
+        series_id, model, window, horizon, date and prediction, where date is
+        the date being forecast.
+        """
+        frames = []
+        dates = self.time_series_dataset.dates
+        for model_reference, model_predictions in self.predictions.items():
+            window_indexes = model_predictions.get_window_indexes()
+            rows = model_predictions.get_rows(window_indexes)
+            values = model_predictions.array[rows]
+            horizons = model_predictions.horizons[rows]
+            in_horizon = np.arange(values.shape[1]) < horizons[:, np.newaxis]
+            test_start_index = self.windows.get_index_table(
+                window_indexes
+            )[:, BacktestWindowTable.TEST_START]
+            horizon = np.broadcast_to(
+                np.arange(1, values.shape[1] + 1),
+                values.shape
+            )[in_horizon]
+            date_index = np.repeat(test_start_index, horizons) + horizon - 1
+            frames.append(pd.DataFrame({
+                "series_id": self.time_series_dataset.series_id,
+                "model": model_reference,
+                "window": np.repeat(window_indexes, horizons),
+                "horizon": horizon,
+                "date": dates[np.minimum(date_index, len(dates) - 1)],
+                "prediction": values[in_horizon]
+            }))
+        if not frames:
+            return pd.DataFrame(columns=[
+                "series_id", "model", "window", "horizon", "date",
+                "prediction"
+            ])
+        return pd.concat(frames, ignore_index=True)
 
-    def __next__(self):
+    def __iter__(self):
         """
-        Move the backtest window to the next position in the time series.
+        Iterate over immutable views of the backtest windows. Every call
+        returns an independent iterator.
         """
-        if self.window.train_start_index == 0:
-            self.window.move_to_index(0)
-            raise StopIteration
-        else:
-            self.window.move(-1)
-            return self
+        for window_index in self.get_window_indexes():
+            yield self.get_window(window_index)
+
+
+def _mean_squared_error(prediction, actual, axis):
+    return np.nanmean((prediction - actual) ** 2, axis=axis)
+
+
+def _root_mean_squared_error(prediction, actual, axis):
+    return np.sqrt(_mean_squared_error(prediction, actual, axis))
+
+
+def _mean_absolute_error(prediction, actual, axis):
+    return np.nanmean(np.abs(prediction - actual), axis=axis)
+
+
+def _median_absolute_error(prediction, actual, axis):
+    return np.nanmedian(np.abs(prediction - actual), axis=axis)
+
+
+def _mean_absolute_percentage_error(prediction, actual, axis):
+    return np.nanmean(np.abs((prediction - actual) / actual), axis=axis)
+
+
+def _symmetric_mean_absolute_percentage_error(prediction, actual, axis):
+    return np.nanmean(
+        2 * np.abs(prediction - actual) / (np.abs(prediction) + np.abs(actual)),
+        axis=axis
+    )
+
+
+def _mean_error(prediction, actual, axis):
+    return np.nanmean(prediction - actual, axis=axis)
 
 
 class TimeSeriesBacktestResultsDataset:
+    """
+    Backtest predictions and actuals aligned into arrays for error analysis.
+
+    On first use the predictions of every model are materialized into a
+    (model, window, horizon) array alongside a (window, horizon) array of
+    actual values, padded with NaN where a window has fewer test observations
+    than the longest horizon. Errors per window, per horizon or per model are
+    then array reductions over those, returned as tidy DataFrames.
+    """
+
+    AVAILABLE_ERROR_FUNCTIONS = {
+        "MSE": _mean_squared_error,
+        "RMSE": _root_mean_squared_error,
+        "MAE": _mean_absolute_error,
+        "MdAE": _median_absolute_error,
+        "MAPE": _mean_absolute_percentage_error,
+        "SMAPE": _symmetric_mean_absolute_percentage_error,
+        "ME": _mean_error
+    }
+    AVAILABLE_ERROR_LEVELS = ("window", "horizon", "model")
 
     def __init__(
             self,
             backtest_dataset: TimeseriesBacktestDataset
     ):
         self.backtest_dataset = backtest_dataset
+        self.model_references = None
+        self.window_indexes = None
+        self.predictions = None
+        self.actuals = None
+        self.test_dates = None
 
-    def get_model_error(
-            self,
-            error_averaging_function,
-            error_function,
-            model_references=None
-    ):
-        model_error = {}
-        if not model_references:
-            model_references = self.backtest_dataset.predictions.keys()
-
-        for model_reference in model_references:
-            model_error_data = self.get_model_error_data(
-                model_reference,
-                error_function
+    def materialize(self):
+        """
+        Build the aligned prediction and actual arrays, once.
+        """
+        if self.predictions is not None:
+            return
+        predictions = self.backtest_dataset.predictions
+        self.model_references = list(predictions.keys())
+        self.window_indexes = np.array(sorted({
+            window_index
+            for model_predictions in predictions.values()
+            for window_index in model_predictions.keys()
+        }), dtype=np.int64)
+
+        index_table = self.backtest_dataset.windows.get_index_table(
+            self.window_indexes
+        )
+        test_start_index = index_table[:, 2]
+        test_length = index_table[:, 3] - test_start_index + 1
+        max_horizon = int(test_length.max()) if len(test_length) else 0
+        for model_predictions in predictions.values():
+            max_horizon = max(
+                max_horizon,
+                int(model_predictions.horizons.max(initial=0))
             )
-            model_error[model_reference] = model_error_data
 
-        return model_error
+        horizon_steps = np.arange(max_horizon)
+        position = test_start_index[:, np.newaxis] + horizon_steps
+        in_test_window = horizon_steps < test_length[:, np.newaxis]
+        position = np.where(in_test_window, position, 0)
+        y_data = self.backtest_dataset.time_series_dataset.y_data
+        self.actuals = np.where(in_test_window, y_data[position], np.nan)
+        self.test_dates = self.backtest_dataset.time_series_dataset.dates[
+            test_start_index
+        ]
+
+        self.predictions = np.full(
+            (len(self.model_references), len(self.window_indexes),
+             max_horizon),
+            np.nan
+        )
+        for model_position, model_reference in \
+                enumerate(self.model_references):
+            model_predictions = predictions[model_reference]
+            predicted_window_indexes = model_predictions.get_window_indexes()
+            window_positions = np.searchsorted(
+                self.window_indexes,
+                predicted_window_indexes
+            )
+            # the array is as wide as the longest test window of the table,
+            # which can be longer than any window visited
+            values = model_predictions.array[
+                model_predictions.get_rows(predicted_window_indexes),
+                :max_horizon
+            ]
+            self.predictions[
+                model_position, window_positions, :values.shape[1]
+            ] = values
 
-    def get_model_error_data(self, model_reference, error_function):
-        model_predictions = self.backtest_dataset.predictions[model_reference]
-        all_window_model_error = {"date": [], "error": []}
-        for window_index in model_predictions.keys():
-            all_window_model_error["date"].append(
-                self.backtest_dataset.get_data("dates", "test", window_index)[0]
+    def get_model_error(
+            self,
+            error_functions=("MSE",),
+            level="window",
+            model_references=None
+    ) -> pd.DataFrame:
+        """
+        Compute forecast errors for each model.
+
+        :param error_functions: Names of entries in AVAILABLE_ERROR_FUNCTIONS.
+        :param level: 'window' for one error per backtest window, 'horizon'
+        for one error per forecast step across windows, or 'model' for a
+        single error per model.
+        :param model_references: The models to include, defaults to all.
+        :return: A DataFrame with columns series_id, model, the level's
+        columns (window and date, or horizon), error_function and error.
+        :raises ValueError: If level or an error function is not available.
+        """
+        if level not in self.AVAILABLE_ERROR_LEVELS:
+            raise ValueError(
+                f"level must be one of {self.AVAILABLE_ERROR_LEVELS}"
             )
-            all_window_model_error["error"].append(
-                self.get_window_model_error(
-                    model_reference,
-                    window_index,
-                    error_function
+        for error_function in error_functions:
+            if error_function not in self.AVAILABLE_ERROR_FUNCTIONS:
+                raise ValueError(
+                    f"error_function must be one of "
+                    f"{list(self.AVAILABLE_ERROR_FUNCTIONS.keys())}"
                 )
-            )
-        return all_window_model_error
-
-    def get_window_model_error(self, model_reference, window_index, error_function):
-        window_model_data = self.backtest_dataset.predictions[model_reference][window_index]
-        window_model_error = error_function(
-                np.array(window_model_data['prediction']),
-                np.array(self.backtest_dataset.get_data("y", "test", window_index))
-        )
-        return window_model_error
+        self.materialize()
+        if model_references is None:
+            model_references = self.model_references
+        model_positions = [
+            self.model_references.index(model_reference)
+            for model_reference in model_references
+        ]
+        predictions = self.predictions[model_positions]
+        actuals = self.actuals[np.newaxis, :, :]
+        n_models = len(model_references)
+
+        error_data = []
+        for error_function in error_functions:
+            function = self.AVAILABLE_ERROR_FUNCTIONS[error_function]
+            with np.errstate(divide="ignore", invalid="ignore"), \
+                    warnings.catch_warnings():
+                warnings.simplefilter("ignore", category=RuntimeWarning)
+                if level == "window":
+                    errors = function(predictions, actuals, axis=2)
+                    columns = {
+                        "window": np.tile(self.window_indexes, n_models),
+                        "date": np.tile(self.test_dates, n_models)
+                    }
+                elif level == "horizon":
+                    errors = function(predictions, actuals, axis=1)
+                    columns = {
+                        "horizon": np.tile(
+                            np.arange(1, predictions.shape[2] + 1),
+                            n_models
+                        )
+                    }
+                else:
+                    errors = function(predictions, actuals, axis=(1, 2))
+                    columns = {}
+            errors = np.asarray(errors).reshape(n_models, -1)
+            error_data.append(pd.DataFrame({
+                "series_id": self.backtest_dataset.time_series_dataset.series_id,
+                "model": np.repeat(model_references, errors.shape[1]),
+                **columns,
+                "error_function": error_function,
+                "error": errors.ravel()
+            }))
+        return pd.concat(error_data, ignore_index=True)
 
 
 class WindowPredictionDataset:
 
-    AVAILABLE_ERROR_FUNCTIONS = {
-        "MSE": metrics.mean_squared_error,
-        "MAE": metrics.mean_absolute_error
-    }
+    AVAILABLE_ERROR_FUNCTIONS = LazyRegistry({
+        "MSE": "sklearn.metrics:mean_squared_error",
+        "MAE": "sklearn.metrics:mean_absolute_error"
+    })
 
     def __init__(self, window_prediction_data, error_function):
         self.model_data = {
@@ -0,0 +1,399 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections.abc import Iterator
+from typing import Optional
+from general_analytics_framwork.base_processes import DagNode
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+class Profiler:
+    """
+    Records the wall time, CPU time, memory and item throughput of every
+    run and stream call in a process tree.
+
+    instrument wraps the run and stream methods of each component of a built
+    tree, so nothing is measured, and nothing costs anything, unless a tree
+    is instrumented. Calls are aggregated per position in the tree. A stream
+    is measured while its items are being produced, and counts as one call
+    once it is exhausted or closed. A component's calls made from inside its
+    own run or stream, like a streaming SequenceProcess collecting its
+    stream, are part of the outer call. CPU time is the process-wide CPU time
+    used while a node ran, so it includes the worker threads of its
+    children, and with trace_memory=True the tracemalloc peak of a node is
+    approximate when nodes run concurrently. tracemalloc is stopped when the
+    root finishes if the profiler started it. Components run inside worker
+    processes are not recorded.
+    """
+
+    def __init__(
+            self,
+            trace_memory: bool = False,
+            report_path: Optional[str] = None,
+            trace_path: Optional[str] = None,
+            print_report: bool = True
+    ):
+        """
+        Initialize the Profiler.
+
+        Parameters:
+            trace_memory (bool, optional): Whether to track allocations with
+                tracemalloc, which slows down allocation heavy code.
+            report_path (str, optional): JSON file to write the report to
+                when the instrumented tree finishes running.
+            trace_path (str, optional): File to write Chrome trace events
+                to, viewable in chrome://tracing or Perfetto.
+            print_report (bool, optional): Whether to print the report tree
+                when the instrumented tree finishes running.
+        """
+        self.trace_memory = trace_memory
+        self.report_path = report_path
+        self.trace_path = trace_path
+        self.print_report = print_report
+        self.root = None
+        self.nodes = {}
+        self.events = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._start_time = time.perf_counter()
+        self._started_tracing = False
+
+    def __getstate__(self):
+        # components sent to worker processes carry a disabled copy
+        state = self.__dict__.copy()
+        state["_lock"] = None
+        state["_local"] = None
+        return state
+
+    def instrument(self, process):
+        """
+        Wrap the run and stream methods of every component of a process
+        tree.
+
+        Parameters:
+            process (AbstractComponent): The root of the tree.
+
+        Returns:
+            AbstractComponent: The root, with the profiler attached as its
+                profiler attribute.
+        """
+        self.root = self._instrument(process, path=(), name=None)
+        process.profiler = self
+        return process
+
+    def _instrument(self, component, path, name):
+        name = name or component.name or type(component).__name__
+        self.nodes[path] = {
+            "name": name,
+            "type": type(component).__name__,
+            "calls": 0,
+            "wall_time": 0.0,
+            "cpu_time": 0.0,
+            "items_in": None,
+            "items_out": None,
+            "memory_peak_mb": None
+        }
+        component.run = _ProfiledRun(self, path, component.run)
+        if hasattr(component, "stream"):
+            component.stream = _ProfiledStream(self, path, component.stream)
+        children = getattr(component, "children", None) or []
+        names = [
+            getattr(child, "name", None) or type(child).__name__
+            for child in children
+        ]
+        for position, (child, child_name) in enumerate(zip(children, names)):
+            if names.count(child_name) > 1:
+                child_name = f"{child_name}_{position}"
+            if isinstance(child, DagNode):
+                child = child.process
+            self._instrument(child, path + (position,), child_name)
+        return path
+
+    def _get_stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def is_running(self, path) -> bool:
+        """
+        Whether the innermost call being measured on this thread is of the
+        component at path.
+        """
+        stack = self._get_stack()
+        return bool(stack) and stack[-1]["path"] == path
+
+    def start_call(self, path):
+        frame = {"path": path}
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            current, peak = tracemalloc.get_traced_memory()
+            stack = self._get_stack()
+            if stack and "peak" in stack[-1]:
+                stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+            tracemalloc.reset_peak()
+            frame["start"] = frame["peak"] = current
+        self._get_stack().append(frame)
+        return time.perf_counter(), time.process_time()
+
+    def end_call(self, start):
+        """
+        Stop measuring the innermost call on this thread.
+
+        Returns:
+            tuple: The call's wall time, CPU time and memory peak in MB, or
+                None if memory is not traced.
+        """
+        wall_start, cpu_start = start
+        wall_time = time.perf_counter() - wall_start
+        cpu_time = time.process_time() - cpu_start
+        frame = self._get_stack().pop()
+        memory_peak_mb = None
+        if "peak" in frame:
+            peak = max(tracemalloc.get_traced_memory()[1], frame["peak"])
+            memory_peak_mb = (peak - frame["start"]) / 1024 / 1024
+            stack = self._get_stack()
+            if stack and "peak" in stack[-1]:
+                stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+        return wall_time, cpu_time, memory_peak_mb
+
+    def record_call(self, path, wall_start, measurements, items_in,
+                    items_out):
+        """
+        Add a finished call to the measurements of the component at path.
+        """
+        wall_time, cpu_time, memory_peak_mb = measurements
+        with self._lock:
+            node = self.nodes[path]
+            node["calls"] += 1
+            node["wall_time"] += wall_time
+            node["cpu_time"] += cpu_time
+            node["items_in"] = _add_counts(node["items_in"], items_in)
+            node["items_out"] = _add_counts(node["items_out"], items_out)
+            if memory_peak_mb is not None:
+                node["memory_peak_mb"] = max(
+                    node["memory_peak_mb"] or 0.0,
+                    memory_peak_mb
+                )
+            self.events.append({
+                "name": node["name"],
+                "cat": node["type"],
+                "ph": "X",
+                "ts": (wall_start - self._start_time) * 1e6,
+                "dur": wall_time * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": {"path": "/".join(str(p) for p in path)}
+            })
+
+    def get_report(self) -> dict:
+        """
+        Get the measurements as a tree of nested dicts, leaving out
+        components that were never run.
+
+        Returns:
+            dict: The report of the root, with its children's reports in
+                'children'.
+        """
+        report = self._get_node_report(self.root)
+        if resource is not None:
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+            scale = 1024 * 1024 if os.uname().sysname == "Darwin" else 1024
+            report["max_rss_mb"] = max_rss / scale
+        return report
+
+    def _get_node_report(self, path):
+        node = dict(self.nodes[path])
+        items = node["items_in"] or node["items_out"]
+        node["items_per_second"] = (
+            items / node["wall_time"] if items and node["wall_time"] else None
+        )
+        node["children"] = [
+            self._get_node_report(child_path)
+            for child_path in self.nodes
+            if len(child_path) == len(path) + 1
+            and child_path[:-1] == path and self.nodes[child_path]["calls"]
+        ]
+        return node
+
+    def format_report(self) -> str:
+        """
+        Format the report as an indented tree, one line per component.
+        """
+        lines = []
+        self._format_node(self.get_report(), lines, depth=0)
+        return "\n".join(lines)
+
+    def _format_node(self, node, lines, depth):
+        line = (
+            f"{'  ' * depth}{node['name']} ({node['type']}): "
+            f"{node['calls']} call(s), wall {node['wall_time']:.3f}s, "
+            f"cpu {node['cpu_time']:.3f}s"
+        )
+        if node["items_in"] is not None:
+            line += f", {node['items_in']} item(s) in"
+        if node["items_out"] is not None:
+            line += f", {node['items_out']} item(s) out"
+        if node["items_per_second"] is not None:
+            line += f", {node['items_per_second']:.1f} item(s)/s"
+        if node["memory_peak_mb"] is not None:
+            line += f", peak {node['memory_peak_mb']:.1f}MB"
+        if "max_rss_mb" in node:
+            line += f", max RSS {node['max_rss_mb']:.1f}MB"
+        lines.append(line)
+        for child in node["children"]:
+            self._format_node(child, lines, depth + 1)
+
+    def write_report(self, path: str):
+        _make_parent_dirs(path)
+        with open(path, "w") as f:
+            json.dump(self.get_report(), f, indent=2)
+
+    def write_trace(self, path: str):
+        _make_parent_dirs(path)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events}, f)
+
+    def stop_tracing(self):
+        """
+        Stop tracemalloc, if the profiler started it.
+        """
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def emit(self):
+        """
+        Output the report as configured, once the whole tree has run.
+        """
+        if self.report_path:
+            self.write_report(self.report_path)
+        if self.trace_path:
+            self.write_trace(self.trace_path)
+        if self.print_report:
+            print(self.format_report())
+
+
+class _ProfiledRun:
+    """
+    Stands in for a component's run method and reports each call to the
+    profiler.
+    """
+
+    def __init__(self, profiler, path, run):
+        self.profiler = profiler
+        self.path = path
+        self.run = run
+
+    def __call__(self, *args, **kwargs):
+        profiler = self.profiler
+        if profiler._lock is None or profiler.is_running(self.path):
+            return self.run(*args, **kwargs)
+        start = profiler.start_call(self.path)
+        data = args[0] if args else kwargs.get("data")
+        output = None
+        try:
+            output = self.run(*args, **kwargs)
+        finally:
+            profiler.record_call(
+                self.path,
+                start[0],
+                profiler.end_call(start),
+                _count(data),
+                _count(output)
+            )
+            if self.path == profiler.root:
+                profiler.stop_tracing()
+        if self.path == profiler.root:
+            profiler.emit()
+        return output
+
+
+class _ProfiledStream:
+    """
+    Stands in for a component's stream method and reports each stream to
+    the profiler, measuring only the time spent producing its items.
+    """
+
+    def __init__(self, profiler, path, stream):
+        self.profiler = profiler
+        self.path = path
+        self.stream = stream
+
+    def __call__(self, *args, **kwargs):
+        profiler = self.profiler
+        if profiler._lock is None or profiler.is_running(self.path):
+            return self.stream(*args, **kwargs)
+        data = args[0] if args else kwargs.get("data")
+        return self._profile(self.stream(*args, **kwargs), data)
+
+    def _profile(self, items, data):
+        profiler = self.profiler
+        wall_start = None
+        measurements = (0.0, 0.0, None)
+        items_out = 0
+        try:
+            while True:
+                start = profiler.start_call(self.path)
+                wall_start = start[0] if wall_start is None else wall_start
+                try:
+                    item = next(items)
+                except StopIteration:
+                    break
+                finally:
+                    measurements = _add_measurements(
+                        measurements,
+                        profiler.end_call(start)
+                    )
+                items_out += 1
+                yield item
+        finally:
+            if hasattr(items, "close"):
+                items.close()
+            profiler.record_call(
+                self.path,
+                wall_start,
+                measurements,
+                None if isinstance(data, Iterator) else _count(data),
+                items_out
+            )
+            if self.path == profiler.root:
+                profiler.stop_tracing()
+        if self.path == profiler.root:
+            profiler.emit()
+
+
+def _count(items):
+    if items is None:
+        return None
+    if isinstance(items, (list, tuple, dict)):
+        return len(items)
+    return 1
+
+
+def _add_measurements(total, measurements):
+    wall_time, cpu_time, memory_peak_mb = total
+    if measurements[2] is not None:
+        memory_peak_mb = max(memory_peak_mb or 0.0, measurements[2])
+    return wall_time + measurements[0], cpu_time + measurements[1], \
+        memory_peak_mb
+
+
+def _add_counts(total, count):
+    if count is None:
+        return total
+    return count if total is None else total + count
+
+
+def _make_parent_dirs(path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
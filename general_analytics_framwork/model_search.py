@@ -0,0 +1,434 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import List, Optional
+import inspect
+import math
+import os
+import warnings
+import numpy as np
+import pandas as pd
+from general_analytics_framwork.base_processes import AbstractComponent
+from general_analytics_framwork.datasets import (
+    BacktestPredictions,
+    TimeSeriesBacktestResultsDataset,
+    TimeseriesBacktestDataset
+)
+from general_analytics_framwork.modelling import ARIMA
+
+
+class ModelSearch(AbstractComponent):
+    """
+    Searches a space of hyperparameters of MODEL_CLASS by backtesting, with
+    successive halving.
+
+    The grid of param_grid, or n_candidates sampled from it for
+    search='random', is expanded into one model per candidate. Every
+    candidate is first backtested on the min_windows most recent windows of
+    each series and scored by error_function, averaged over series. The
+    best 1/halving_factor of the candidates then go on to halving_factor
+    times as many windows, reusing the forecasts already made, until the
+    survivors have been backtested on every window. Candidates whose fit
+    fails on any window are scored NaN and are pruned first.
+
+    Every (series, window) training slice is fitted by all live candidates
+    in turn, and fits run on one process pool of n_jobs workers shared by
+    all rounds, which receives the datasets once when it starts. The
+    predictions of the keep_best highest ranked candidates are added to the
+    datasets, and all candidates are ranked in leaderboard, best first, by
+    the number of windows they reached and then their error.
+    """
+
+    MODEL_CLASS = None
+    AVAILABLE_SEARCH_TYPES = ("grid", "random")
+    AVAILABLE_ERROR_FUNCTIONS = \
+        TimeSeriesBacktestResultsDataset.AVAILABLE_ERROR_FUNCTIONS
+
+    def __init__(
+            self,
+            param_grid: dict,
+            fixed_params: Optional[dict] = None,
+            search: str = "grid",
+            n_candidates: Optional[int] = None,
+            error_function: str = "MSE",
+            halving_factor: int = 3,
+            min_windows: int = 4,
+            keep_best: int = 1,
+            n_jobs: int = 1,
+            chunk_size: Optional[int] = None,
+            leaderboard_path: Optional[str] = None,
+            seed: int = 0
+    ):
+        """
+        Initialize the ModelSearch.
+
+        Parameters:
+            param_grid (dict): Hyperparameter names mapped to the lists of
+                values searched.
+            fixed_params (dict, optional): Hyperparameters shared by every
+                candidate.
+            search (str, optional): Either 'grid' or 'random'.
+            n_candidates (int, optional): Number of candidates sampled from
+                the grid for search='random'.
+            error_function (str, optional): Name of the error candidates are
+                ranked by, see TimeSeriesBacktestResultsDataset.
+            halving_factor (int, optional): Factor by which the number of
+                candidates shrinks, and the number of windows grows, every
+                round.
+            min_windows (int, optional): Number of windows per series every
+                candidate is backtested on.
+            keep_best (int, optional): Number of candidates whose
+                predictions are added to the datasets.
+            n_jobs (int, optional): Number of worker processes. 1 fits in
+                the calling process and -1 uses every available CPU.
+            chunk_size (int, optional): Number of windows of one series
+                sent to a worker per task. Defaults to an even split over 4
+                tasks per worker.
+            leaderboard_path (str, optional): CSV file to write the
+                leaderboard to.
+            seed (int, optional): Seed of the random search.
+        """
+        if search not in self.AVAILABLE_SEARCH_TYPES:
+            raise ValueError(
+                f"search must be one of {self.AVAILABLE_SEARCH_TYPES}"
+            )
+        if error_function not in self.AVAILABLE_ERROR_FUNCTIONS:
+            raise ValueError(
+                f"error_function must be one of "
+                f"{list(self.AVAILABLE_ERROR_FUNCTIONS.keys())}"
+            )
+        assert search == "grid" or n_candidates, \
+            "n_candidates is required for search='random'"
+        assert halving_factor >= 2, "halving_factor must be at least 2"
+        assert min_windows >= 1, "min_windows must be a positive integer"
+        assert keep_best >= 1, "keep_best must be a positive integer"
+        if n_jobs == -1:
+            n_jobs = os.cpu_count() or 1
+        assert n_jobs >= 1, "n_jobs must be a positive integer or -1"
+        self.param_grid = param_grid
+        self.fixed_params = fixed_params or {}
+        self.search = search
+        self.n_candidates = n_candidates
+        self.error_function = error_function
+        self.halving_factor = halving_factor
+        self.min_windows = min_windows
+        self.keep_best = keep_best
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
+        self.leaderboard_path = leaderboard_path
+        self.seed = seed
+        self.leaderboard: Optional[pd.DataFrame] = None
+        self.candidate_params = self.get_candidate_params()
+
+    def get_candidate_params(self) -> List[dict]:
+        """
+        Expand the search space into the hyperparameters of each candidate.
+
+        Returns:
+            List[dict]: The varied hyperparameters of each candidate.
+
+        Raises:
+            ValueError: If a hyperparameter is not accepted by MODEL_CLASS.
+        """
+        names = sorted(self.param_grid.keys())
+        candidate_params = [
+            dict(zip(names, values))
+            for values in product(*[self.param_grid[name] for name in names])
+        ]
+        if self.search == "random" and \
+                self.n_candidates < len(candidate_params):
+            positions = np.random.default_rng(self.seed).choice(
+                len(candidate_params),
+                size=self.n_candidates,
+                replace=False
+            )
+            candidate_params = [
+                candidate_params[position] for position in sorted(positions)
+            ]
+        signature = inspect.signature(self.MODEL_CLASS)
+        for params in candidate_params[:1]:
+            try:
+                signature.bind(**self.fixed_params, **params)
+            except TypeError as error:
+                raise ValueError(
+                    f"invalid {self.MODEL_CLASS.__name__} hyperparameters: "
+                    f"{error}"
+                ) from None
+        return candidate_params
+
+    def get_candidates(self) -> list:
+        return [
+            self.MODEL_CLASS(**self.fixed_params, **params)
+            for params in self.candidate_params
+        ]
+
+    def run(self, data):
+        data = list(data)
+        candidates = self.get_candidates()
+        if not data or not candidates:
+            return data
+        window_indexes = [
+            np.asarray(backtest_dataset.get_window_indexes(), dtype=np.int64)
+            for backtest_dataset in data
+        ]
+        actuals = [
+            get_actuals(backtest_dataset, dataset_window_indexes)
+            for backtest_dataset, dataset_window_indexes
+            in zip(data, window_indexes)
+        ]
+        predictions = [
+            [
+                BacktestPredictions(
+                    window_indexes=dataset_window_indexes,
+                    max_horizon=
+                    backtest_dataset.windows.max_test_window_length,
+                    model=candidate
+                )
+                for backtest_dataset, dataset_window_indexes
+                in zip(data, window_indexes)
+            ]
+            for candidate in candidates
+        ]
+        max_windows = max(
+            len(dataset_window_indexes)
+            for dataset_window_indexes in window_indexes
+        )
+
+        n_windows_fitted = [0] * len(candidates)
+        errors = [np.nan] * len(candidates)
+        live = list(range(len(candidates)))
+        executor = None
+        if self.n_jobs > 1:
+            executor = ProcessPoolExecutor(
+                max_workers=self.n_jobs,
+                initializer=_set_worker_data,
+                initargs=([
+                    backtest_dataset.without_predictions()
+                    for backtest_dataset in data
+                ],)
+            )
+        try:
+            fitted = 0
+            budget = min(self.min_windows, max_windows)
+            while True:
+                tasks = self.get_tasks(
+                    window_indexes,
+                    fitted,
+                    budget,
+                    [(position, candidates[position]) for position in live]
+                )
+                for dataset_position, window_predictions in \
+                        self.fit_tasks(executor, data, tasks):
+                    for position, window_index, prediction in \
+                            window_predictions:
+                        predictions[position][dataset_position].set(
+                            window_index,
+                            prediction
+                        )
+                for position in live:
+                    n_windows_fitted[position] = sum(
+                        len(dataset_window_indexes[:budget])
+                        for dataset_window_indexes in window_indexes
+                    )
+                    errors[position] = self.score(
+                        predictions[position],
+                        window_indexes,
+                        actuals,
+                        budget
+                    )
+                fitted = budget
+                if budget >= max_windows:
+                    break
+                live = sorted(live, key=lambda p: _rank_error(errors[p]))
+                live = live[:max(
+                    self.keep_best,
+                    math.ceil(len(live) / self.halving_factor)
+                )]
+                budget = min(budget * self.halving_factor, max_windows)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        ranking = sorted(
+            range(len(candidates)),
+            key=lambda p: (-n_windows_fitted[p], _rank_error(errors[p]))
+        )
+        self.leaderboard = pd.DataFrame([
+            {
+                "rank": rank,
+                "model": candidates[position].get_reference(),
+                **self.candidate_params[position],
+                "n_windows": n_windows_fitted[position],
+                "error_function": self.error_function,
+                "error": errors[position]
+            }
+            for rank, position in enumerate(ranking, start=1)
+        ])
+        if self.leaderboard_path:
+            directory = os.path.dirname(self.leaderboard_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.leaderboard.to_csv(self.leaderboard_path, index=False)
+
+        for position in ranking[:self.keep_best]:
+            for backtest_dataset, candidate_predictions in \
+                    zip(data, predictions[position]):
+                predicted_window_indexes = \
+                    candidate_predictions.get_window_indexes()
+                rows = candidate_predictions.get_rows(
+                    predicted_window_indexes
+                )
+                backtest_dataset.add_predictions(
+                    candidates[position],
+                    candidate_predictions.array[rows],
+                    predicted_window_indexes,
+                    candidate_predictions.horizons[rows]
+                )
+        return data
+
+    def get_tasks(self, window_indexes, start, end, candidates):
+        """
+        Split the windows between start and end of every series, in
+        iteration order, into units of work.
+
+        Returns:
+            list: (dataset_position, window_indexes, candidates) tuples.
+        """
+        new_window_indexes = [
+            dataset_window_indexes[start:end]
+            for dataset_window_indexes in window_indexes
+        ]
+        chunk_size = self.chunk_size
+        if not chunk_size:
+            n_windows = sum(map(len, new_window_indexes))
+            chunk_size = max(1, -(-n_windows // (self.n_jobs * 4)))
+        return [
+            (
+                dataset_position,
+                dataset_window_indexes[chunk_start:chunk_start + chunk_size],
+                candidates
+            )
+            for dataset_position, dataset_window_indexes
+            in enumerate(new_window_indexes)
+            for chunk_start in range(0, len(dataset_window_indexes),
+                                     chunk_size)
+        ]
+
+    @staticmethod
+    def fit_tasks(executor, data, tasks):
+        if executor is None:
+            return [_fit_windows(data, task) for task in tasks]
+        return executor.map(_fit_windows_in_worker, tasks)
+
+    def score(self, candidate_predictions, window_indexes, actuals, budget):
+        """
+        Average the error of a candidate over the first budget windows of
+        every series, then over series. NaN if the candidate failed to fit
+        any of the windows.
+        """
+        function = self.AVAILABLE_ERROR_FUNCTIONS[self.error_function]
+        series_errors = []
+        with np.errstate(divide="ignore", invalid="ignore"), \
+                warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            for dataset_predictions, dataset_window_indexes, dataset_actuals \
+                    in zip(candidate_predictions, window_indexes, actuals):
+                if budget == 0 or len(dataset_window_indexes) == 0:
+                    continue
+                scored_window_indexes = dataset_window_indexes[:budget]
+                prediction = dataset_predictions.array[
+                    dataset_predictions.get_rows(scored_window_indexes)
+                ]
+                if np.isnan(prediction[:, 0]).any():
+                    return np.nan
+                actual = dataset_actuals[:len(scored_window_indexes)]
+                horizon = min(prediction.shape[1], actual.shape[1])
+                series_errors.append(function(
+                    prediction[:, :horizon],
+                    actual[:, :horizon],
+                    axis=None
+                ))
+            if not series_errors:
+                return np.nan
+            return float(np.mean(series_errors))
+
+
+class ARIMASearch(ModelSearch):
+    """
+    Searches ARIMA orders and options, e.g. a param_grid of
+    {"auto_regressive": [0, 1, 2], "moving_average": [0, 1]}.
+    """
+
+    MODEL_CLASS = ARIMA
+
+
+def get_actuals(backtest_dataset: TimeseriesBacktestDataset, window_indexes):
+    """
+    Get the actual values of the test windows of a dataset.
+
+    Returns:
+        np.ndarray: One row per window and one column per step up to
+        max_test_window_length, NaN past the end of each test window.
+    """
+    index_table = backtest_dataset.windows.get_index_table(window_indexes)
+    test_start_index = index_table[:, 2]
+    test_length = index_table[:, 3] - test_start_index + 1
+    horizon_steps = np.arange(backtest_dataset.windows.max_test_window_length)
+    in_test_window = horizon_steps < test_length[:, np.newaxis]
+    position = np.where(
+        in_test_window,
+        test_start_index[:, np.newaxis] + horizon_steps,
+        0
+    )
+    y_data = backtest_dataset.time_series_dataset.y_data
+    return np.where(in_test_window, y_data[position], np.nan)
+
+
+def _rank_error(error):
+    return np.inf if np.isnan(error) else error
+
+
+_worker_data = None
+
+
+def _set_worker_data(data):
+    global _worker_data
+    _worker_data = data
+
+
+def _fit_windows_in_worker(task):
+    return _fit_windows(_worker_data, task)
+
+
+def _fit_windows(data, task):
+    """
+    Fit every candidate of a task on each of its windows in turn, so the
+    training slice of a window is taken once for all candidates.
+
+    Returns:
+        tuple: The dataset position and a list of (candidate_position,
+        window_index, prediction) tuples.
+    """
+    dataset_position, window_indexes, candidates = task
+    backtest_dataset = data[dataset_position]
+    for _, candidate in candidates:
+        candidate.reset()
+    window_predictions = []
+    for window_index in window_indexes:
+        window = backtest_dataset.get_window(window_index)
+        y_train = window.get_data("y", "train")
+        regressors_train = window.get_data("regressors", "train")
+        regressors_test = window.get_data("regressors", "test")
+        for candidate_position, candidate in candidates:
+            try:
+                candidate.fit(y_train, regressors_train)
+                prediction = candidate.predict(
+                    window.test_window_length,
+                    regressors_test
+                )
+            except (ValueError, np.linalg.LinAlgError):
+                candidate.reset()
+                prediction = np.full(window.test_window_length, np.nan)
+            window_predictions.append(
+                (candidate_position, int(window_index), prediction)
+            )
+    return dataset_position, window_predictions
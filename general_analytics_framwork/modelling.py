@@ -1,23 +1,289 @@
 from abc import abstractmethod, ABC
-from typing import List, Optional, Dict, Union
-from statsmodels.tsa.statespace.sarimax import SARIMAX
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, List, Optional
+import inspect
+import os
+import numpy as np
 from general_analytics_framwork.base_processes import AbstractComponent
-from general_analytics_framwork.datasets import TimeseriesBacktestDataset
+from general_analytics_framwork.caching import ForecastCache
+from general_analytics_framwork.datasets import (
+    BacktestWindow,
+    TimeseriesBacktestDataset
+)
+
+if TYPE_CHECKING:
+    from statsmodels.tsa.statespace.sarimax import SARIMAXResults
+
+
+class BacktestRunner:
+    """
+    Runs a TimeSeriesModel over every window of a list of backtest datasets.
+
+    Models that support batching compute every window of every series in one
+    fit_predict_batch call. For the rest, with n_jobs=1 all work is done in
+    the calling process. Otherwise the fit_predict calls are fanned out to a
+    process pool, chunked either by whole series (chunk_by="series") or by
+    runs of windows within each series (chunk_by="window"). Models that carry
+    state between the windows of a series are always chunked by whole series,
+    as each chunk starts from a reset model. Predictions from the workers are
+    merged back into each dataset's predictions in window order, so the
+    result does not depend on n_jobs or chunk_size. The pool is started per
+    run, unless runs are made inside pool(), which shares one between them.
+    """
+
+    AVAILABLE_CHUNKING_STRATEGIES = ("series", "window")
+
+    def __init__(
+            self,
+            n_jobs: int = 1,
+            chunk_by: str = "series",
+            chunk_size: Optional[int] = None,
+            cache: Optional[ForecastCache] = None
+    ):
+        """
+        Initialize the BacktestRunner.
+
+        Parameters:
+            n_jobs (int, optional): Number of worker processes. 1 runs in the
+                calling process and -1 uses every available CPU.
+            chunk_by (str, optional): Either 'series' or 'window'. Ignored
+                for models that carry state between windows.
+            chunk_size (int, optional): Number of series or windows sent to a
+                worker per task. Defaults to an even split over 4 tasks per
+                worker.
+            cache (ForecastCache, optional): Cache of window forecasts checked
+                before each fit_predict of a cacheable model.
+        """
+        if chunk_by not in self.AVAILABLE_CHUNKING_STRATEGIES:
+            raise ValueError(
+                f"chunk_by must be one of "
+                f"{self.AVAILABLE_CHUNKING_STRATEGIES}, got '{chunk_by}'"
+            )
+        if n_jobs == -1:
+            n_jobs = os.cpu_count() or 1
+        assert n_jobs >= 1, "n_jobs must be a positive integer or -1"
+        self.n_jobs = n_jobs
+        self.chunk_by = chunk_by
+        self.chunk_size = chunk_size
+        self.cache = cache
+        self._executor = None
+
+    def __getstate__(self):
+        # the pool stays with the process that opened it
+        state = self.__dict__.copy()
+        state["_executor"] = None
+        return state
+
+    @contextmanager
+    def pool(self):
+        """
+        Keep one process pool open for every parallel run inside the block,
+        rather than starting one per run. Reentrant.
+
+        Yields:
+            Optional[ProcessPoolExecutor]: The pool, or None if n_jobs is 1.
+        """
+        if self.n_jobs == 1 or self._executor is not None:
+            yield self._executor
+            return
+        with ProcessPoolExecutor(max_workers=self.n_jobs) as executor:
+            self._executor = executor
+            try:
+                yield executor
+            finally:
+                self._executor = None
+
+    def run(self, model, data):
+        data = list(data)
+        if model.supports_batch:
+            model.fit_predict_batch(data)
+        elif self.n_jobs == 1:
+            for backtest_dataset in data:
+                model.reset()
+                for window in backtest_dataset:
+                    self.fit_predict(model, window)
+        else:
+            self.run_parallel(model, data)
+        return data
+
+    def fit_predict(self, model, window):
+        """
+        Call model.fit_predict for a window, going through the cache when
+        one is configured and the model is cacheable.
+        """
+        if self.cache is None or not model.cacheable:
+            return model.fit_predict(window)
+        key = self.cache.get_key(model, window)
+        prediction = self.cache.get(key)
+        if prediction is None:
+            model.fit_predict(window)
+            prediction = window.dataset.predictions[
+                model.get_reference()
+            ][window.index]["prediction"]
+            self.cache.put(key, prediction)
+        else:
+            window.add_prediction(model, prediction)
+        return window
+
+    def run_parallel(self, model, data):
+        tasks = self.get_tasks(data, model)
+        chunks = self.chunk(tasks)
+        with self.pool() as executor:
+            chunk_results = executor.map(
+                _fit_predict_chunk,
+                [self] * len(chunks),
+                [model] * len(chunks),
+                chunks
+            )
+            results = {}
+            for chunk_result in chunk_results:
+                for dataset_position, window_predictions in chunk_result:
+                    results.setdefault(dataset_position, {}).update(
+                        window_predictions
+                    )
+        for dataset_position in sorted(results.keys()):
+            window_predictions = results[dataset_position]
+            for window_index in sorted(window_predictions.keys()):
+                data[dataset_position].add_prediction(
+                    model,
+                    window_predictions[window_index],
+                    window_index
+                )
+
+    def get_tasks(self, data, model):
+        """
+        Split the backtest datasets into units of work.
+
+        Returns:
+            list: (dataset_position, dataset, window_indexes) tuples, one per
+            series for chunk_by='series' or a model carrying state between
+            windows, and one per window otherwise.
+        """
+        tasks = []
+        for dataset_position, backtest_dataset in enumerate(data):
+            worker_dataset = backtest_dataset.without_predictions()
+            window_indexes = backtest_dataset.get_window_indexes()
+            if self.chunk_by == "series" or model.carries_state:
+                tasks.append((dataset_position, worker_dataset, window_indexes))
+            else:
+                tasks.extend(
+                    (dataset_position, worker_dataset, [window_index])
+                    for window_index in window_indexes
+                )
+        return tasks
+
+    def chunk(self, tasks):
+        chunk_size = self.chunk_size
+        if not chunk_size:
+            chunk_size = max(1, -(-len(tasks) // (self.n_jobs * 4)))
+        chunks = []
+        for start in range(0, len(tasks), chunk_size):
+            chunk = {}
+            for dataset_position, dataset, window_indexes in \
+                    tasks[start: start + chunk_size]:
+                if dataset_position not in chunk:
+                    chunk[dataset_position] = (dataset, [])
+                chunk[dataset_position][1].extend(window_indexes)
+            chunks.append([
+                (dataset_position, dataset, window_indexes)
+                for dataset_position, (dataset, window_indexes)
+                in chunk.items()
+            ])
+        return chunks
+
+
+def _fit_predict_chunk(runner, model, chunk):
+    """
+    Fit and predict a chunk of windows in a worker process.
+
+    Returns:
+        list: (dataset_position, {window_index: prediction}) tuples.
+    """
+    output = []
+    for dataset_position, backtest_dataset, window_indexes in chunk:
+        model.reset()
+        for window_index in window_indexes:
+            runner.fit_predict(
+                model,
+                backtest_dataset.get_window(window_index)
+            )
+        window_predictions = {
+            window_index: window_prediction_data["prediction"]
+            for window_index, window_prediction_data in
+            backtest_dataset.predictions[model.get_reference()].items()
+        }
+        output.append((dataset_position, window_predictions))
+    return output
 
 
 class TimeSeriesModel(AbstractComponent):
 
-    def run(self, data):
+    # set by BatchTimeSeriesModel, which implements fit_predict_batch
+    supports_batch: bool = False
+    _accepts_regressors: bool = False
+
+    def run(self, data, runner: Optional[BacktestRunner] = None):
+        """
+        Backtest the model on every window of the data.
+
+        Parameters:
+            data (List[TimeseriesBacktestDataset]): The backtest datasets.
+            runner (BacktestRunner, optional): The runner to backtest with,
+                defaults to a serial runner.
+        """
+        return (runner or BacktestRunner()).run(self, data)
+
+    def stream(self, data=None):
         for backtest_dataset in data:
-            for window in backtest_dataset:
-                self.fit_predict(window)
-        return data
+            yield from self.run([backtest_dataset])
 
-    def fit_predict(self, data: TimeseriesBacktestDataset):
-        self.fit(data.get_data("y", "train"), data.get_data("regressors", "train"))
-        prediction = self.predict(data.window.test_window_length)
-        data.add_prediction(self, prediction)
-        return data
+    @property
+    def cacheable(self) -> bool:
+        """
+        Whether a window's forecast depends only on the model's parameters
+        and the window's data, so it can be stored in a ForecastCache.
+        """
+        return True
+
+    @property
+    def carries_state(self) -> bool:
+        """
+        Whether a window's forecast depends on the earlier windows of its
+        series, so the windows of a series have to be run in order by one
+        model.
+        """
+        return False
+
+    def get_params(self) -> dict:
+        """
+        Get the hyperparameters of the model, by default the attributes
+        named after the arguments of __init__.
+
+        Returns:
+            dict: Hyperparameter names and values.
+        """
+        parameter_names = inspect.signature(type(self).__init__).parameters
+        return {
+            name: getattr(self, name)
+            for name in parameter_names
+            if name != "self" and hasattr(self, name)
+        }
+
+    def reset(self) -> None:
+        """
+        Clear any state carried between the windows of a series. Called
+        before the first window of every backtest dataset.
+        """
+
+    def fit_predict(self, window: BacktestWindow):
+        self.fit(window.get_data("y", "train"), window.get_data("regressors", "train"))
+        regressors_test = None
+        if self._accepts_regressors:
+            regressors_test = window.get_data("regressors", "test")
+        prediction = self.predict(window.test_window_length, regressors_test)
+        window.add_prediction(self, prediction)
+        return window
 
     @abstractmethod
     def get_reference(self) -> str:
@@ -33,26 +299,32 @@ class TimeSeriesModel(AbstractComponent):
     @abstractmethod
     def fit(
             self,
-            y_train: List[float],
-            regressors_train: Optional[Dict[str, List[Union[float, int]]]]
+            y_train: np.ndarray,
+            regressors_train: Optional[np.ndarray]
     ) -> None:
         """
         Fit the model to the training data.
 
         Parameters:
-            y_train (List[float]): The target values for training.
-            regressors_train: Optional[Dict[str, List[Union[float, int]]]]:
-                The regressor data
+            y_train (np.ndarray): The target values for training.
+            regressors_train (Optional[np.ndarray]): The regressor data, one
+                column per regressor.
         """
         raise NotImplementedError
 
     @abstractmethod
-    def predict(self, horizon: int) -> List[float]:
+    def predict(
+            self,
+            horizon: int,
+            regressors_test: Optional[np.ndarray] = None
+    ) -> List[float]:
         """
         Make predictions for the given horizon.
 
         Parameters:
             horizon (int): The number of time steps to predict.
+            regressors_test (Optional[np.ndarray]): The regressor data of
+                the forecast period.
 
         Returns:
             List[float]: The predicted values.
@@ -60,7 +332,126 @@ class TimeSeriesModel(AbstractComponent):
         raise NotImplementedError
 
 
-class RandomWalk(TimeSeriesModel):
+class BatchTimeSeriesModel(TimeSeriesModel):
+    """
+    Base class for models whose forecasts for all windows of all series can
+    be computed together with array operations.
+
+    The target values of every series are concatenated into one array and
+    each window is described by its train start and end positions in that
+    array, so subclasses implement forecast_batch once for the whole
+    backtest instead of fit and predict per window.
+    """
+
+    supports_batch: bool = True
+
+    def fit_predict_batch(
+            self,
+            data: List[TimeseriesBacktestDataset]
+    ) -> List[TimeseriesBacktestDataset]:
+        """
+        Fit and predict every window of every backtest dataset in one call.
+        Used by the BacktestRunner in place of fit_predict per window.
+
+        Parameters:
+            data (List[TimeseriesBacktestDataset]): The backtest datasets.
+
+        Returns:
+            List[TimeseriesBacktestDataset]: The datasets with predictions
+            added.
+        """
+        data = list(data)
+        y, window_table = self.stack_windows(data)
+        if len(window_table) == 0:
+            return data
+        horizons = window_table[:, 5] - window_table[:, 4] + 1
+        forecasts = self.forecast_batch(
+            y,
+            window_table[:, 2],
+            window_table[:, 3],
+            int(horizons.max())
+        )
+        # the windows are grouped by dataset, in dataset order
+        boundaries = np.searchsorted(
+            window_table[:, 0],
+            np.arange(len(data) + 1)
+        )
+        for dataset_position, backtest_dataset in enumerate(data):
+            rows = slice(
+                boundaries[dataset_position],
+                boundaries[dataset_position + 1]
+            )
+            backtest_dataset.add_predictions(
+                self,
+                forecasts[rows],
+                window_table[rows, 1],
+                horizons[rows]
+            )
+        return data
+
+    @staticmethod
+    def stack_windows(data):
+        """
+        Concatenate the target values of the datasets and index their windows.
+
+        Parameters:
+            data (List[TimeseriesBacktestDataset]): The backtest datasets.
+
+        Returns:
+            tuple: The concatenated target values and an integer array with
+            one row per window and columns dataset_position, window_index,
+            train_start, train_end, test_start and test_end, where the
+            positions index the concatenated array.
+        """
+        y_data = []
+        window_tables = []
+        offset = 0
+        for dataset_position, backtest_dataset in enumerate(data):
+            window_indexes = np.asarray(
+                backtest_dataset.get_window_indexes(),
+                dtype=np.int64
+            )
+            index_table = backtest_dataset.windows.get_index_table(
+                window_indexes
+            )
+            window_tables.append(np.column_stack([
+                np.full(len(window_indexes), dataset_position),
+                window_indexes,
+                index_table + offset
+            ]))
+            y_data.append(backtest_dataset.time_series_dataset.y_data)
+            offset += len(backtest_dataset.time_series_dataset.y_data)
+        if not y_data:
+            return np.empty(0), np.empty((0, 6), dtype=np.int64)
+        return np.concatenate(y_data), np.concatenate(window_tables)
+
+    @abstractmethod
+    def forecast_batch(
+            self,
+            y: np.ndarray,
+            train_start_index: np.ndarray,
+            train_end_index: np.ndarray,
+            horizon: int
+    ) -> np.ndarray:
+        """
+        Forecast every window at once.
+
+        Parameters:
+            y (np.ndarray): Concatenated target values of all series.
+            train_start_index (np.ndarray): Position in y of the first
+                training observation of each window.
+            train_end_index (np.ndarray): Position in y of the last training
+                observation of each window.
+            horizon (int): The number of time steps to predict.
+
+        Returns:
+            np.ndarray: Forecasts with one row per window and one column per
+            step of the horizon.
+        """
+        raise NotImplementedError
+
+
+class RandomWalk(BatchTimeSeriesModel):
     """
     RandomWalk class representing the Random Walk model.
 
@@ -78,30 +469,47 @@ class RandomWalk(TimeSeriesModel):
 
     def fit(
         self,
-        y_train: List[float],
-        regressors_train: Optional[Dict[str, List[Union[float, int]]]] = None
+        y_train: np.ndarray,
+        regressors_train: Optional[np.ndarray] = None
     ) -> None:
         """
         Fit the Random Walk model.
 
         Parameters:
-            y_train (List[float]): The target values for training.
-            regressors_train (Optional[Dict[str, List[Union[float, int]]]]):
-            The regressor data.
+            y_train (np.ndarray): The target values for training.
+            regressors_train (Optional[np.ndarray]): The regressor data.
         """
         self.last_observation_seen = y_train[-1]
 
-    def predict(self, horizon: int) -> List[float]:
+    def predict(
+        self,
+        horizon: int,
+        regressors_test: Optional[np.ndarray] = None
+    ) -> np.ndarray:
         """
         Make predictions using the Random Walk model.
 
         Parameters:
             horizon (int): The number of time steps to predict.
+            regressors_test (Optional[np.ndarray]): The regressor data of
+                the forecast period.
 
         Returns:
-            List[float]: The predicted values.
+            np.ndarray: The predicted values.
+        """
+        return np.full(horizon, self.last_observation_seen, dtype=np.float64)
+
+    def forecast_batch(
+            self,
+            y: np.ndarray,
+            train_start_index: np.ndarray,
+            train_end_index: np.ndarray,
+            horizon: int
+    ) -> np.ndarray:
+        """
+        Repeat the last training observation of every window.
         """
-        return [self.last_observation_seen for _ in range(horizon)]
+        return np.repeat(y[train_end_index][:, np.newaxis], horizon, axis=1)
 
     def get_reference(self) -> str:
         """
@@ -113,20 +521,621 @@ class RandomWalk(TimeSeriesModel):
         return "RandomWalk"
 
 
+class SeasonalNaive(BatchTimeSeriesModel):
+    """
+    SeasonalNaive class representing the seasonal naive model, which repeats
+    the last observed season.
+
+    Parameters:
+        season_length (int): The number of time steps in a season.
+
+    Attributes:
+        last_season_seen (Optional[np.ndarray]): The last season observed.
+    """
+
+    def __init__(self, season_length: int = 12):
+        """
+        Initialize the Seasonal Naive model.
+
+        Parameters:
+            season_length (int, optional): The number of time steps in a
+                season.
+        """
+        assert season_length >= 1, "season_length must be a positive integer"
+        self.season_length = season_length
+        self.last_season_seen: Optional[np.ndarray] = None
+        self._accepts_regressors: bool = False
+
+    def fit(
+        self,
+        y_train: np.ndarray,
+        regressors_train: Optional[np.ndarray] = None
+    ) -> None:
+        """
+        Fit the Seasonal Naive model.
+
+        Parameters:
+            y_train (np.ndarray): The target values for training.
+            regressors_train (Optional[np.ndarray]): The regressor data.
+        """
+        assert len(y_train) >= self.season_length, \
+            "training window is shorter than season_length"
+        self.last_season_seen = y_train[-self.season_length:]
+
+    def predict(
+        self,
+        horizon: int,
+        regressors_test: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Make predictions using the Seasonal Naive model.
+
+        Parameters:
+            horizon (int): The number of time steps to predict.
+            regressors_test (Optional[np.ndarray]): The regressor data of
+                the forecast period.
+
+        Returns:
+            np.ndarray: The predicted values.
+        """
+        return self.last_season_seen[np.arange(horizon) % self.season_length]
+
+    def forecast_batch(
+            self,
+            y: np.ndarray,
+            train_start_index: np.ndarray,
+            train_end_index: np.ndarray,
+            horizon: int
+    ) -> np.ndarray:
+        """
+        Repeat the last training season of every window.
+        """
+        assert np.all(
+            train_end_index - train_start_index + 1 >= self.season_length
+        ), "training window is shorter than season_length"
+        season_position = np.arange(horizon) % self.season_length
+        source_index = train_end_index[:, np.newaxis] - \
+            self.season_length + 1 + season_position[np.newaxis, :]
+        return y[source_index]
+
+    def get_reference(self) -> str:
+        """
+        Get a reference string for the Seasonal Naive model.
+
+        Returns:
+            str: The reference string.
+        """
+        return f"SeasonalNaive (m: {self.season_length})"
+
+
+class Drift(BatchTimeSeriesModel):
+    """
+    Drift class representing the random walk with drift model, which
+    extrapolates the line between the first and last training observations.
+
+    Attributes:
+        last_observation_seen (Optional[float]): The last observation seen.
+        slope (Optional[float]): The average change per time step.
+    """
+
+    def __init__(self):
+        """
+        Initialize the Drift model.
+        """
+        self.last_observation_seen: Optional[float] = None
+        self.slope: Optional[float] = None
+        self._accepts_regressors: bool = False
+
+    def fit(
+        self,
+        y_train: np.ndarray,
+        regressors_train: Optional[np.ndarray] = None
+    ) -> None:
+        """
+        Fit the Drift model.
+
+        Parameters:
+            y_train (np.ndarray): The target values for training.
+            regressors_train (Optional[np.ndarray]): The regressor data.
+        """
+        self.last_observation_seen = y_train[-1]
+        if len(y_train) > 1:
+            self.slope = (y_train[-1] - y_train[0]) / (len(y_train) - 1)
+        else:
+            self.slope = 0.0
+
+    def predict(
+        self,
+        horizon: int,
+        regressors_test: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Make predictions using the Drift model.
+
+        Parameters:
+            horizon (int): The number of time steps to predict.
+            regressors_test (Optional[np.ndarray]): The regressor data of
+                the forecast period.
+
+        Returns:
+            np.ndarray: The predicted values.
+        """
+        return self.last_observation_seen + \
+            self.slope * np.arange(1, horizon + 1)
+
+    def forecast_batch(
+            self,
+            y: np.ndarray,
+            train_start_index: np.ndarray,
+            train_end_index: np.ndarray,
+            horizon: int
+    ) -> np.ndarray:
+        """
+        Extrapolate the drift of every window.
+        """
+        n_steps = np.maximum(train_end_index - train_start_index, 1)
+        slope = (y[train_end_index] - y[train_start_index]) / n_steps
+        steps = np.arange(1, horizon + 1)
+        return y[train_end_index][:, np.newaxis] + \
+            slope[:, np.newaxis] * steps[np.newaxis, :]
+
+    def get_reference(self) -> str:
+        """
+        Get a reference string for the Drift model.
+
+        Returns:
+            str: The reference string.
+        """
+        return "Drift"
+
+
+class SimpleExponentialSmoothing(BatchTimeSeriesModel):
+    """
+    SimpleExponentialSmoothing class representing simple exponential
+    smoothing with a fixed smoothing parameter, which forecasts the last
+    smoothed level.
+
+    The level starts at the first training observation and is updated
+    recursively, level = alpha * y + (1 - alpha) * level, for all windows
+    at once.
+
+    Parameters:
+        alpha (float): The smoothing parameter of the level.
+
+    Attributes:
+        level (Optional[float]): The level at the end of the training window.
+    """
+
+    def __init__(self, alpha: float = 0.3):
+        """
+        Initialize the Simple Exponential Smoothing model.
+
+        Parameters:
+            alpha (float, optional): The smoothing parameter of the level,
+                between 0 and 1.
+        """
+        assert 0 < alpha <= 1, "alpha must be in (0, 1]"
+        self.alpha = alpha
+        self.level: Optional[float] = None
+        self._accepts_regressors: bool = False
+
+    def fit(
+        self,
+        y_train: np.ndarray,
+        regressors_train: Optional[np.ndarray] = None
+    ) -> None:
+        """
+        Fit the Simple Exponential Smoothing model.
+
+        Parameters:
+            y_train (np.ndarray): The target values for training.
+            regressors_train (Optional[np.ndarray]): The regressor data.
+        """
+        self.level = self.smooth(
+            np.asarray(y_train, dtype=np.float64),
+            np.array([0]),
+            np.array([len(y_train) - 1])
+        )[0]
+
+    def predict(
+        self,
+        horizon: int,
+        regressors_test: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Make predictions using the Simple Exponential Smoothing model.
+
+        Parameters:
+            horizon (int): The number of time steps to predict.
+            regressors_test (Optional[np.ndarray]): The regressor data of
+                the forecast period.
+
+        Returns:
+            np.ndarray: The predicted values.
+        """
+        return np.full(horizon, self.level, dtype=np.float64)
+
+    def smooth(self, y, train_start_index, train_end_index):
+        """
+        Get the smoothed level at the end of every window.
+        """
+        lengths = train_end_index - train_start_index + 1
+        level = y[train_start_index]
+        for step in range(1, int(lengths.max())):
+            active = step < lengths
+            observation = y[np.where(
+                active,
+                train_start_index + step,
+                train_start_index
+            )]
+            level = np.where(
+                active,
+                self.alpha * observation + (1 - self.alpha) * level,
+                level
+            )
+        return level
+
+    def forecast_batch(
+            self,
+            y: np.ndarray,
+            train_start_index: np.ndarray,
+            train_end_index: np.ndarray,
+            horizon: int
+    ) -> np.ndarray:
+        """
+        Repeat the smoothed level of every window.
+        """
+        level = self.smooth(y, train_start_index, train_end_index)
+        return np.repeat(level[:, np.newaxis], horizon, axis=1)
+
+    def get_reference(self) -> str:
+        """
+        Get a reference string for the Simple Exponential Smoothing model.
+
+        Returns:
+            str: The reference string.
+        """
+        return f"SimpleExponentialSmoothing (alpha: {self.alpha})"
+
+
+class HoltLinearTrend(BatchTimeSeriesModel):
+    """
+    HoltLinearTrend class representing Holt's linear trend method with fixed
+    smoothing parameters, which extrapolates the last smoothed level and
+    trend.
+
+    The initial level and trend are the first training observation and the
+    first difference, and both are updated recursively with every training
+    observation, for all windows at once.
+
+    Parameters:
+        alpha (float): The smoothing parameter of the level.
+        beta (float): The smoothing parameter of the trend.
+
+    Attributes:
+        level (Optional[float]): The level at the end of the training window.
+        trend (Optional[float]): The trend at the end of the training window.
+    """
+
+    def __init__(self, alpha: float = 0.3, beta: float = 0.1):
+        """
+        Initialize the Holt Linear Trend model.
+
+        Parameters:
+            alpha (float, optional): The smoothing parameter of the level,
+                between 0 and 1.
+            beta (float, optional): The smoothing parameter of the trend,
+                between 0 and 1.
+        """
+        assert 0 < alpha <= 1, "alpha must be in (0, 1]"
+        assert 0 <= beta <= 1, "beta must be in [0, 1]"
+        self.alpha = alpha
+        self.beta = beta
+        self.level: Optional[float] = None
+        self.trend: Optional[float] = None
+        self._accepts_regressors: bool = False
+
+    def fit(
+        self,
+        y_train: np.ndarray,
+        regressors_train: Optional[np.ndarray] = None
+    ) -> None:
+        """
+        Fit the Holt Linear Trend model.
+
+        Parameters:
+            y_train (np.ndarray): The target values for training.
+            regressors_train (Optional[np.ndarray]): The regressor data.
+        """
+        level, trend = self.smooth(
+            np.asarray(y_train, dtype=np.float64),
+            np.array([0]),
+            np.array([len(y_train) - 1])
+        )
+        self.level = level[0]
+        self.trend = trend[0]
+
+    def predict(
+        self,
+        horizon: int,
+        regressors_test: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Make predictions using the Holt Linear Trend model.
+
+        Parameters:
+            horizon (int): The number of time steps to predict.
+            regressors_test (Optional[np.ndarray]): The regressor data of
+                the forecast period.
+
+        Returns:
+            np.ndarray: The predicted values.
+        """
+        return self.level + self.trend * np.arange(1, horizon + 1)
+
+    def smooth(self, y, train_start_index, train_end_index):
+        """
+        Get the smoothed level and trend at the end of every window.
+        """
+        lengths = train_end_index - train_start_index + 1
+        level = y[train_start_index]
+        trend = np.where(
+            lengths > 1,
+            y[np.minimum(train_start_index + 1, train_end_index)] - level,
+            0.0
+        )
+        for step in range(int(lengths.max())):
+            active = step < lengths
+            observation = y[np.where(
+                active,
+                train_start_index + step,
+                train_start_index
+            )]
+            new_level = self.alpha * observation + \
+                (1 - self.alpha) * (level + trend)
+            new_trend = self.beta * (new_level - level) + \
+                (1 - self.beta) * trend
+            level = np.where(active, new_level, level)
+            trend = np.where(active, new_trend, trend)
+        return level, trend
+
+    def forecast_batch(
+            self,
+            y: np.ndarray,
+            train_start_index: np.ndarray,
+            train_end_index: np.ndarray,
+            horizon: int
+    ) -> np.ndarray:
+        """
+        Extrapolate the smoothed level and trend of every window.
+        """
+        level, trend = self.smooth(y, train_start_index, train_end_index)
+        steps = np.arange(1, horizon + 1)
+        return level[:, np.newaxis] + \
+            trend[:, np.newaxis] * steps[np.newaxis, :]
+
+    def get_reference(self) -> str:
+        """
+        Get a reference string for the Holt Linear Trend model.
+
+        Returns:
+            str: The reference string.
+        """
+        return f"HoltLinearTrend (alpha: {self.alpha}, beta: {self.beta})"
+
+
+class AutoRegressive(BatchTimeSeriesModel):
+    """
+    AutoRegressive class representing a linear AR(p) model fitted by
+    ordinary least squares, forecasting recursively.
+
+    The normal equations of every training window are differences of
+    cumulative sums of the products of the lags and target of each
+    observation, so all windows are fitted together in memory linear in the
+    length of the series, however long or overlapping the windows are.
+
+    Parameters:
+        order (int): The number of lags, p.
+        include_constant (bool): Whether to fit an intercept.
+
+    Attributes:
+        coefficients (Optional[np.ndarray]): The intercept, if fitted,
+            followed by the coefficients of lags 1 to p.
+        last_observations (Optional[np.ndarray]): The last p training
+            observations, most recent first.
+    """
+
+    def __init__(self, order: int = 1, include_constant: bool = True):
+        """
+        Initialize the AutoRegressive model.
+
+        Parameters:
+            order (int, optional): The number of lags, p.
+            include_constant (bool, optional): Whether to fit an intercept.
+        """
+        assert order >= 1, "order must be a positive integer"
+        self.order = order
+        self.include_constant = include_constant
+        self.coefficients: Optional[np.ndarray] = None
+        self.last_observations: Optional[np.ndarray] = None
+        self._accepts_regressors: bool = False
+
+    def fit(
+        self,
+        y_train: np.ndarray,
+        regressors_train: Optional[np.ndarray] = None
+    ) -> None:
+        """
+        Fit the AutoRegressive model.
+
+        Parameters:
+            y_train (np.ndarray): The target values for training.
+            regressors_train (Optional[np.ndarray]): The regressor data.
+        """
+        y_train = np.asarray(y_train, dtype=np.float64)
+        self.coefficients = self.fit_coefficients(
+            y_train,
+            np.array([0]),
+            np.array([len(y_train) - 1])
+        )[0]
+        self.last_observations = y_train[::-1][:self.order]
+
+    def predict(
+        self,
+        horizon: int,
+        regressors_test: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Make predictions using the AutoRegressive model.
+
+        Parameters:
+            horizon (int): The number of time steps to predict.
+            regressors_test (Optional[np.ndarray]): The regressor data of
+                the forecast period.
+
+        Returns:
+            np.ndarray: The predicted values.
+        """
+        return self.forecast_recursive(
+            self.coefficients[np.newaxis, :],
+            self.last_observations[np.newaxis, :],
+            horizon
+        )[0]
+
+    def fit_coefficients(self, y, train_start_index, train_end_index):
+        """
+        Fit the coefficients of every window by least squares.
+
+        Returns:
+            np.ndarray: One row per window of the intercept, if fitted,
+            followed by the coefficients of lags 1 to p.
+        """
+        n_coefficients = self.order + int(self.include_constant)
+        n_rows = train_end_index - train_start_index + 1 - self.order
+        assert np.all(n_rows >= n_coefficients), \
+            "training window is too short to fit the AR order"
+        # row j holds y[j], ..., y[j + p]: the lags and target of y[j + p]
+        lagged = np.lib.stride_tricks.sliding_window_view(y, self.order + 1)
+        columns = [lagged[:, self.order - 1::-1], lagged[:, self.order:]]
+        if self.include_constant:
+            columns.insert(0, np.ones((len(lagged), 1)))
+        # the intercept, if fitted, lags 1 to p and the target of each row
+        rows = np.concatenate(columns, axis=1)
+        products = np.zeros((len(rows) + 1, n_coefficients + 1,
+                             n_coefficients + 1))
+        np.cumsum(
+            rows[:, :, np.newaxis] * rows[:, np.newaxis, :],
+            axis=0,
+            out=products[1:]
+        )
+        # window i sums the n_rows[i] rows from row train_start_index[i]
+        products = products[train_start_index + n_rows] - \
+            products[train_start_index]
+        gram = products[:, :n_coefficients, :n_coefficients]
+        moment = products[:, :n_coefficients, n_coefficients:]
+        try:
+            coefficients = np.linalg.solve(gram, moment)[:, :, 0]
+        except np.linalg.LinAlgError:
+            # e.g. constant training windows
+            coefficients = (np.linalg.pinv(gram) @ moment)[:, :, 0]
+        return coefficients
+
+    def forecast_recursive(self, coefficients, last_observations, horizon):
+        """
+        Forecast every window recursively, feeding back each prediction as
+        the first lag of the next step.
+
+        Parameters:
+            coefficients (np.ndarray): One row of coefficients per window.
+            last_observations (np.ndarray): One row per window of the last p
+                observations, most recent first.
+            horizon (int): The number of time steps to predict.
+        """
+        if self.include_constant:
+            intercept = coefficients[:, 0]
+            lag_coefficients = coefficients[:, 1:]
+        else:
+            intercept = 0.0
+            lag_coefficients = coefficients
+        lags = np.array(last_observations, dtype=np.float64)
+        forecasts = np.empty((len(coefficients), horizon))
+        for step in range(horizon):
+            forecasts[:, step] = intercept + \
+                np.einsum("wi,wi->w", lag_coefficients, lags)
+            lags = np.concatenate(
+                [forecasts[:, step:step + 1], lags[:, :-1]],
+                axis=1
+            )
+        return forecasts
+
+    def forecast_batch(
+            self,
+            y: np.ndarray,
+            train_start_index: np.ndarray,
+            train_end_index: np.ndarray,
+            horizon: int
+    ) -> np.ndarray:
+        """
+        Fit and forecast every window with batched least squares.
+        """
+        coefficients = self.fit_coefficients(
+            y,
+            train_start_index,
+            train_end_index
+        )
+        last_observations = y[
+            train_end_index[:, np.newaxis] - np.arange(self.order)
+        ]
+        return self.forecast_recursive(
+            coefficients,
+            last_observations,
+            horizon
+        )
+
+    def get_reference(self) -> str:
+        """
+        Get a reference string for the AutoRegressive model.
+
+        Returns:
+            str: The reference string.
+        """
+        reference = f"AutoRegressive (p: {self.order}"
+        if not self.include_constant:
+            reference += ", no constant"
+        return reference + ")"
+
+
 class ARIMA(TimeSeriesModel):
     """
     ARIMA class representing the AutoRegressive Integrated Moving Average model.
 
+    By default every window is fitted from scratch. With warm_start the
+    optimizer for each window starts from the parameters fitted on the
+    previous window of the same series. With refit_every=N the parameters are
+    only re-estimated on every Nth window; in between, the last fitted
+    parameters are applied to the new training window, which only runs the
+    Kalman filter.
+
+    When the series have regressors, they are passed to SARIMAX as exog:
+    the training window's to fit and the test window's to forecast, both as
+    views of the series' regressor matrix. Set use_regressors=False to fit
+    the same orders without them.
+
     Parameters:
         auto_regressive (int, optional): The number of auto-regressive terms.
         integrated (int, optional): The order of differencing.
         moving_average (int, optional): The number of moving average terms.
         trend_type (str, optional): Type of trend component.
+        warm_start (bool, optional): Start each fit from the previous
+            window's parameters.
+        refit_every (int, optional): Re-estimate the parameters every N
+            windows and reuse them in between.
+        use_regressors (bool, optional): Use the series' regressors as exog.
 
     Attributes:
         order (tuple): Order of ARIMA model.
         trend_type (str): Type of trend component.
-        model (SARIMAX): The SARIMAX model instance.
+        model (SARIMAXResults): The fitted SARIMAX results instance.
 
     """
 
@@ -135,7 +1144,10 @@ class ARIMA(TimeSeriesModel):
             auto_regressive: int = 1,
             integrated: int = 0,
             moving_average: int = 0,
-            trend_type: Optional[str] = None):
+            trend_type: Optional[str] = None,
+            warm_start: bool = False,
+            refit_every: Optional[int] = None,
+            use_regressors: bool = True):
 
         """
         Initialize the ARIMA model.
@@ -145,47 +1157,121 @@ class ARIMA(TimeSeriesModel):
             integrated (int, optional): The order of differencing.
             moving_average (int, optional): The number of moving average terms.
             trend_type (str, optional): Type of trend component.
+            warm_start (bool, optional): Start each fit from the previous
+                window's parameters.
+            refit_every (int, optional): Re-estimate the parameters every N
+                windows and reuse them in between.
+            use_regressors (bool, optional): Use the series' regressors as
+                exog.
         """
+        assert refit_every is None or refit_every >= 1, \
+            "refit_every must be a positive integer"
         self.order = (auto_regressive, integrated, moving_average)
         self.trend_type = trend_type
-        self.model: Optional[SARIMAX] = None
-        self._accepts_regressors: bool = False
+        self.warm_start = warm_start
+        self.refit_every = refit_every
+        self.model: Optional["SARIMAXResults"] = None
+        self._windows_since_refit: int = 0
+        self._accepts_regressors: bool = use_regressors
+
+    @property
+    def cacheable(self) -> bool:
+        """
+        Warm-started and parameter-reusing fits depend on earlier windows, so
+        only full refits are cached.
+        """
+        return not self.carries_state
+
+    @property
+    def carries_state(self) -> bool:
+        return bool(self.warm_start or self.refit_every)
+
+    def get_params(self) -> dict:
+        """
+        Get the hyperparameters of the ARIMA model.
+
+        Returns:
+            dict: Hyperparameter names and values.
+        """
+        return {
+            "auto_regressive": self.order[0],
+            "integrated": self.order[1],
+            "moving_average": self.order[2],
+            "trend_type": self.trend_type,
+            "warm_start": self.warm_start,
+            "refit_every": self.refit_every,
+            "use_regressors": self._accepts_regressors
+        }
+
+    def reset(self) -> None:
+        """
+        Forget the parameters carried over from the previous window.
+        """
+        self.model = None
+        self._windows_since_refit = 0
 
     def fit(
         self,
-        y_train: List[float],
-        regressors_train: Optional[Dict[str, List[Union[float, int]]]] = None
+        y_train: np.ndarray,
+        regressors_train: Optional[np.ndarray] = None
     ) -> None:
         """
         Fit the ARIMA model.
 
         Parameters:
-            y_train (List[float]): The target values.
-            regressors_train (Dict[str, List[Union[float, int]]], optional):
-            The regressor data.
+            y_train (np.ndarray): The target values.
+            regressors_train (np.ndarray, optional): The regressor data.
 
         Returns:
             None
         """
+        if not self._accepts_regressors:
+            regressors_train = None
+        if self.refit_every and self.model is not None and \
+                self._windows_since_refit < self.refit_every:
+            self.model = self.model.apply(
+                endog=y_train,
+                exog=regressors_train,
+                refit=False
+            )
+            self._windows_since_refit += 1
+            return
+
+        # statsmodels is slow to import, so only import it when fitting
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+        start_params = None
+        if self.warm_start and self.model is not None:
+            start_params = self.model.params
         self.model = SARIMAX(
             endog=y_train,
+            exog=regressors_train,
             order=self.order,
             trend=self.trend_type,
             enforce_invertibility=False,
             enforce_stationarity=False
-        ).fit(disp=0)
+        ).fit(start_params=start_params, disp=0)
+        self._windows_since_refit = 1
 
-    def predict(self, horizon: int) -> List[float]:
+    def predict(
+        self,
+        horizon: int,
+        regressors_test: Optional[np.ndarray] = None
+    ) -> List[float]:
         """
         Make predictions using the ARIMA model.
 
         Parameters:
             horizon (int): The number of time steps to predict.
+            regressors_test (Optional[np.ndarray]): The regressor data of
+                the forecast period.
 
         Returns:
             List[float]: The predicted values.
         """
-        return self.model.forecast(horizon)
+        if not self._accepts_regressors:
+            regressors_test = None
+        return self.model.forecast(horizon, exog=regressors_test)
 
     def get_reference(self) -> str:
         """
@@ -196,6 +1282,12 @@ class ARIMA(TimeSeriesModel):
         """
         reference = f"ARIMA (AR: {self.order[0]}, " \
                     f"I: {self.order[1]}, " \
-                    f"MA: {self.order[2]})"
-        return reference
+                    f"MA: {self.order[2]}"
+        if self.warm_start:
+            reference += ", warm start"
+        if self.refit_every:
+            reference += f", refit every {self.refit_every}"
+        if not self._accepts_regressors:
+            reference += ", no regressors"
+        return reference + ")"
 
@@ -1,4 +1,8 @@
+from general_analytics_framwork.base_processes import DagNode, DagProcess
+from general_analytics_framwork.checkpointing import compute_fingerprint
 from general_analytics_framwork.config import NodeConfig, LeafConfig
+from general_analytics_framwork.instrumentation import Profiler
+from general_analytics_framwork.registry import resolve_path
 from typing import Union
 
 
@@ -22,16 +26,35 @@ class ProcessBuilder:
         else:
             raise ValueError("child 'type' must be 'node', 'composite', "
                              "or 'leaf'")
+        process.name = config.name
+        process.config_fingerprint = compute_fingerprint(
+            config.type,
+            config.name,
+            config.other_args
+        )
+        instrumentation = getattr(config, "instrumentation", None)
+        if instrumentation and instrumentation.get("enabled", True):
+            profiler_args = {
+                key: value for key, value in instrumentation.items()
+                if key != "enabled"
+            }
+            Profiler(**profiler_args).instrument(process)
         return process
 
     def build_node(self, config, available_processes):
-        process_class = available_processes[config.name]
+        process_class = self.get_process_class(config, available_processes)
         process_children = []
         for child_config in config.children:
             child = self.build(
                 child_config,
                 process_class.AVAILABLE_STRATEGIES
             )
+            if issubclass(process_class, DagProcess):
+                child = DagNode(
+                    child,
+                    inputs=child_config.inputs,
+                    output=child_config.output
+                )
             process_children.append(child)
         process = process_class(
             process_children,
@@ -39,8 +62,18 @@ class ProcessBuilder:
         )
         return process
 
-    @staticmethod
-    def build_leaf(config, available_processes):
-        process_class = available_processes[config.name]
+    def build_leaf(self, config, available_processes):
+        process_class = self.get_process_class(config, available_processes)
         process = process_class(**config.other_args)
         return process
+
+    @staticmethod
+    def get_process_class(config, available_processes):
+        """
+        Look up the class of a config: the component path a compiled plan
+        recorded for it, or else its name in available_processes.
+        """
+        component = getattr(config, "component", None)
+        if component:
+            return resolve_path(component)
+        return available_processes[config.name]
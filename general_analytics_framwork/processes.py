@@ -1,36 +1,36 @@
+from concurrent.futures import as_completed
 import pandas as pd
 from general_analytics_framwork.base_processes import (
     SequenceProcess,
-    ParallelProcess
+    ParallelProcess,
+    DagProcess,
+    iter_batches
 )
-from general_analytics_framwork.data_preparation.data_loaders import (
-    LocalDataLoader
+from general_analytics_framwork.caching import ForecastCache
+from general_analytics_framwork.checkpointing import (
+    compute_data_fingerprint,
+    compute_fingerprint
 )
-from general_analytics_framwork.data_preparation.data_converters import (
-    TimeseriesConverter,
-    TimeseriesBacktestConverter,
-    TimeseriesBacktestResultsConverter
-)
-
 from general_analytics_framwork.modelling import (
-    RandomWalk,
-    ARIMA
+    BacktestRunner,
+    TimeSeriesModel
 )
+from general_analytics_framwork.registry import LazyRegistry
 
-from general_analytics_framwork.visualisation import (
-    TimeseriesPlotter,
-    BarGraphPlotter,
-    AutocorrelationPlotter,
-    ForecastGraphPlotter,
-    ForecastBarGraphPlotter
-)
+DATA_LOADERS = "general_analytics_framwork.data_preparation.data_loaders"
+DATA_CONVERTERS = "general_analytics_framwork.data_preparation.data_converters"
+DATA_WRITERS = "general_analytics_framwork.data_preparation.data_writers"
+MODELLING = "general_analytics_framwork.modelling"
+MODEL_SEARCH = "general_analytics_framwork.model_search"
+VISUALISATION = "general_analytics_framwork.visualisation"
 
 
 class DataLoaderComposite(SequenceProcess):
 
-    AVAILABLE_STRATEGIES = {
-        "local": LocalDataLoader
-    }
+    AVAILABLE_STRATEGIES = LazyRegistry({
+        "local": f"{DATA_LOADERS}:LocalDataLoader",
+        "columnar": f"{DATA_LOADERS}:ColumnarDataLoader"
+    }, entry_point_group="general_analytics_framwork.data_loaders")
 
     def __init__(self, children, joining_columns):
         self.joining_columns = joining_columns
@@ -46,6 +46,11 @@ class DataLoaderComposite(SequenceProcess):
             output = self.aggregate_results(output, child_output)
         return output
 
+    def stream(self, data=None):
+        if len(self.children) == 1:
+            return self.children[0].stream(data)
+        return super(SequenceProcess, self).stream(data)
+
     def aggregate_results(self, output, child_output):
         if output is None:
             result = child_output
@@ -61,18 +66,20 @@ class DataLoaderComposite(SequenceProcess):
 
 class DataConverterComposite(SequenceProcess):
 
-    AVAILABLE_STRATEGIES = {
-        "time_series": TimeseriesConverter,
-        "time_series_backtest": TimeseriesBacktestConverter
-    }
+    AVAILABLE_STRATEGIES = LazyRegistry({
+        "time_series": f"{DATA_CONVERTERS}:TimeseriesConverter",
+        "time_series_backtest":
+            f"{DATA_CONVERTERS}:TimeseriesBacktestConverter",
+        "columnar_writer": f"{DATA_WRITERS}:ColumnarDataWriter"
+    }, entry_point_group="general_analytics_framwork.data_converters")
 
 
 class DataPreparationProcess(SequenceProcess):
 
-    AVAILABLE_STRATEGIES = {
+    AVAILABLE_STRATEGIES = LazyRegistry({
         "data_loader": DataLoaderComposite,
         "data_converter": DataConverterComposite
-    }
+    })
 
     def __init__(self, children):
         assert type(children[0]) == DataLoaderComposite, \
@@ -83,38 +90,174 @@ class DataPreparationProcess(SequenceProcess):
 
 
 class ModellingProcess(SequenceProcess):
-    AVAILABLE_STRATEGIES = {
-        "random_walk": RandomWalk,
-        "arima": ARIMA
-    }
+    AVAILABLE_STRATEGIES = LazyRegistry({
+        "random_walk": f"{MODELLING}:RandomWalk",
+        "seasonal_naive": f"{MODELLING}:SeasonalNaive",
+        "drift": f"{MODELLING}:Drift",
+        "simple_exponential_smoothing":
+            f"{MODELLING}:SimpleExponentialSmoothing",
+        "holt_linear_trend": f"{MODELLING}:HoltLinearTrend",
+        "auto_regressive": f"{MODELLING}:AutoRegressive",
+        "arima": f"{MODELLING}:ARIMA",
+        "arima_search": f"{MODEL_SEARCH}:ARIMASearch"
+    }, entry_point_group="general_analytics_framwork.models")
+
+    def __init__(
+            self,
+            children,
+            n_jobs=1,
+            chunk_by="series",
+            chunk_size=None,
+            cache_dir=None,
+            cache_max_size_mb=1024,
+            checkpoint_dir=None
+    ):
+        if cache_dir:
+            cache = ForecastCache(cache_dir, max_size_mb=cache_max_size_mb)
+        else:
+            cache = None
+        self.runner = BacktestRunner(
+            n_jobs=n_jobs,
+            chunk_by=chunk_by,
+            chunk_size=chunk_size,
+            cache=cache
+        )
+        super().__init__(children=children, checkpoint_dir=checkpoint_dir)
+
+    def run(self, data):
+        if self.checkpoint_store is not None:
+            return self.run_with_checkpoints(data)
+        with self.runner.pool():
+            return self.run_models(data)
+
+    def run_models(self, data, runner=None):
+        for model in self.children:
+            data = self.run_model(model, data, runner)
+        return data
+
+    def run_model(self, model, data, runner=None):
+        """
+        Backtest a model with the runner, by default the process's. Other
+        children, like model searches, backtest the data themselves.
+        """
+        if isinstance(model, TimeSeriesModel):
+            return model.run(data, runner=runner or self.runner)
+        return model.run(data)
+
+    def run_with_checkpoints(self, data=None):
+        """
+        Run the models and checkpoint each dataset's predictions as soon as
+        they are complete, so a rerun only models the datasets that were
+        not finished. With n_jobs > 1 each dataset is modelled by one worker
+        of a pool kept open for the whole run, and checkpointed as soon as
+        its worker returns it.
+        """
+        fingerprint = self.get_fingerprint()
+        dataset_fingerprints = [
+            compute_fingerprint(fingerprint, compute_data_fingerprint(dataset))
+            for dataset in data
+        ]
+        output = [None] * len(data)
+        pending_positions = []
+        for position, dataset_fingerprint in enumerate(dataset_fingerprints):
+            if dataset_fingerprint and \
+                    self.checkpoint_store.contains(dataset_fingerprint):
+                output[position] = self.checkpoint_store.get(
+                    dataset_fingerprint
+                )
+            else:
+                pending_positions.append(position)
+        with self.runner.pool() as executor:
+            if executor is None:
+                results = (
+                    (position, self.run_models([data[position]])[0])
+                    for position in pending_positions
+                )
+            else:
+                futures = {
+                    executor.submit(_run_models, self, [data[position]]):
+                        position
+                    for position in pending_positions
+                }
+                results = (
+                    (futures[future], future.result()[0])
+                    for future in as_completed(futures)
+                )
+            for position, dataset in results:
+                output[position] = dataset
+                if dataset_fingerprints[position]:
+                    self.put_checkpoint(
+                        dataset_fingerprints[position],
+                        dataset
+                    )
+        return output
+
+    def stream(self, data=None):
+        with self.runner.pool():
+            for batch in iter_batches(data, self.runner.n_jobs):
+                yield from self.run_models(batch)
+
+
+def _run_models(process, data):
+    """
+    Run the models of a ModellingProcess in a worker process, serially, as
+    the worker is already one of the process's pool.
+    """
+    return process.run_models(data, runner=BacktestRunner(
+        chunk_by=process.runner.chunk_by,
+        cache=process.runner.cache
+    ))
 
 
 class DataVisualisationProcess(ParallelProcess):
-    AVAILABLE_STRATEGIES = {
-        "time_series": TimeseriesPlotter,
-        "bar_graph": BarGraphPlotter,
-        "auto_correlation": AutocorrelationPlotter
-    }
+    AVAILABLE_STRATEGIES = LazyRegistry({
+        "time_series": f"{VISUALISATION}:TimeseriesPlotter",
+        "bar_graph": f"{VISUALISATION}:BarGraphPlotter",
+        "auto_correlation": f"{VISUALISATION}:AutocorrelationPlotter"
+    }, entry_point_group="general_analytics_framwork.plotters")
 
 
 class ForecastDataVisualisationProcess(ParallelProcess):
-    AVAILABLE_STRATEGIES = {
-        "forecast_plot": ForecastGraphPlotter,
-        "forecast_error_bar_plot": ForecastBarGraphPlotter
-    }
+    AVAILABLE_STRATEGIES = LazyRegistry({
+        "forecast_plot": f"{VISUALISATION}:ForecastGraphPlotter",
+        "forecast_error_bar_plot": f"{VISUALISATION}:ForecastBarGraphPlotter"
+    }, entry_point_group="general_analytics_framwork.forecast_plotters")
 
 
 class DataPresentationProcess(SequenceProcess):
-    AVAILABLE_STRATEGIES = {
+    AVAILABLE_STRATEGIES = LazyRegistry({
         "data_preparation": DataPreparationProcess,
         "data_visualisation": DataVisualisationProcess
-    }
+    })
 
 
 class ModelExperimentationProcess(SequenceProcess):
-    AVAILABLE_STRATEGIES = {
+    AVAILABLE_STRATEGIES = LazyRegistry({
         "data_preparation": DataPreparationProcess,
         "modelling": ModellingProcess,
-        "backtest_results_converter": TimeseriesBacktestResultsConverter,
-        "forecast_data_visualisation": ForecastDataVisualisationProcess
-    }
+        "backtest_results_converter":
+            f"{DATA_CONVERTERS}:TimeseriesBacktestResultsConverter",
+        "forecast_data_visualisation": ForecastDataVisualisationProcess,
+        "columnar_writer": f"{DATA_WRITERS}:ColumnarDataWriter"
+    })
+
+
+class AnalyticsDagProcess(DagProcess):
+    AVAILABLE_STRATEGIES = LazyRegistry({
+        "data_preparation": DataPreparationProcess,
+        "data_loader": DataLoaderComposite,
+        "data_converter": DataConverterComposite,
+        "data_visualisation": DataVisualisationProcess,
+        "modelling": ModellingProcess,
+        "backtest_results_converter":
+            f"{DATA_CONVERTERS}:TimeseriesBacktestResultsConverter",
+        "forecast_data_visualisation": ForecastDataVisualisationProcess,
+        "columnar_writer": f"{DATA_WRITERS}:ColumnarDataWriter"
+    })
+
+
+AVAILABLE_PROCESSES = LazyRegistry({
+    "data_presentation": DataPresentationProcess,
+    "model_experimentation": ModelExperimentationProcess,
+    "analytics_dag": AnalyticsDagProcess
+}, entry_point_group="general_analytics_framwork.processes")
@@ -0,0 +1,101 @@
+from collections.abc import Mapping
+from importlib import import_module
+from importlib.metadata import EntryPoint, entry_points
+
+
+class LazyRegistry(Mapping):
+    """
+    A mapping of config names to components that only imports a component
+    when it is first looked up.
+
+    Entries are either objects or 'module:attribute' paths, which are
+    imported and cached on first lookup, so building a process only imports
+    the modules its config refers to. When entry_point_group is set,
+    components of other packages registered as entry points in that group
+    are also available, under their entry point names; built in entries
+    take precedence.
+    """
+
+    def __init__(self, entries, entry_point_group=None):
+        """
+        Initialize the LazyRegistry.
+
+        Parameters:
+            entries (dict): Config names mapped to objects or to
+                'module:attribute' paths.
+            entry_point_group (str, optional): Entry point group to discover
+                third party components in.
+        """
+        self._entries = dict(entries)
+        self.entry_point_group = entry_point_group
+        self._entry_points_loaded = entry_point_group is None
+
+    def register(self, name, entry):
+        """
+        Add or replace an entry, given as an object or a path.
+        """
+        self._entries[name] = entry
+
+    def __getitem__(self, name):
+        if name not in self._entries:
+            self._load_entry_points()
+        try:
+            entry = self._entries[name]
+        except KeyError:
+            raise KeyError(
+                f"'{name}' is not registered, available names are "
+                f"{list(self._entries.keys())}"
+            ) from None
+        if isinstance(entry, str):
+            entry = resolve_path(entry)
+            self._entries[name] = entry
+        elif isinstance(entry, EntryPoint):
+            entry = entry.load()
+            self._entries[name] = entry
+        return entry
+
+    def __contains__(self, name):
+        if name not in self._entries:
+            self._load_entry_points()
+        return name in self._entries
+
+    def __iter__(self):
+        self._load_entry_points()
+        return iter(self._entries)
+
+    def __len__(self):
+        self._load_entry_points()
+        return len(self._entries)
+
+    def _load_entry_points(self):
+        if self._entry_points_loaded:
+            return
+        self._entry_points_loaded = True
+        for entry_point in get_entry_points(self.entry_point_group):
+            self._entries.setdefault(entry_point.name, entry_point)
+
+
+def get_entry_points(group):
+    """
+    Get the entry points of a group, on every supported Python version.
+    """
+    all_entry_points = entry_points()
+    if hasattr(all_entry_points, "select"):
+        return all_entry_points.select(group=group)
+    # before Python 3.10, entry_points returns a dict of groups and does
+    # not take a group argument
+    return all_entry_points.get(group, [])
+
+
+def resolve_path(path):
+    """
+    Import the object at a 'module:attribute' or 'module.attribute' path.
+    """
+    if ":" in path:
+        module_name, attribute = path.split(":", 1)
+    else:
+        module_name, attribute = path.rsplit(".", 1)
+    entry = import_module(module_name)
+    for name in attribute.split("."):
+        entry = getattr(entry, name)
+    return entry
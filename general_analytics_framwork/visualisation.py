@@ -1,8 +1,18 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import os
+import re
 from general_analytics_framwork.base_processes import (
-    AbstractComponent
+    AbstractComponent,
+    iter_batches
+)
+from general_analytics_framwork.datasets import (
+    TimeSeriesBacktestResultsDataset
 )
 import seaborn as sns
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
 import pandas as pd
 import numpy as np
 from pandas.plotting import autocorrelation_plot
@@ -10,23 +20,133 @@ from sklearn import metrics
 
 
 class DataPlotter(AbstractComponent):
+    """
+    Plots each element of its input.
+
+    By default each figure is shown and returned. Setting output_dir
+    switches to headless batch rendering: figures are drawn on the Agg
+    canvas without pyplot, written to output_dir in file_format and freed,
+    and the paths of the files are returned. In batch mode, n_jobs > 1
+    renders elements on a process pool, so the plotter and its input must
+    be picklable. max_figures caps the number of figures drawn per run.
+    """
 
-    def __init__(self, title, fig_size, x_label, y_label):
+    AVAILABLE_FILE_FORMATS = ("png", "svg", "pdf")
+
+    def __init__(
+            self,
+            title,
+            fig_size,
+            x_label,
+            y_label,
+            output_dir=None,
+            file_format="png",
+            max_figures=None,
+            n_jobs=1
+    ):
         assert len(fig_size) == 2, "fig_size parameter should be a list of " \
                                    "two integers"
+        assert file_format in self.AVAILABLE_FILE_FORMATS, \
+            f"file_format must be one of {list(self.AVAILABLE_FILE_FORMATS)}"
+        assert n_jobs >= 1, "n_jobs must be a positive integer"
         self.title = title
         self.fig_size = (fig_size[0], fig_size[1])
         self.x_label = x_label
         self.y_label = y_label
+        self.output_dir = output_dir
+        self.file_format = file_format
+        self.max_figures = max_figures
+        self.n_jobs = n_jobs
         self.process = self.plot
 
+    @property
+    def thread_safe(self):
+        # batch mode draws without pyplot, whose global state is not
+        # thread-safe
+        return self.output_dir is not None
+
     def run(self, data):
-        output = []
+        return list(self.stream(data))
+
+    def stream(self, data=None):
+        tasks = self.get_render_tasks(data)
+        if self.output_dir is None or self.n_jobs == 1:
+            for element, n_figures in tasks:
+                yield from self.render_element(element, n_figures)
+            return
+        with ProcessPoolExecutor(max_workers=self.n_jobs) as executor:
+            for batch in iter_batches(tasks, self.n_jobs * 2):
+                elements, figure_counts = zip(*batch)
+                for outputs in executor.map(
+                        _render_element,
+                        repeat(self),
+                        elements,
+                        figure_counts
+                ):
+                    yield from outputs
+
+    def get_render_tasks(self, data):
+        """
+        Pair each element with the number of figures to draw for it, within
+        max_figures.
+        """
+        remaining_figures = self.max_figures
         for element in data:
-            element_output = self.process(element)
-            element_output.show()
-            output.append(element_output)
-        return output
+            if remaining_figures is not None and remaining_figures <= 0:
+                return
+            n_figures = self.count_figures(element)
+            if remaining_figures is not None:
+                n_figures = min(n_figures, remaining_figures)
+                remaining_figures -= n_figures
+            if n_figures:
+                yield element, n_figures
+
+    def count_figures(self, element):
+        return 1
+
+    def render_element(self, element, n_figures):
+        return [
+            self.render(self.process(element), self.get_figure_name(element))
+        ]
+
+    def render(self, fig, figure_name):
+        """
+        Show a figure and return it or, in batch mode, save it and return the
+        path of the file.
+        """
+        if self.output_dir is None:
+            fig.show()
+            return fig
+        return self.save(fig, figure_name)
+
+    def save(self, fig, figure_name, close=True, **savefig_kwargs):
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(
+            self.output_dir,
+            f"{figure_name}.{self.file_format}"
+        )
+        fig.savefig(path, **savefig_kwargs)
+        if close:
+            plt.close(fig)
+        return path
+
+    def get_figure_name(self, element=None):
+        figure_name = self.name or type(self).__name__
+        if element is not None:
+            figure_name = f"{figure_name}_{element.series_id}"
+        return _to_filename(figure_name)
+
+    def create_figure(self, fig_size=None):
+        """
+        Create a figure with one set of axes: a pyplot figure when showing
+        figures, and a pyplot-free Agg figure in batch mode, which is freed
+        as soon as it is no longer referenced.
+        """
+        fig_size = fig_size if fig_size else self.fig_size
+        if self.output_dir is None:
+            return plt.subplots(figsize=fig_size)
+        fig = Figure(figsize=fig_size)
+        return fig, fig.subplots()
 
     def plot(self, data):
         raise NotImplementedError
@@ -35,7 +155,7 @@ class DataPlotter(AbstractComponent):
 class TimeseriesPlotter(DataPlotter):
 
     def plot(self, time_series_dataset):
-        fig, ax = plt.subplots(figsize=(12, 6))
+        fig, ax = self.create_figure(fig_size=(12, 6))
         sns.lineplot(
             x=time_series_dataset.dates,
             y=time_series_dataset.y_data,
@@ -51,7 +171,7 @@ class TimeseriesPlotter(DataPlotter):
 class AutocorrelationPlotter(DataPlotter):
 
     def plot(self, time_series_dataset):
-        fig, ax = plt.subplots(figsize=self.fig_size)
+        fig, ax = self.create_figure()
         autocorrelation_plot(time_series_dataset.y_data, ax=ax)
         ax.set_title(
             f"{self.title} Autocorrelation: {time_series_dataset.series_id}"
@@ -73,16 +193,23 @@ class BarGraphPlotter(DataPlotter):
     }
 
     def run(self, time_series_list):
-        data = pd.DataFrame({
-            "series_id": [ts.series_id for ts in time_series_list],
-            "mean_y": [pd.Series(ts.y_data).mean() for ts in time_series_list]
-        })
-        plot = self.plot(data, x="series_id", y="mean_y")
-        return plot
-
-    def plot(self, data, x, y):
-        fig, ax = plt.subplots(figsize=self.fig_size)
-        sns.barplot(x=x, y=y, data=data, ax=ax)
+        return next(self.stream(time_series_list), None)
+
+    def stream(self, data=None):
+        series_ids = []
+        means = []
+        for time_series_dataset in data:
+            series_ids.append(time_series_dataset.series_id)
+            means.append(time_series_dataset.y_data.mean())
+        plot_data = pd.DataFrame({"series_id": series_ids, "mean_y": means})
+        if self.max_figures is None or self.max_figures > 0:
+            fig = self.plot(plot_data, x="series_id", y="mean_y")
+            yield self.save(fig, self.get_figure_name()) \
+                if self.output_dir else fig
+
+    def plot(self, data, x, y, hue=None):
+        fig, ax = self.create_figure()
+        sns.barplot(x=x, y=y, hue=hue, data=data, ax=ax)
         ax.set_title(self.title)
         ax.set_xlabel(self.x_label)
         ax.set_ylabel(self.y_label)
@@ -90,6 +217,21 @@ class BarGraphPlotter(DataPlotter):
 
 
 class ForecastGraphPlotter(DataPlotter):
+    """
+    Plots the forecasts of every model for each backtest window.
+
+    In batch mode, reuse_figure=True switches to a fast path that draws one
+    figure per series and, for each window, only updates the data of its
+    lines before saving it, instead of building a new figure per window.
+    PNGs on the fast path are written with light compression. Saving still
+    rasterizes every window, so the fast path is about twice as fast for
+    PNG files. multipage_pdf=True also takes the fast path and writes the
+    windows of each series as the pages of a single PDF, which is about
+    four times as fast as a PNG per window.
+    """
+
+    # zlib level for PNGs on the fast path, where encoding dominates
+    FAST_PNG_COMPRESS_LEVEL = 1
 
     def __init__(
             self,
@@ -99,52 +241,221 @@ class ForecastGraphPlotter(DataPlotter):
             x_label,
             y_label,
             start_index=None,
-            end_index=None
+            end_index=None,
+            output_dir=None,
+            file_format="png",
+            max_figures=None,
+            n_jobs=1,
+            reuse_figure=False,
+            multipage_pdf=False
     ):
+        assert output_dir or not (reuse_figure or multipage_pdf), \
+            "reuse_figure and multipage_pdf require an output_dir"
+        assert file_format == "pdf" or not multipage_pdf, \
+            "multipage_pdf requires file_format 'pdf'"
         self.start_index = start_index
         self.end_index = end_index
-        super().__init__(title, fig_size, x_label, y_label)
+        self.reuse_figure = reuse_figure or multipage_pdf
+        self.multipage_pdf = multipage_pdf
+        super().__init__(
+            title,
+            fig_size,
+            x_label,
+            y_label,
+            output_dir=output_dir,
+            file_format=file_format,
+            max_figures=max_figures,
+            n_jobs=n_jobs
+        )
 
-    def run(self, backtest_datasets):
-        for backtest_dataset in backtest_datasets:
-            self.plot_windows(backtest_dataset)
+    def count_figures(self, backtest_dataset):
+        backtest_dataset = _get_backtest_dataset(backtest_dataset)
+        return len(self.get_window_indexes(backtest_dataset))
+
+    def render_element(self, backtest_dataset, n_figures):
+        backtest_dataset = _get_backtest_dataset(backtest_dataset)
+        window_indexes = self.get_window_indexes(backtest_dataset)[:n_figures]
+        if self.multipage_pdf:
+            return [self.render_pages(backtest_dataset, window_indexes)]
+        if self.reuse_figure:
+            savefig_kwargs = {}
+            if self.file_format == "png":
+                savefig_kwargs["pil_kwargs"] = {
+                    "compress_level": self.FAST_PNG_COMPRESS_LEVEL
+                }
+            return [
+                self.save(
+                    fig,
+                    self.get_figure_name(window),
+                    close=False,
+                    **savefig_kwargs
+                )
+                for fig, window in self.iter_window_figures(
+                    backtest_dataset,
+                    window_indexes
+                )
+            ]
+        outputs = []
+        for window_index in window_indexes:
+            window = backtest_dataset.get_window(window_index)
+            fig, ax = self.plot(window)
+            outputs.append(self.render(fig, self.get_figure_name(window)))
+        return outputs
+
+    def render_pages(self, backtest_dataset, window_indexes):
+        """
+        Write the windows of a series as the pages of one PDF.
+
+        Returns:
+            str: The path of the PDF.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        series_id = backtest_dataset.time_series_dataset.series_id
+        path = os.path.join(
+            self.output_dir,
+            f"{self.get_figure_name()}_{_to_filename(series_id)}.pdf"
+        )
+        with PdfPages(path) as pdf:
+            for fig, _ in self.iter_window_figures(
+                    backtest_dataset,
+                    window_indexes
+            ):
+                pdf.savefig(fig)
+        return path
+
+    def iter_window_figures(self, backtest_dataset, window_indexes):
+        """
+        Draw the figure of the first window, then update its lines in place
+        for each following window.
+
+        Yields:
+            The figure, drawn for the window, and the window.
+        """
+        fig, ax = self.create_figure()
+        model_references = list(backtest_dataset.predictions.keys())
+        lines = None
+        for window_index in window_indexes:
+            window = backtest_dataset.get_window(window_index)
+            line_data = self.get_line_data(window, model_references)
+            if lines is None:
+                lines = self.create_lines(ax, line_data, model_references)
+            else:
+                for line, (x, y) in zip(lines, line_data):
+                    line.set_data(x, y)
+                ax.relim()
+                ax.autoscale_view()
+            ax.set_title(
+                f"{self.title} - "
+                f"ID: {backtest_dataset.time_series_dataset.series_id}, "
+                f"Window: {window.index}")
+            yield fig, window
+        plt.close(fig)
+
+    @staticmethod
+    def get_line_data(window, model_references):
+        """
+        Get the x and y data of the train, test, forecast and cutoff lines
+        of a window, with empty forecasts for models without a prediction.
+        """
+        train_dates = window.get_data("dates", "train")
+        train_y = window.get_data("y", "train")
+        test_dates = np.concatenate([
+            train_dates[-1:],
+            window.get_data("dates", "test")
+        ])
+        test_y = np.concatenate([train_y[-1:], window.get_data("y", "test")])
+        line_data = [(train_dates, train_y), (test_dates, test_y)]
+        for model_reference in model_references:
+            model_predictions = window.dataset.predictions[model_reference]
+            if window.index in model_predictions:
+                forecast = np.concatenate([
+                    train_y[-1:],
+                    model_predictions[window.index]["prediction"]
+                ])
+                line_data.append((test_dates[:len(forecast)], forecast))
+            else:
+                line_data.append((test_dates[:0], test_y[:0]))
+        line_data.append((train_dates[-1:].repeat(2), [0, 1]))
+        return line_data
+
+    def create_lines(self, ax, line_data, model_references):
+        (train_x, train_y), (test_x, test_y), *forecasts, (cutoff_x, _) = \
+            line_data
+        lines = [
+            ax.plot(train_x, train_y, color="black", linewidth=1.25)[0],
+            ax.plot(
+                test_x,
+                test_y,
+                color="black",
+                linestyle="dashed",
+                linewidth=1.25
+            )[0]
+        ]
+        for model_reference, (x, y) in zip(model_references, forecasts):
+            lines.append(
+                ax.plot(x, y, linewidth=1.5, label=model_reference)[0]
+            )
+        lines.append(
+            ax.axvline(x=cutoff_x[0], linestyle='--', color='red')
+        )
+        ax.legend(title="model")
+        ax.set_xlabel(self.x_label)
+        ax.set_ylabel(self.y_label)
+        return lines
 
-    def plot_windows(self, backtest_dataset):
+    def get_window_indexes(self, backtest_dataset):
         start_index = self.start_index if self.start_index else 1
-        end_index = self.end_index if self.end_index else \
-            max(backtest_dataset.predictions.keys())
-        window_indexes_to_plot = range(start_index, end_index)
-        for window_index in window_indexes_to_plot:
-            backtest_dataset.window.move_to_index(window_index)
-            self.plot(backtest_dataset)
-
-    def plot(self, backtest_dataset):
-        fig, ax = plt.subplots(figsize=self.fig_size)
+        end_index = self.end_index if self.end_index else max((
+            window_index
+            for model_predictions in backtest_dataset.predictions.values()
+            for window_index in model_predictions.keys()
+        ), default=start_index)
+        window_indexes = backtest_dataset.get_window_indexes()
+        return window_indexes[
+            (window_indexes >= start_index) & (window_indexes < end_index)
+        ]
+
+    def get_figure_name(self, window=None):
+        figure_name = self.name or type(self).__name__
+        if window is not None:
+            figure_name = (
+                f"{figure_name}_"
+                f"{window.dataset.time_series_dataset.series_id}_"
+                f"window_{window.index}"
+            )
+        return _to_filename(figure_name)
+
+    def plot(self, window):
+        fig, ax = self.create_figure()
         sns.lineplot(
-            x=backtest_dataset.get_data("dates", "train"),
-            y=backtest_dataset.get_data("y", "train"),
+            x=window.get_data("dates", "train"),
+            y=window.get_data("y", "train"),
             color="black",
-            linewidth=1.25
+            linewidth=1.25,
+            ax=ax
         )
-        get_test_period_data = lambda requested_data: \
-            [backtest_dataset.get_data(requested_data, "train")[-1]] + \
-            backtest_dataset.get_data(requested_data, "test")
+        get_test_period_data = lambda requested_data: np.concatenate([
+            window.get_data(requested_data, "train")[-1:],
+            window.get_data(requested_data, "test")
+        ])
         sns.lineplot(
             x=get_test_period_data("dates"),
             y=get_test_period_data("y"),
             color="black",
             linestyle="dashed",
-            linewidth=1.25
+            linewidth=1.25,
+            ax=ax
         )
-        train_period_last_y_point = backtest_dataset.get_data("y", "train")[-1]
+        train_period_last_y_point = window.get_data("y", "train")[-1]
 
         forecasts_data = pd.DataFrame({
-            window_prediction_data["model"].get_reference(): [
+            model_reference: [
                 train_period_last_y_point,
-                *window_prediction_data["prediction"]
+                *model_predictions[window.index]["prediction"]
             ]
-            for window_prediction_data in
-            backtest_dataset.predictions[backtest_dataset.window.index]
+            for model_reference, model_predictions in
+            window.dataset.predictions.items()
+            if window.index in model_predictions
         })
         forecasts_data['date'] = get_test_period_data("dates")
         forecasts_data = pd.melt(
@@ -158,33 +469,36 @@ class ForecastGraphPlotter(DataPlotter):
             y='forecast',
             hue="model",
             data=forecasts_data,
-            linewidth=1.5
+            linewidth=1.5,
+            ax=ax
         )
-        plt.axvline(
-            x=backtest_dataset.get_data("dates", "train")[-1],
+        ax.axvline(
+            x=window.get_data("dates", "train")[-1],
             linestyle='--',
             color='red'
         )
         ax.set_title(
             f"{self.title} - "
-            f"ID: {backtest_dataset.time_series_dataset.series_id}, "
-            f"Window: {backtest_dataset.window.index}")
+            f"ID: {window.dataset.time_series_dataset.series_id}, "
+            f"Window: {window.index}")
         ax.set_xlabel(self.x_label)
         ax.set_ylabel(self.y_label)
-        fig.show()
         return fig, ax
 
 
 class ForecastBarGraphPlotter(BarGraphPlotter):
 
-    AVAILABLE_ERROR_FUNCTIONS = {
-        "MSE": metrics.mean_squared_error,
-        "MAE": metrics.mean_absolute_error
-    }
+    AVAILABLE_ERROR_FUNCTIONS = \
+        TimeSeriesBacktestResultsDataset.AVAILABLE_ERROR_FUNCTIONS
     AVAILABLE_ERROR_AVERAGING_FUNCTIONS = {
         "mean": np.mean,
         "median": np.median
     }
+    AVAILABLE_AGGREGATION_LEVELS = {
+        "full": ["model"],
+        "total_model_error": ["model"],
+        "dataset_model_error": ["model", "series_id"]
+    }
 
     def __init__(
             self,
@@ -196,87 +510,85 @@ class ForecastBarGraphPlotter(BarGraphPlotter):
             y_label,
             aggregation_level,
             start_index=None,
-            end_index=None
+            end_index=None,
+            output_dir=None,
+            file_format="png",
+            max_figures=None,
+            n_jobs=1
     ):
-        self.error_function = self.AVAILABLE_ERROR_FUNCTIONS[
-            error_function
-        ]
+        assert error_function in self.AVAILABLE_ERROR_FUNCTIONS, \
+            f"error_function must be one of " \
+            f"{list(self.AVAILABLE_ERROR_FUNCTIONS.keys())}"
+        assert aggregation_level in self.AVAILABLE_AGGREGATION_LEVELS, \
+            f"aggregation_level must be one of " \
+            f"{list(self.AVAILABLE_AGGREGATION_LEVELS.keys())}"
+        self.error_function = error_function
         self.error_averaging_function = self.AVAILABLE_ERROR_AVERAGING_FUNCTIONS[
             error_averaging_function
         ]
         self.start_index = start_index
         self.end_index = end_index
         self.aggregation_level = aggregation_level
-        super().__init__(title, fig_size, x_label, y_label)
+        super().__init__(
+            title,
+            fig_size,
+            x_label,
+            y_label,
+            output_dir=output_dir,
+            file_format=file_format,
+            max_figures=max_figures,
+            n_jobs=n_jobs
+        )
 
     def run(self, backtest_results_datasets):
-        for dataset in backtest_results_datasets:
-            error_df = dataset.get_model_error(
-                error_function=self.error_function,
-                error_averaging_function=self.error_averaging_function
-            )
+        return next(self.stream(backtest_results_datasets), None)
+
+    def stream(self, data=None):
+        """
+        Compute each dataset's window errors as it arrives and plot the
+        aggregate once every dataset has been seen.
+        """
+        error_data = pd.concat([
+            self.get_error_data(dataset) for dataset in data
+        ], ignore_index=True)
+        if self.max_figures is None or self.max_figures > 0:
+            fig = self.plot_error_data(error_data)
+            yield self.save(fig, self.get_figure_name()) \
+                if self.output_dir else fig
+
+    def get_error_data(self, backtest_results_dataset):
+        error_data = backtest_results_dataset.get_model_error(
+            error_functions=[self.error_function],
+            level="window"
+        )
+        if self.start_index is not None:
+            error_data = error_data[error_data["window"] >= self.start_index]
+        if self.end_index is not None:
+            error_data = error_data[error_data["window"] < self.end_index]
+        return error_data
+
+    def plot_error_data(self, error_data):
+        grouping_columns = self.AVAILABLE_AGGREGATION_LEVELS[
+            self.aggregation_level
+        ]
+        error_data = error_data.groupby(
+            grouping_columns,
+            as_index=False
+        )["error"].agg(self.error_averaging_function)
+        hue = "series_id" if "series_id" in grouping_columns else None
+        return self.plot(error_data, x="model", y="error", hue=hue)
+
+
+def _render_element(plotter, element, n_figures):
+    return plotter.render_element(element, n_figures)
+
+
+def _to_filename(figure_name):
+    return re.sub(r"[^\w.-]+", "_", str(figure_name))
+
 
-            # print("-------------------------------")
-            # error_df = dataset.get_all_window_model_error(
-            #     error_function=self.error_function,
-            #     error_averaging_function=self.error_averaging_function
-            # )
-            # print(error_df)
-
-#         if self.aggregation_level == "total_model_error":
-#             error_df = error_df.groupby(['model'], as_index=False)['error'].sum()
-#         elif self.aggregation_level == "dataset_model_error":
-#             error_df = error_df.groupby(['model', 'series_id'], as_index=False)['error'].sum()
-#         self.plot(error_df, "model", "error")
-
-#     def get_all_backtest_dataset_error_dfs(self, backtest_datasets):
-#         all_backtest_dataset_error_dfs = {}
-#         for backtest_dataset in backtest_datasets:
-#             backtest_dataset_error_dfs = self.get_backtest_dataset_error_dfs(
-#                 backtest_dataset
-#             )
-#             all_backtest_dataset_error_dfs[
-#                 backtest_dataset.time_series_dataset.series_id] = \
-#                 backtest_dataset_error_dfs
-#         return all_backtest_dataset_error_dfs
-
-#     def get_backtest_dataset_error_dfs(self, backtest_dataset):
-#         window_range = self.get_window_range(backtest_dataset)
-#         backtest_dataset_error_dfs = []
-#         for window_index in window_range:
-#             window_error_df = self.get_window_error_df(
-#                 backtest_dataset,
-#                 window_index
-#             )
-#             backtest_dataset_error_dfs.append(window_error_df)
-#         return backtest_dataset_error_dfs
-
-#     def get_window_error_df(self, backtest_dataset, window_index):
-#         window_error_df = pd.DataFrame(
-#             backtest_dataset.predictions[window_index]
-#         ).explode(['prediction', 'y_test'])
-#         window_error_df['model'] = window_error_df['model'].apply(
-#             lambda row: row.get_reference()
-#         )
-#         window_error_df['error'] = (
-#                 window_error_df["prediction"] -
-#                 window_error_df["y_test"]
-#         )
-#         window_error_df['window'] = window_index
-#         return window_error_df
-
-#     def plot(self, data, x, y):
-#         fig, ax = plt.subplots(figsize=self.fig_size)
-#         sns.barplot(x=x, y=y, data=data, ax=ax)
-#         ax.set_title(self.title)
-#         ax.set_xlabel(self.x_label)
-#         ax.set_ylabel(self.y_label)
-#         fig.show()
-#         return fig
-
-#     def get_window_range(self, backtest_dataset):
-#         start_index = self.start_index if self.start_index else 1
-#         end_index = self.end_index if self.end_index else \
-#             max(backtest_dataset.predictions.keys())
-#         window_range = range(start_index, end_index)
-#         return window_range
\ No newline at end of file
+def _get_backtest_dataset(dataset):
+    # forecast plots also accept the results datasets wrapping backtests
+    if isinstance(dataset, TimeSeriesBacktestResultsDataset):
+        return dataset.backtest_dataset
+    return dataset
@@ -1,17 +1,21 @@
-from general_analytics_framwork.processes import ModelExperimentationProcess, DataPresentationProcess
+from general_analytics_framwork.compiler import ConfigCompiler
+from general_analytics_framwork.processes import AVAILABLE_PROCESSES
 from general_analytics_framwork.process_builder import ProcessBuilder
 from general_analytics_framwork.config import ConfigParser, NodeConfig
 
-
-AVAILABLE_PROCESSES = {
-    "data_presentation": DataPresentationProcess,
-    "model_experimentation": ModelExperimentationProcess
-}
+CONFIG_FILE_PATHS = [
+    "tests/config/modelling.json",
+    "tests/config/analytics_dag.json"
+]
 
 
 def test_process(config_file_path):
     config_loader = ConfigParser()
     config_dict = config_loader.read_config_file(config_file_path)
+    return run_config(config_dict)
+
+
+def run_config(config_dict):
     config = NodeConfig(**config_dict)
     process_builder = ProcessBuilder()
     process = process_builder.build(
@@ -22,6 +26,22 @@ def test_process(config_file_path):
     return output
 
 
+def test_compiled_process(config_file_path, cache_dir=None):
+    config_compiler = ConfigCompiler(cache_dir=cache_dir)
+    plan = config_compiler.compile_file(config_file_path, AVAILABLE_PROCESSES)
+    work_estimate = plan.estimate_work()
+    assert all(
+        count is None or (isinstance(count, int) and count >= 0)
+        for count in work_estimate
+    )
+    assert work_estimate.n_forecasts is None or \
+        work_estimate.n_forecasts == \
+        work_estimate.n_windows * work_estimate.n_models
+    output = plan.build().run()
+    return output
+
+
 if __name__ == '__main__':
-    output = test_process("tests/config/modelling.json")
+    for config_file_path in CONFIG_FILE_PATHS:
+        output = test_process(config_file_path)
     # test_process("tests/config/data_presentation.json")
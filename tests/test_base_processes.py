@@ -0,0 +1,152 @@
+import gc
+import threading
+import weakref
+import pytest
+from general_analytics_framwork.base_processes import (
+    AbstractComponent,
+    DagNode,
+    DagProcess,
+    ParallelProcess
+)
+from general_analytics_framwork.visualisation import TimeseriesPlotter
+
+
+class Recorder(AbstractComponent):
+    """
+    Records the items it sees in a shared log and passes them through.
+    """
+
+    def __init__(self, log, active=None):
+        self.log = log
+        self.active = active
+
+    def run(self, data):
+        return list(self.stream(data))
+
+    def stream(self, data=None):
+        for item in data:
+            if self.active is not None:
+                # fails if another recorder is running at the same time
+                assert self.active.acquire(blocking=False)
+            self.log.append(("child", item))
+            self.active is not None and self.active.release()
+            yield item
+
+
+def generate_items(log, n_items):
+    for item in range(n_items):
+        log.append(("upstream", item))
+        yield item
+
+
+class Step(AbstractComponent):
+    """
+    Adds one to its input and records the thread it ran on.
+    """
+
+    def __init__(self, name, threads, thread_safe=False, check=None):
+        self.name = name
+        self.threads = threads
+        self.thread_safe = thread_safe
+        self.check = check
+
+    def run(self, data=None):
+        self.threads[self.name] = threading.current_thread()
+        if self.check is not None:
+            self.check()
+        return Value(0 if data is None else data.value + 1)
+
+
+class Value:
+
+    def __init__(self, value):
+        self.value = value
+
+
+def make_plotter(output_dir=None):
+    return TimeseriesPlotter("title", [4, 3], "x", "y", output_dir=output_dir)
+
+
+def test_parallel_process_runs_children_sequentially_by_default():
+    assert ParallelProcess([make_plotter(), make_plotter()]).executor == \
+        "sequential"
+
+
+def test_thread_executor_requires_thread_safe_children(tmp_path):
+    ParallelProcess(
+        [make_plotter(str(tmp_path)), make_plotter(str(tmp_path))],
+        executor="thread"
+    )
+    with pytest.raises(ValueError, match="thread-safe"):
+        ParallelProcess(
+            [make_plotter(str(tmp_path)), make_plotter()],
+            executor="thread"
+        )
+
+
+@pytest.mark.parametrize("n_children", [1, 3])
+def test_sequential_stream_does_not_collect_the_input(n_children):
+    log = []
+    active = threading.Lock()
+    process = ParallelProcess(
+        [Recorder(log, active) for _ in range(n_children)]
+    )
+
+    output = list(process.stream(generate_items(log, 10)))
+
+    assert output == list(range(10)) * n_children
+    # items reach the children before the input is exhausted, and at most
+    # a few items ahead of them are generated
+    max_lag = ParallelProcess.STREAM_BUFFER_SIZE + 2
+    for item in range(10 - max_lag):
+        assert log.index(("child", item)) < \
+            log.index(("upstream", item + max_lag))
+
+
+def test_dag_runs_unsafe_children_on_the_calling_thread():
+    threads = {}
+    process = DagProcess([
+        DagNode(Step("source", threads, thread_safe=True)),
+        DagNode(Step("safe", threads, thread_safe=True), inputs=["source"]),
+        DagNode(Step("unsafe_0", threads), inputs=["source"]),
+        DagNode(Step("unsafe_1", threads), inputs=["source"])
+    ], max_workers=4)
+
+    outputs = process.run()
+
+    assert {name: output.value for name, output in outputs.items()} == {
+        "safe": 1,
+        "unsafe_0": 1,
+        "unsafe_1": 1
+    }
+    assert threads["unsafe_0"] is threading.current_thread()
+    assert threads["unsafe_1"] is threading.current_thread()
+    assert threads["safe"] is not threading.current_thread()
+
+
+@pytest.mark.parametrize("thread_safe", [True, False])
+def test_dag_releases_intermediates_after_their_last_consumer(thread_safe):
+    threads = {}
+    source_outputs = []
+
+    def check_source_output_released():
+        gc.collect()
+        assert source_outputs[0]() is None
+
+    class Source(Step):
+
+        def run(self, data=None):
+            output = super().run(data)
+            source_outputs.append(weakref.ref(output))
+            return output
+
+    process = DagProcess([
+        DagNode(Source("source", threads, thread_safe)),
+        DagNode(Step("middle", threads, thread_safe), inputs=["source"]),
+        DagNode(
+            Step("sink", threads, thread_safe, check_source_output_released),
+            inputs=["middle"]
+        )
+    ])
+
+    assert process.run()["sink"].value == 2
@@ -0,0 +1,59 @@
+import numpy as np
+from general_analytics_framwork.caching import ForecastCache
+from general_analytics_framwork.modelling import (
+    ARIMA,
+    BacktestRunner,
+    RandomWalk
+)
+from test_modelling import get_predictions, make_data
+
+
+def test_put_and_get(tmp_path):
+    cache = ForecastCache(str(tmp_path))
+    key = "0123456789abcdef" * 4
+
+    cache.put(key, [1.5, 2.5])
+
+    np.testing.assert_array_equal(cache.get(key), [1.5, 2.5])
+    assert cache.get("f" * 64) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cached_backtest_matches_uncached(tmp_path):
+    model = ARIMA()
+    expected_data = BacktestRunner().run(
+        model,
+        make_data(train_window_length=30, max_test_window_length=3)
+    )
+    BacktestRunner(n_jobs=2, cache=ForecastCache(str(tmp_path))).run(
+        model,
+        make_data(train_window_length=30, max_test_window_length=3)
+    )
+    cache = ForecastCache(str(tmp_path))
+
+    data = BacktestRunner(cache=cache).run(
+        model,
+        make_data(train_window_length=30, max_test_window_length=3)
+    )
+
+    np.testing.assert_array_equal(
+        get_predictions(data, model),
+        get_predictions(expected_data, model)
+    )
+    assert (cache.hits, cache.misses) == (27, 0)
+
+
+def test_keys_of_regressor_models_include_test_regressors():
+    data = make_data(n_series=1, n_regressors=2, train_window_length=30,
+                     max_test_window_length=3)
+    window = data[0].get_window(2)
+    keys = [
+        ForecastCache.get_key(model, window)
+        for model in [ARIMA(), RandomWalk()]
+    ]
+
+    # window 2 tests on observations 37 to 39
+    data[0].time_series_dataset.regressor_data[38, 0] += 1
+
+    assert ForecastCache.get_key(ARIMA(), window) != keys[0]
+    assert ForecastCache.get_key(RandomWalk(), window) == keys[1]
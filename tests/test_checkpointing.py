@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+from general_analytics_framwork.checkpointing import compute_data_fingerprint
+from general_analytics_framwork.modelling import BacktestRunner, RandomWalk
+from test_modelling import make_data
+
+
+def test_data_fingerprint_changes_with_any_value():
+    data = make_data(train_window_length=30, max_test_window_length=3)
+    changed_data = make_data(train_window_length=30, max_test_window_length=3)
+    changed_data[2].time_series_dataset.y_data[7] += 1e-12
+
+    fingerprint = compute_data_fingerprint(data)
+
+    assert fingerprint == compute_data_fingerprint(
+        make_data(train_window_length=30, max_test_window_length=3)
+    )
+    assert fingerprint != compute_data_fingerprint(changed_data)
+    assert fingerprint != compute_data_fingerprint(data[:2])
+
+
+def test_data_fingerprint_of_backtest_results_and_frames():
+    data = BacktestRunner().run(
+        RandomWalk(),
+        make_data(train_window_length=30, max_test_window_length=3)
+    )
+    frame = data[0].time_series_dataset.to_frame()
+
+    # predictions refer back to the model, which is hashed once
+    assert compute_data_fingerprint(data) is not None
+    assert compute_data_fingerprint(frame) == \
+        compute_data_fingerprint(frame.copy())
+    assert compute_data_fingerprint(frame) != \
+        compute_data_fingerprint(frame.assign(y=frame["y"] + 1))
+    assert compute_data_fingerprint(frame) != \
+        compute_data_fingerprint(frame.rename(columns={"y": "z"}))
+
+
+def test_data_fingerprint_of_unpicklable_data_is_unknown():
+    assert compute_data_fingerprint([np.zeros(3), lambda x: x]) is None
+    assert compute_data_fingerprint(None) == "none"
+    assert compute_data_fingerprint(pd.DataFrame({"a": [[1], [2]]})) \
+        is not None
@@ -0,0 +1,16 @@
+from general_analytics_framwork.compiler import ConfigCompiler
+from general_analytics_framwork.processes import AVAILABLE_PROCESSES
+
+
+def test_estimate_work():
+    plan = ConfigCompiler().compile_file(
+        "tests/config/modelling.json",
+        AVAILABLE_PROCESSES
+    )
+
+    work_estimate = plan.estimate_work()
+
+    assert work_estimate.n_series == 3
+    assert work_estimate.n_windows == 321
+    assert work_estimate.n_models == 2
+    assert work_estimate.n_forecasts == 642
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+from general_analytics_framwork.data_preparation.data_converters import (
+    TimeseriesConverter
+)
+
+
+def test_split_matches_masking_each_series():
+    data = pd.DataFrame({
+        "series_id": ["b", "a", "b", "c", "a", "b", None],
+        "date": ["2022-01-31", "2022-01-31", "2022-02-28", "2022-01-31",
+                 "2022-02-28", "2022-03-31", "2022-01-31"],
+        "y": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0],
+        "x0": [10.0, 20.0, 30.0, 40.0, 50.0, 60.0, 70.0]
+    })
+    converter = TimeseriesConverter(
+        "series_id", "date", "y", ["x0"], "%Y-%m-%d"
+    )
+
+    output = converter.run(data)
+
+    # series keep their order of first appearance and rows their order
+    assert [dataset.series_id for dataset in output] == ["b", "a", "c"]
+    for dataset in output:
+        series_data = data[data["series_id"] == dataset.series_id]
+        np.testing.assert_array_equal(dataset.y_data, series_data["y"])
+        np.testing.assert_array_equal(
+            dataset.dates,
+            pd.to_datetime(series_data["date"]).to_numpy()
+        )
+        np.testing.assert_array_equal(
+            dataset.regressor_data[:, 0],
+            series_data["x0"]
+        )
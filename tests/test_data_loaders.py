@@ -0,0 +1,89 @@
+import pandas as pd
+import pytest
+from general_analytics_framwork.data_preparation.data_loaders import (
+    ColumnarDataLoader,
+    ForexLoader,
+    LocalDataLoader
+)
+
+DATA_PATH = "tests/data/test_time_series_data.csv"
+
+
+@pytest.fixture
+def columnar_data():
+    data = LocalDataLoader("csv", DATA_PATH).run()
+    data["date"] = pd.to_datetime(data["date"])
+    return data
+
+
+def test_stream_reads_csv_in_chunks():
+    loader = LocalDataLoader("csv", DATA_PATH, chunksize=100)
+
+    chunks = list(loader.stream())
+
+    assert [len(chunk) for chunk in chunks] == [100, 100, 100, 60]
+    pd.testing.assert_frame_equal(
+        pd.concat(chunks, axis=0),
+        LocalDataLoader("csv", DATA_PATH).run()
+    )
+
+
+def test_forex_stream_resamples_whole_files(tmp_path):
+    path = tmp_path / "EUR.csv"
+    pd.DataFrame({
+        "Date": pd.date_range("2022-01-03", periods=14, freq="D"),
+        "rate": range(14)
+    }).to_csv(path, index=False)
+    loader = ForexLoader("csv", str(path), chunksize=5)
+
+    chunks = list(loader.stream())
+
+    assert len(chunks) == 1
+    assert chunks[0]["rate"].tolist() == [3.0, 10.0]
+    assert chunks[0]["currency_pair"].unique().tolist() == ["USD/EUR"]
+
+
+@pytest.mark.parametrize("source_type", ["parquet", "feather"])
+def test_columnar_loader_reads_what_pandas_wrote(
+        source_type,
+        columnar_data,
+        tmp_path
+):
+    path = str(tmp_path / f"data.{source_type}")
+    getattr(columnar_data, f"to_{source_type}")(path)
+
+    pd.testing.assert_frame_equal(
+        ColumnarDataLoader(source_type, path).run(),
+        columnar_data,
+        check_dtype=False
+    )
+
+
+def test_columnar_loader_projects_and_filters(columnar_data, tmp_path):
+    path = str(tmp_path / "data.parquet")
+    columnar_data.to_parquet(path)
+    loader = ColumnarDataLoader(
+        "parquet",
+        path,
+        columns=["series_id", "y"],
+        series_id_col="series_id",
+        series_ids=["a1", "a3"],
+        date_col="date",
+        start_date="2022-06-01",
+        end_date="2022-12-31"
+    )
+
+    expected_data = columnar_data[
+        columnar_data["series_id"].isin(["a1", "a3"]) &
+        columnar_data["date"].between("2022-06-01", "2022-12-31")
+    ][["series_id", "y"]].reset_index(drop=True)
+    pd.testing.assert_frame_equal(
+        loader.run(),
+        expected_data,
+        check_dtype=False
+    )
+    pd.testing.assert_frame_equal(
+        pd.concat(loader.stream(), ignore_index=True),
+        expected_data,
+        check_dtype=False
+    )
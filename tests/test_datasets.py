@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+import pytest
+from general_analytics_framwork.datasets import (
+    BacktestWindowTable,
+    TimeseriesBacktestDataset,
+    TimeSeriesBacktestResultsDataset,
+    TimeseriesDataset
+)
+from general_analytics_framwork.modelling import BacktestRunner, RandomWalk
+
+
+def make_backtest_dataset(y_data, **kwargs):
+    dates = pd.date_range("2020-01-01", periods=len(y_data), freq="D")
+    time_series_dataset = TimeseriesDataset("a", dates.values, y_data)
+    return TimeseriesBacktestDataset(time_series_dataset, **kwargs)
+
+
+def test_errors_of_windows_shorter_than_max_test_window_length():
+    backtest_dataset = make_backtest_dataset(
+        [1.0, 2.0, 4.0, 7.0, 11.0, 16.0],
+        train_window_length=3,
+        max_test_window_length=5,
+        max_windows=1
+    )
+    BacktestRunner().run(RandomWalk(), [backtest_dataset])
+
+    model_error = TimeSeriesBacktestResultsDataset(
+        backtest_dataset
+    ).get_model_error(error_functions=("ME", "MAE"), level="horizon")
+
+    # the one window visited trains on 2, 4, 7 and tests on 11, 16
+    assert model_error["horizon"].tolist() == [1, 2, 1, 2]
+    assert model_error["error"].tolist() == [-4.0, -9.0, 4.0, 9.0]
+
+
+def test_time_series_dataset_stores_contiguous_arrays():
+    time_series_dataset = TimeseriesDataset(
+        "a",
+        ["2020-01-01", "2020-01-02", "2020-01-03"],
+        [1, 2, 3],
+        regressor_data={"x0": [4, 5, 6], "x1": [7, 8, 9]},
+        date_parser="%Y-%m-%d"
+    )
+
+    assert time_series_dataset.y_data.dtype == np.float64
+    assert time_series_dataset.dates.dtype == np.dtype("datetime64[ns]")
+    assert time_series_dataset.regressor_names == ["x0", "x1"]
+    np.testing.assert_array_equal(
+        time_series_dataset.regressor_data,
+        [[4, 7], [5, 8], [6, 9]]
+    )
+    assert time_series_dataset.regressor_data.flags["C_CONTIGUOUS"]
+
+
+def test_window_data_are_views_onto_the_series():
+    backtest_dataset = make_backtest_dataset(
+        np.arange(10.0),
+        train_window_length=4,
+        max_test_window_length=2
+    )
+    y_data = backtest_dataset.time_series_dataset.y_data
+
+    y_train = backtest_dataset.get_data("y", "train", 1)
+    y_test = backtest_dataset.get_data("y", "test", 1)
+
+    np.testing.assert_array_equal(y_train, [4, 5, 6, 7])
+    np.testing.assert_array_equal(y_test, [8, 9])
+    assert np.shares_memory(y_train, y_data)
+    assert np.shares_memory(y_test, y_data)
+
+
+def test_window_errors():
+    backtest_dataset = make_backtest_dataset(
+        [1.0, 2.0, 4.0, 7.0, 11.0, 16.0],
+        train_window_length=3,
+        max_test_window_length=2
+    )
+    BacktestRunner().run(RandomWalk(), [backtest_dataset])
+
+    model_error = TimeSeriesBacktestResultsDataset(
+        backtest_dataset
+    ).get_model_error(error_functions=("MSE", "MAE"), level="window")
+
+    # window 1 predicts 7, 7 for 11, 16 and window 2 predicts 4, 4 for 7, 11
+    assert model_error["window"].tolist() == [1, 2, 1, 2]
+    assert model_error["error"].tolist() == [48.5, 29.0, 6.5, 5.0]
+
+
+def test_window_table_clips_test_windows_at_the_end_of_the_series():
+    windows = BacktestWindowTable(
+        n_obs=10,
+        train_window_length=4,
+        max_test_window_length=3
+    )
+
+    assert windows.window_indexes.tolist() == [1, 2, 3, 4, 5]
+    # train start, train end, test start and test end
+    assert windows.get_index_table([1, 2, 5]).tolist() == [
+        [4, 7, 8, 9],
+        [3, 6, 7, 9],
+        [0, 3, 4, 6]
+    ]
+
+
+def test_series_shorter_than_the_training_window_are_rejected():
+    with pytest.raises(AssertionError, match="too short"):
+        BacktestWindowTable(
+            n_obs=4,
+            train_window_length=4,
+            max_test_window_length=3
+        )
+
+
+def test_window_table_stride_and_max_windows():
+    windows = BacktestWindowTable(
+        n_obs=20,
+        train_window_length=4,
+        max_test_window_length=3,
+        stride=3,
+        max_windows=4
+    )
+
+    assert windows.window_indexes.tolist() == [1, 4, 7, 10]
+
+
+def test_expanding_windows_train_from_the_start_of_the_series():
+    windows = BacktestWindowTable(
+        n_obs=10,
+        train_window_length=4,
+        max_test_window_length=3,
+        window_type="expanding"
+    )
+
+    assert windows.get_index_table([1, 5])[:, :2].tolist() == [[0, 7], [0, 3]]
+
+
+
+def test_window_table_date_cutoffs():
+    dates = pd.date_range("2020-01-01", periods=20, freq="D").values
+    windows = BacktestWindowTable(
+        n_obs=20,
+        train_window_length=4,
+        max_test_window_length=3,
+        dates=dates,
+        start_date="2020-01-10",
+        end_date="2020-01-15"
+    )
+
+    # window i first tests on observation 19 - i
+    assert windows.window_indexes.tolist() == [5, 6, 7, 8, 9, 10]
+
+
+def test_predictions_have_one_row_per_visited_window():
+    backtest_dataset = make_backtest_dataset(
+        np.arange(3650.0),
+        train_window_length=30,
+        max_test_window_length=30,
+        stride=90
+    )
+    BacktestRunner().run(RandomWalk(), [backtest_dataset])
+
+    predictions = backtest_dataset.predictions["RandomWalk"]
+
+    window_indexes = backtest_dataset.get_window_indexes()
+    assert predictions.array.shape == (len(window_indexes), 30)
+    assert list(predictions) == window_indexes.tolist()
+    # window 91 tests from observation 3558, after training up to 3557
+    np.testing.assert_array_equal(predictions[91]["prediction"], [3557] * 30)
+    assert 90 not in predictions
+    with pytest.raises(KeyError):
+        predictions.set(90, [1.0])
@@ -0,0 +1,36 @@
+import tracemalloc
+from general_analytics_framwork.instrumentation import Profiler
+from general_analytics_framwork.modelling import Drift, RandomWalk
+from general_analytics_framwork.processes import ModellingProcess
+from test_modelling import make_data
+
+
+def make_modelling_process():
+    process = ModellingProcess([RandomWalk(), Drift()])
+    Profiler(trace_memory=True, print_report=False).instrument(process)
+    return process
+
+
+def test_run_times_each_model():
+    process = make_modelling_process()
+    process.run(make_data(train_window_length=30, max_test_window_length=3))
+
+    for path in [(0,), (1,)]:
+        assert process.profiler.nodes[path]["calls"] == 1
+        assert process.profiler.nodes[path]["items_out"] == 3
+    assert not tracemalloc.is_tracing()
+
+
+def test_stream_is_profiled():
+    process = make_modelling_process()
+    output = list(process.stream(iter(
+        make_data(train_window_length=30, max_test_window_length=3)
+    )))
+
+    root = process.profiler.nodes[()]
+    assert len(output) == 3
+    assert root["calls"] == 1
+    assert root["items_out"] == 3
+    assert root["memory_peak_mb"] is not None
+    assert process.profiler.nodes[(0,)]["items_out"] == 3
+    assert not tracemalloc.is_tracing()
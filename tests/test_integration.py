@@ -0,0 +1,445 @@
+import copy
+import json
+import os
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+import integration_tests
+from general_analytics_framwork.config import ConfigParser
+from general_analytics_framwork.data_preparation.data_loaders import (
+    ColumnarDataLoader
+)
+
+matplotlib.use("Agg")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_CONFIG = ConfigParser().read_config_file(
+    os.path.join(ROOT_DIR, "tests", "config", "modelling.json")
+)
+NAIVE_MODEL_CONFIGS = [
+    {"name": "seasonal_naive", "type": "leaf",
+     "other_args": {"season_length": 12}},
+    {"name": "drift", "type": "leaf", "other_args": {}}
+]
+
+
+@pytest.fixture
+def work_dir(tmp_path, monkeypatch):
+    """
+    Run in an empty directory with the test data, so the configs' outputs
+    are written to it.
+    """
+    os.makedirs(tmp_path / "tests")
+    os.symlink(
+        os.path.join(ROOT_DIR, "tests", "data"),
+        tmp_path / "tests" / "data"
+    )
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def make_config(plots=False, naive_models=True):
+    """
+    Copy the modelling.json experiment, which variants are built from.
+    Without plots it returns the backtest results of each series.
+    """
+    config = copy.deepcopy(BASE_CONFIG)
+    if not plots:
+        config["child_configs"] = [
+            child_config for child_config in config["child_configs"]
+            if child_config["name"] != "forecast_data_visualisation"
+        ]
+    if naive_models:
+        get_child(config, "modelling")["child_configs"][1:1] = \
+            copy.deepcopy(NAIVE_MODEL_CONFIGS)
+    return config
+
+
+def get_child(config, *names):
+    for name in names:
+        config = next(
+            child_config for child_config in config["child_configs"]
+            if child_config["name"] == name
+        )
+    return config
+
+
+def add_columnar_writers(config, suffix=""):
+    get_child(config, "data_preparation", "data_converter")["child_configs"] \
+        .insert(1, {
+            "name": "columnar_writer",
+            "type": "leaf",
+            "other_args": {
+                "path": f"time_series{suffix}.parquet",
+                "file_format": "parquet"
+            }
+        })
+    config["child_configs"].insert(2, {
+        "name": "columnar_writer",
+        "type": "leaf",
+        "other_args": {
+            "path": f"predictions{suffix}.feather",
+            "file_format": "feather"
+        }
+    })
+    return config
+
+
+def make_streaming_config(config):
+    get_child(config, "data_preparation", "data_loader", "local")[
+        "other_args"
+    ]["chunksize"] = 50
+    config["other_args"] = {"streaming": True}
+    return config
+
+
+def get_predictions(results):
+    """
+    Get each model's predictions for every window of every series.
+    """
+    return {
+        model_reference: np.stack([
+            result.backtest_dataset.predictions[model_reference].array
+            for result in results
+        ])
+        for model_reference in results[0].backtest_dataset.predictions
+    }
+
+
+def assert_same_predictions(results, expected_results):
+    predictions = get_predictions(results)
+    expected_predictions = get_predictions(expected_results)
+    assert list(predictions) == list(expected_predictions)
+    for model_reference, model_predictions in predictions.items():
+        np.testing.assert_array_equal(
+            model_predictions,
+            expected_predictions[model_reference]
+        )
+
+
+@pytest.mark.parametrize(
+    "config_file_path",
+    integration_tests.CONFIG_FILE_PATHS
+)
+def test_config_runs(config_file_path, work_dir):
+    output = integration_tests.test_process(
+        os.path.join(ROOT_DIR, config_file_path)
+    )
+
+    assert output is not None
+
+
+@pytest.mark.parametrize(
+    "config_file_path",
+    integration_tests.CONFIG_FILE_PATHS
+)
+def test_compiled_config_runs(config_file_path, work_dir):
+    for _ in range(2):
+        output = integration_tests.test_compiled_process(
+            os.path.join(ROOT_DIR, config_file_path),
+            cache_dir=str(work_dir / "plans")
+        )
+
+        assert output is not None
+    # the second run reuses the plan compiled by the first
+    assert len(os.listdir(work_dir / "plans")) == 1
+
+
+def test_parallel_modelling_matches_serial_modelling(work_dir):
+    config = make_config()
+    get_child(config, "modelling")["other_args"] = {
+        "n_jobs": 2,
+        "chunk_by": "series"
+    }
+
+    results = integration_tests.run_config(config)
+
+    assert len(results) == 3
+    assert_same_predictions(
+        results,
+        integration_tests.run_config(make_config())
+    )
+
+
+def test_cached_modelling_matches_uncached_modelling(work_dir):
+    config = make_config()
+    get_child(config, "modelling")["other_args"] = {
+        "cache_dir": "forecast_cache",
+        "cache_max_size_mb": 64
+    }
+    integration_tests.run_config(copy.deepcopy(config))
+
+    results = integration_tests.run_config(config)
+
+    assert os.listdir(work_dir / "forecast_cache")
+    assert_same_predictions(
+        results,
+        integration_tests.run_config(make_config())
+    )
+
+
+def test_columnar_outputs_can_be_reloaded(work_dir):
+    config = add_columnar_writers(make_config())
+    results = integration_tests.run_config(config)
+    reloaded_config = make_config()
+    get_child(reloaded_config, "data_preparation", "data_loader")[
+        "child_configs"
+    ] = [{
+        "name": "columnar",
+        "type": "leaf",
+        "other_args": {
+            "source_type": "parquet",
+            "path": "time_series.parquet"
+        }
+    }]
+
+    reloaded_results = integration_tests.run_config(reloaded_config)
+
+    assert_same_predictions(reloaded_results, results)
+    predictions = ColumnarDataLoader(
+        "feather",
+        "predictions.feather"
+    ).run()
+    assert len(predictions) == np.isfinite(np.concatenate(
+        list(get_predictions(results).values())
+    )).sum()
+
+
+def test_streaming_matches_running(work_dir):
+    config = make_streaming_config(
+        add_columnar_writers(make_config(), "_streamed")
+    )
+
+    results = integration_tests.run_config(config)
+
+    expected_results = integration_tests.run_config(
+        add_columnar_writers(make_config())
+    )
+    assert_same_predictions(results, expected_results)
+    for path in ["time_series.parquet", "predictions.feather"]:
+        source_type = path.split(".")[1]
+        pd.testing.assert_frame_equal(
+            ColumnarDataLoader(
+                source_type,
+                path.replace(".", "_streamed.")
+            ).run(),
+            ColumnarDataLoader(source_type, path).run()
+        )
+
+
+def test_streaming_config_with_plots_runs(work_dir):
+    config = make_streaming_config(make_config(plots=True))
+
+    assert integration_tests.run_config(config) is not None
+
+
+def test_instrumented_config_writes_a_report_and_trace(work_dir):
+    config = make_config()
+    config["instrumentation"] = {
+        "enabled": True,
+        "trace_memory": True,
+        "report_path": "profile/report.json",
+        "trace_path": "profile/trace.json"
+    }
+    get_child(config, "modelling")["other_args"] = {
+        "n_jobs": 2,
+        "chunk_by": "series"
+    }
+
+    integration_tests.run_config(config)
+
+    with open(work_dir / "profile" / "report.json") as f:
+        report = json.load(f)
+    with open(work_dir / "profile" / "trace.json") as f:
+        trace = json.load(f)
+    assert report["name"] == "model_experimentation"
+    assert report["calls"] == 1
+    assert [child["name"] for child in report["children"]] == [
+        "data_preparation",
+        "modelling",
+        "backtest_results_converter"
+    ]
+    assert len(trace["traceEvents"]) >= 3
+
+
+def test_checkpointed_config_resumes_from_its_checkpoints(work_dir):
+    config = make_config()
+    config["other_args"] = {"checkpoint_dir": "checkpoints/experiment"}
+    get_child(config, "modelling")["other_args"] = {
+        "n_jobs": 2,
+        "chunk_by": "series",
+        "checkpoint_dir": "checkpoints/modelling"
+    }
+    results = integration_tests.run_config(copy.deepcopy(config))
+    checkpoints = {
+        directory: sorted(os.listdir(work_dir / "checkpoints" / directory))
+        for directory in ["experiment", "modelling"]
+    }
+
+    resumed_results = integration_tests.run_config(config)
+
+    assert all(checkpoints.values())
+    assert {
+        directory: sorted(os.listdir(work_dir / "checkpoints" / directory))
+        for directory in ["experiment", "modelling"]
+    } == checkpoints
+    assert_same_predictions(resumed_results, results)
+
+
+def test_headless_config_saves_figures(work_dir):
+    config = make_config(plots=True)
+    get_child(config, "modelling")["other_args"] = {
+        "n_jobs": 2,
+        "chunk_by": "series"
+    }
+    visualisation_config = get_child(config, "forecast_data_visualisation")
+    get_child(visualisation_config, "forecast_error_bar_plot")[
+        "other_args"
+    ].update({"output_dir": "figures", "file_format": "svg"})
+    visualisation_config["child_configs"].insert(0, {
+        "name": "forecast_plot",
+        "type": "leaf",
+        "other_args": {
+            "title": "Forecast",
+            "fig_size": [12, 6],
+            "x_label": "Date",
+            "y_label": "Y",
+            "output_dir": "figures",
+            "file_format": "png",
+            "max_figures": 12,
+            "n_jobs": 2
+        }
+    })
+
+    figure_numbers = plt.get_fignums()
+    integration_tests.run_config(config)
+
+    file_formats = [
+        filename.split(".")[-1]
+        for filename in os.listdir(work_dir / "figures")
+    ]
+    assert sorted(file_formats) == ["png"] * 12 + ["svg"]
+    assert plt.get_fignums() == figure_numbers
+
+
+def test_window_strategies_config_backtests_the_selected_windows(work_dir):
+    config = make_config()
+    get_child(
+        config,
+        "data_preparation",
+        "data_converter",
+        "time_series_backtest"
+    )["other_args"].update({
+        "max_test_window_length": 6,
+        "window_type": "expanding",
+        "stride": 3,
+        "max_windows": 24,
+        "end_date": "2031-06-30"
+    })
+    get_child(config, "modelling")["other_args"] = {
+        "n_jobs": 2,
+        "chunk_by": "series"
+    }
+
+    results = integration_tests.run_config(config)
+
+    for result in results:
+        backtest_dataset = result.backtest_dataset
+        window_indexes = backtest_dataset.get_window_indexes()
+        # every third window from window 1 is kept, and window i first
+        # tests on 2031-12-31 less i months, so window 7 is the first kept
+        # testing by 2031-06-30
+        assert window_indexes.tolist() == list(range(7, 7 + 3 * 24, 3))
+        for model_predictions in backtest_dataset.predictions.values():
+            assert list(model_predictions) == window_indexes.tolist()
+
+
+def test_search_config_keeps_the_best_candidates(work_dir):
+    config = make_config(naive_models=False)
+    get_child(config, "modelling")["child_configs"][1] = {
+        "name": "arima_search",
+        "type": "leaf",
+        "other_args": {
+            "param_grid": {
+                "auto_regressive": [0, 1, 2],
+                "integrated": [0, 1],
+                "moving_average": [0, 1]
+            },
+            "error_function": "MSE",
+            "halving_factor": 3,
+            "min_windows": 4,
+            "keep_best": 2,
+            "n_jobs": 2,
+            "leaderboard_path": "arima_search_leaderboard.csv"
+        }
+    }
+
+    results = integration_tests.run_config(config)
+
+    leaderboard = pd.read_csv(work_dir / "arima_search_leaderboard.csv")
+    assert leaderboard["rank"].tolist() == list(range(1, 13))
+    best_models = leaderboard["model"].iloc[:2].tolist()
+    for result in results:
+        assert list(result.backtest_dataset.predictions) == \
+            ["RandomWalk"] + best_models
+
+
+def test_regressors_config_compares_arima_with_and_without_them(work_dir):
+    config = make_config(naive_models=False)
+    get_child(config, "data_preparation", "data_loader", "local")[
+        "other_args"
+    ]["path"] = "tests/data/test_time_series_regressor_data.csv"
+    data_converter_config = get_child(
+        config,
+        "data_preparation",
+        "data_converter"
+    )
+    get_child(data_converter_config, "time_series")["other_args"][
+        "regressor_cols"
+    ] = ["x0", "x1"]
+    get_child(data_converter_config, "time_series_backtest")["other_args"][
+        "max_test_window_length"
+    ] = 3
+    modelling_config = get_child(config, "modelling")
+    modelling_config["child_configs"][0] = copy.deepcopy(
+        modelling_config["child_configs"][1]
+    )
+    modelling_config["child_configs"][1]["other_args"][
+        "use_regressors"
+    ] = False
+
+    results = integration_tests.run_config(config)
+
+    errors = pd.concat([
+        result.get_model_error(error_functions=("MSE",), level="model")
+        for result in results
+    ]).groupby("model")["error"].mean()
+    # the regressors drive the series, so ARIMAX forecasts them better
+    assert errors["ARIMA (AR: 1, I: 0, MA: 0)"] < \
+        errors["ARIMA (AR: 1, I: 0, MA: 0, no regressors)"]
+
+
+def test_fast_models_config_predicts_every_window(work_dir):
+    config = make_config(naive_models=False)
+    get_child(config, "modelling")["child_configs"][1:] = [
+        {"name": "simple_exponential_smoothing", "type": "leaf",
+         "other_args": {"alpha": 0.3}},
+        {"name": "holt_linear_trend", "type": "leaf",
+         "other_args": {"alpha": 0.3, "beta": 0.1}},
+        {"name": "auto_regressive", "type": "leaf",
+         "other_args": {"order": 2}}
+    ]
+
+    results = integration_tests.run_config(config)
+
+    predictions = get_predictions(results)
+    assert list(predictions) == [
+        "RandomWalk",
+        "SimpleExponentialSmoothing (alpha: 0.3)",
+        "HoltLinearTrend (alpha: 0.3, beta: 0.1)",
+        "AutoRegressive (p: 2)"
+    ]
+    for model_predictions in predictions.values():
+        assert np.isfinite(model_predictions).all()
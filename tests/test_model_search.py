@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+from general_analytics_framwork.datasets import (
+    TimeseriesBacktestDataset,
+    TimeseriesDataset
+)
+from general_analytics_framwork.model_search import ModelSearch
+from general_analytics_framwork.modelling import TimeSeriesModel
+
+
+class TrendModel(TimeSeriesModel):
+    """
+    Extends the last value by slope per step. Sloped fits fail unless the
+    last value is a multiple of 3.
+    """
+
+    def __init__(self, slope=0):
+        self.slope = slope
+        self.last_value = None
+
+    def get_reference(self):
+        return f"Trend (slope {self.slope})"
+
+    def fit(self, y_train, regressors_train=None):
+        if self.slope and y_train[-1] % 3:
+            raise ValueError("fit failed")
+        self.last_value = y_train[-1]
+
+    def predict(self, horizon, regressors_test=None):
+        return self.last_value + self.slope * np.arange(1, horizon + 1)
+
+
+class TrendSearch(ModelSearch):
+
+    MODEL_CLASS = TrendModel
+
+
+def test_partially_failing_candidate_ranks_last():
+    dates = pd.date_range("2020-01-01", periods=20, freq="D").values
+    data = [TimeseriesBacktestDataset(
+        TimeseriesDataset("a", dates, np.arange(20.0)),
+        train_window_length=10,
+        max_test_window_length=2
+    )]
+    search = TrendSearch(param_grid={"slope": [0, 1]}, min_windows=9)
+
+    search.run(data)
+
+    # the sloped candidate is exact on the windows it fits
+    assert search.leaderboard["slope"].tolist() == [0, 1]
+    assert search.leaderboard["error"].iloc[0] > 0
+    assert np.isnan(search.leaderboard["error"].iloc[1])
+    assert list(data[0].predictions) == ["Trend (slope 0)"]
@@ -0,0 +1,278 @@
+import numpy as np
+import pandas as pd
+import pytest
+from general_analytics_framwork.datasets import (
+    TimeseriesBacktestDataset,
+    TimeseriesDataset
+)
+from general_analytics_framwork.modelling import (
+    ARIMA,
+    AutoRegressive,
+    BacktestRunner,
+    Drift,
+    HoltLinearTrend,
+    RandomWalk,
+    SeasonalNaive,
+    SimpleExponentialSmoothing
+)
+
+
+def make_data(n_series=3, n_obs=40, n_regressors=0, **kwargs):
+    random_state = np.random.RandomState(0)
+    dates = pd.date_range("2020-01-01", periods=n_obs, freq="D").values
+    data = []
+    for series in range(n_series):
+        y_data = np.cumsum(random_state.normal(size=n_obs)) + 10 * series
+        regressor_data = None
+        if n_regressors:
+            regressor_data = random_state.normal(size=(n_obs, n_regressors))
+            y_data += regressor_data.sum(axis=1)
+        data.append(TimeseriesBacktestDataset(
+            TimeseriesDataset(
+                f"series_{series}",
+                dates,
+                y_data,
+                regressor_data=regressor_data,
+                regressor_names=[
+                    f"x{position}" for position in range(n_regressors)
+                ] if n_regressors else None
+            ),
+            **kwargs
+        ))
+    return data
+
+
+def get_predictions(data, model):
+    return np.stack([
+        backtest_dataset.predictions[model.get_reference()].array
+        for backtest_dataset in data
+    ])
+
+
+@pytest.mark.parametrize("chunk_by, chunk_size", [
+    ("series", None),
+    ("series", 1),
+    ("window", None),
+    ("window", 1),
+    ("window", 7)
+])
+def test_parallel_run_matches_serial_run(chunk_by, chunk_size):
+    model = ARIMA()
+    serial = BacktestRunner().run(
+        model,
+        make_data(train_window_length=30, max_test_window_length=3)
+    )
+    parallel = BacktestRunner(
+        n_jobs=2,
+        chunk_by=chunk_by,
+        chunk_size=chunk_size
+    ).run(
+        model,
+        make_data(train_window_length=30, max_test_window_length=3)
+    )
+
+    np.testing.assert_array_equal(
+        get_predictions(parallel, model),
+        get_predictions(serial, model)
+    )
+
+
+@pytest.mark.parametrize("model", [
+    RandomWalk(),
+    SeasonalNaive(season_length=7),
+    Drift()
+])
+def test_batch_forecasts_match_window_forecasts(model):
+    data = make_data(train_window_length=30, max_test_window_length=3)
+    expected_data = make_data(train_window_length=30, max_test_window_length=3)
+
+    BacktestRunner().run(model, data)
+    for backtest_dataset in expected_data:
+        for window in backtest_dataset:
+            model.fit_predict(window)
+
+    np.testing.assert_allclose(
+        get_predictions(data, model),
+        get_predictions(expected_data, model),
+        rtol=1e-10
+    )
+
+
+def simple_exponential_smoothing_forecast(y_train, horizon):
+    from statsmodels.tsa.holtwinters import SimpleExpSmoothing
+    return SimpleExpSmoothing(
+        y_train,
+        initialization_method="known",
+        initial_level=y_train[0]
+    ).fit(smoothing_level=0.3, optimized=False).forecast(horizon)
+
+
+def holt_linear_trend_forecast(y_train, horizon):
+    from statsmodels.tsa.holtwinters import Holt
+    return Holt(
+        y_train,
+        initialization_method="known",
+        initial_level=y_train[0],
+        initial_trend=y_train[1] - y_train[0]
+    ).fit(
+        smoothing_level=0.3,
+        smoothing_trend=0.1,
+        optimized=False
+    ).forecast(horizon)
+
+
+def auto_regressive_forecast(y_train, horizon):
+    from statsmodels.tsa.ar_model import AutoReg
+    return AutoReg(y_train, lags=2, trend="c").fit().forecast(horizon)
+
+
+@pytest.mark.parametrize("model, reference_forecast", [
+    (SimpleExponentialSmoothing(alpha=0.3),
+     simple_exponential_smoothing_forecast),
+    (HoltLinearTrend(alpha=0.3, beta=0.1), holt_linear_trend_forecast),
+    (AutoRegressive(order=2), auto_regressive_forecast)
+])
+@pytest.mark.parametrize("window_type", ["rolling", "expanding"])
+def test_batch_forecasts_match_statsmodels(
+        model,
+        reference_forecast,
+        window_type
+):
+    data = BacktestRunner().run(model, make_data(
+        train_window_length=10,
+        max_test_window_length=3,
+        window_type=window_type
+    ))
+
+    for backtest_dataset in data:
+        predictions = backtest_dataset.predictions[model.get_reference()]
+        for window_index in backtest_dataset.get_window_indexes():
+            y_train = backtest_dataset.get_data("y", "train", window_index)
+            horizon = len(
+                backtest_dataset.get_data("y", "test", window_index)
+            )
+            np.testing.assert_allclose(
+                predictions[window_index]["prediction"],
+                reference_forecast(np.array(y_train), horizon),
+                rtol=1e-8
+            )
+
+
+def test_naive_forecasts():
+    data = make_data(n_series=1, n_obs=8, train_window_length=4,
+                     max_test_window_length=3)
+    data[0].time_series_dataset.y_data[:] = [1, 2, 4, 7, 11, 16, 22, 29]
+    models = [RandomWalk(), SeasonalNaive(season_length=2), Drift()]
+
+    for model in models:
+        BacktestRunner().run(model, data)
+
+    # window 3 trains on 1, 2, 4, 7 and tests on 11, 16, 22
+    predictions = [
+        data[0].predictions[model.get_reference()][3]["prediction"]
+        for model in models
+    ]
+    np.testing.assert_allclose(
+        predictions,
+        [[7, 7, 7], [4, 7, 4], [9, 11, 13]]
+    )
+
+
+def test_stateful_model_ignores_window_chunking():
+    model = ARIMA(refit_every=3)
+    serial = BacktestRunner().run(
+        model,
+        make_data(train_window_length=30, max_test_window_length=3)
+    )
+    parallel = BacktestRunner(n_jobs=2, chunk_by="window", chunk_size=1).run(
+        model,
+        make_data(train_window_length=30, max_test_window_length=3)
+    )
+
+    np.testing.assert_array_equal(
+        get_predictions(parallel, model),
+        get_predictions(serial, model)
+    )
+
+
+def test_warm_start_converges_to_cold_start_forecasts():
+    cold_model = ARIMA()
+    warm_model = ARIMA(warm_start=True)
+    cold = BacktestRunner().run(
+        cold_model,
+        make_data(train_window_length=30, max_test_window_length=3)
+    )
+    warm = BacktestRunner().run(
+        warm_model,
+        make_data(train_window_length=30, max_test_window_length=3)
+    )
+
+    np.testing.assert_allclose(
+        get_predictions(warm, warm_model),
+        get_predictions(cold, cold_model),
+        atol=1e-2
+    )
+
+
+@pytest.mark.parametrize("model", [
+    ARIMA(warm_start=True),
+    ARIMA(refit_every=3)
+])
+def test_stateful_model_is_reset_between_series(model):
+    data = make_data(train_window_length=30, max_test_window_length=3)
+    expected_data = make_data(train_window_length=30, max_test_window_length=3)
+
+    BacktestRunner().run(model, data)
+    BacktestRunner().run(model, expected_data[1:])
+
+    np.testing.assert_array_equal(
+        get_predictions(data[1:], model),
+        get_predictions(expected_data[1:], model)
+    )
+
+
+def test_arima_forecasts_with_regressors_as_exog():
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+    data = make_data(
+        n_series=1,
+        n_regressors=2,
+        train_window_length=30,
+        max_test_window_length=3
+    )
+    window = data[0].get_window(2)
+    model = ARIMA()
+
+    model.fit_predict(window)
+
+    expected_prediction = SARIMAX(
+        endog=window.get_data("y", "train"),
+        exog=window.get_data("regressors", "train"),
+        order=(1, 0, 0),
+        enforce_invertibility=False,
+        enforce_stationarity=False
+    ).fit(disp=0).forecast(3, exog=window.get_data("regressors", "test"))
+    np.testing.assert_allclose(
+        data[0].predictions[model.get_reference()][2]["prediction"],
+        expected_prediction
+    )
+
+
+def test_arima_without_regressors_ignores_them():
+    model = ARIMA(use_regressors=False)
+    data = BacktestRunner().run(
+        model,
+        make_data(n_regressors=2, train_window_length=30,
+                  max_test_window_length=3)
+    )
+    expected_data = make_data(n_regressors=2, train_window_length=30,
+                              max_test_window_length=3)
+    for backtest_dataset in expected_data:
+        backtest_dataset.time_series_dataset.regressor_data = None
+        backtest_dataset.time_series_dataset.regressor_names = []
+    BacktestRunner().run(ARIMA(), expected_data)
+
+    assert model.get_reference() == "ARIMA (AR: 1, I: 0, MA: 0, no regressors)"
+    np.testing.assert_array_equal(
+        get_predictions(data, model),
+        get_predictions(expected_data, ARIMA())
+    )
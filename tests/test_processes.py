@@ -0,0 +1,82 @@
+import os
+import numpy as np
+from general_analytics_framwork.config import NodeConfig
+from general_analytics_framwork.modelling import ARIMA, Drift, RandomWalk
+from general_analytics_framwork.process_builder import ProcessBuilder
+from general_analytics_framwork.processes import ModellingProcess
+from test_modelling import get_predictions, make_data
+
+
+def build_modelling_process(**other_args):
+    config = NodeConfig(
+        type="node",
+        name="modelling",
+        child_configs=[
+            {"type": "leaf", "name": "random_walk", "other_args": {}},
+            {"type": "leaf", "name": "drift", "other_args": {}},
+            {"type": "leaf", "name": "arima", "other_args": {}}
+        ],
+        other_args=other_args
+    )
+    return ProcessBuilder().build(config, {"modelling": ModellingProcess})
+
+
+def assert_same_predictions(data, expected_data):
+    for model in [RandomWalk(), Drift(), ARIMA()]:
+        np.testing.assert_array_equal(
+            get_predictions(data, model),
+            get_predictions(expected_data, model)
+        )
+
+
+def test_checkpointed_run_matches_run(tmp_path):
+    expected_data = build_modelling_process().run(
+        make_data(train_window_length=30, max_test_window_length=3)
+    )
+    process = build_modelling_process(
+        n_jobs=2,
+        checkpoint_dir=str(tmp_path)
+    )
+
+    data = process.run(
+        make_data(train_window_length=30, max_test_window_length=3)
+    )
+
+    assert len(os.listdir(tmp_path)) == 3
+    assert_same_predictions(data, expected_data)
+
+
+def test_checkpointed_run_resumes(tmp_path):
+    expected_data = build_modelling_process(
+        checkpoint_dir=str(tmp_path)
+    ).run(make_data(train_window_length=30, max_test_window_length=3))
+    os.remove(os.path.join(tmp_path, sorted(os.listdir(tmp_path))[0]))
+    process = build_modelling_process(checkpoint_dir=str(tmp_path))
+    run_models = process.run_models
+    modelled = []
+
+    def record_run_models(data):
+        modelled.extend(data)
+        return run_models(data)
+
+    process.run_models = record_run_models
+
+    data = process.run(
+        make_data(train_window_length=30, max_test_window_length=3)
+    )
+
+    assert len(modelled) == 1
+    assert len(os.listdir(tmp_path)) == 3
+    assert_same_predictions(data, expected_data)
+
+
+def test_stream_matches_run():
+    expected_data = build_modelling_process().run(
+        make_data(train_window_length=30, max_test_window_length=3)
+    )
+
+    data = list(build_modelling_process(n_jobs=2).stream(iter(
+        make_data(train_window_length=30, max_test_window_length=3)
+    )))
+
+    assert_same_predictions(data, expected_data)
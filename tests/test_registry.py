@@ -0,0 +1,76 @@
+from importlib.metadata import EntryPoint
+import pytest
+from general_analytics_framwork import registry
+from general_analytics_framwork.modelling import RandomWalk
+from general_analytics_framwork.processes import ModellingProcess
+from general_analytics_framwork.registry import LazyRegistry
+
+ENTRY_POINT_GROUP = "general_analytics_framwork.test_models"
+
+
+@pytest.fixture
+def plugin_path(tmp_path, monkeypatch):
+    """
+    Install a plugin distribution registering a model as an entry point.
+    """
+    (tmp_path / "plugin_models.py").write_text(
+        "from general_analytics_framwork.modelling import RandomWalk\n"
+        "\n"
+        "\n"
+        "class PluginModel(RandomWalk):\n"
+        "    pass\n"
+    )
+    dist_info = tmp_path / "plugin_models-0.1.dist-info"
+    dist_info.mkdir()
+    (dist_info / "METADATA").write_text(
+        "Metadata-Version: 2.1\nName: plugin-models\nVersion: 0.1\n"
+    )
+    (dist_info / "entry_points.txt").write_text(
+        f"[{ENTRY_POINT_GROUP}]\n"
+        f"plugin_model = plugin_models:PluginModel\n"
+        f"random_walk = plugin_models:PluginModel\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    return tmp_path
+
+
+def test_entries_are_imported_on_lookup():
+    entries = LazyRegistry({
+        "random_walk": "general_analytics_framwork.modelling:RandomWalk",
+        "modelling": ModellingProcess
+    })
+
+    assert entries["random_walk"] is RandomWalk
+    assert entries["modelling"] is ModellingProcess
+    with pytest.raises(KeyError, match="not registered"):
+        entries["arima"]
+
+
+def test_entry_points_are_registered(plugin_path):
+    entries = LazyRegistry(
+        {"random_walk": "general_analytics_framwork.modelling:RandomWalk"},
+        entry_point_group=ENTRY_POINT_GROUP
+    )
+
+    assert entries["plugin_model"].__name__ == "PluginModel"
+    # built in entries take precedence
+    assert entries["random_walk"] is RandomWalk
+    assert sorted(entries) == ["plugin_model", "random_walk"]
+
+
+def test_entry_points_of_python_3_9(monkeypatch):
+    entry_point = EntryPoint(
+        "random_walk",
+        "general_analytics_framwork.modelling:RandomWalk",
+        ENTRY_POINT_GROUP
+    )
+    # before Python 3.10, entry_points returns a dict of groups
+    monkeypatch.setattr(
+        registry,
+        "entry_points",
+        lambda: {ENTRY_POINT_GROUP: [entry_point]}
+    )
+
+    assert list(registry.get_entry_points(ENTRY_POINT_GROUP)) == \
+        [entry_point]
+    assert list(registry.get_entry_points("other")) == []
@@ -0,0 +1,99 @@
+import os
+import re
+import matplotlib
+import matplotlib.pyplot as plt
+import pytest
+from general_analytics_framwork.modelling import BacktestRunner, RandomWalk
+from general_analytics_framwork.visualisation import ForecastGraphPlotter
+from test_modelling import make_data
+
+matplotlib.use("Agg")
+
+
+@pytest.fixture
+def backtest_data():
+    # windows 1 to 6 of each series are plotted
+    return BacktestRunner().run(
+        RandomWalk(),
+        make_data(
+            n_series=2,
+            n_obs=20,
+            train_window_length=12,
+            max_test_window_length=2
+        )
+    )
+
+
+def make_forecast_plotter(output_dir, **kwargs):
+    return ForecastGraphPlotter(
+        "Forecast",
+        [6, 3],
+        "Date",
+        "Y",
+        output_dir=str(output_dir),
+        **kwargs
+    )
+
+
+def test_headless_plotter_saves_at_most_max_figures(backtest_data, tmp_path):
+    plotter = make_forecast_plotter(tmp_path, max_figures=8)
+    figure_numbers = plt.get_fignums()
+
+    paths = plotter.run(backtest_data)
+
+    assert [os.path.basename(path) for path in paths] == [
+        f"ForecastGraphPlotter_series_{series}_window_{window}.png"
+        for series, window in [(0, 1), (0, 2), (0, 3), (0, 4), (0, 5),
+                               (0, 6), (1, 1), (1, 2)]
+    ]
+    assert sorted(os.listdir(tmp_path)) == \
+        sorted(os.path.basename(path) for path in paths)
+    assert plt.get_fignums() == figure_numbers
+
+
+def test_headless_plotter_renders_on_a_process_pool(backtest_data, tmp_path):
+    paths = make_forecast_plotter(tmp_path / "serial").run(backtest_data)
+
+    parallel_paths = make_forecast_plotter(
+        tmp_path / "parallel",
+        n_jobs=2
+    ).run(backtest_data)
+
+    assert len(paths) == 12
+    assert [os.path.basename(path) for path in parallel_paths] == \
+        [os.path.basename(path) for path in paths]
+    assert all(os.path.getsize(path) for path in parallel_paths)
+
+
+def test_reused_figure_saves_the_same_files(backtest_data, tmp_path):
+    paths = make_forecast_plotter(tmp_path / "default").run(backtest_data)
+
+    reused_paths = make_forecast_plotter(
+        tmp_path / "reused",
+        reuse_figure=True
+    ).run(backtest_data)
+
+    assert [os.path.basename(path) for path in reused_paths] == \
+        [os.path.basename(path) for path in paths]
+    assert all(os.path.getsize(path) for path in reused_paths)
+
+
+def test_multipage_pdf_has_a_page_per_window(backtest_data, tmp_path):
+    plotter = make_forecast_plotter(
+        tmp_path,
+        file_format="pdf",
+        multipage_pdf=True,
+        max_figures=10
+    )
+
+    paths = plotter.run(backtest_data)
+
+    assert [os.path.basename(path) for path in paths] == [
+        "ForecastGraphPlotter_series_0.pdf",
+        "ForecastGraphPlotter_series_1.pdf"
+    ]
+    page_counts = []
+    for path in paths:
+        with open(path, "rb") as f:
+            page_counts.append(len(re.findall(rb"/Type /Page\b", f.read())))
+    assert page_counts == [6, 4]